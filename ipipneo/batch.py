@@ -0,0 +1,256 @@
+"""Bulk ingest of answers into a compact matrix used by batch scoring."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import csv
+from array import array
+from operator import itemgetter
+
+from ipipneo.model import QuestionNumber
+from ipipneo.reverse import (IPIP_NEO_ITEMS_REVERSED_120,
+                             IPIP_NEO_ITEMS_REVERSED_300)
+from ipipneo.utility import (answers_is_valid, raise_if_age_is_invalid,
+                             raise_if_sex_is_invalid)
+
+# Swaps the selected option (1=5, 2=4, 4=2, 5=1) of every byte at once.
+REVERSE_TABLE = bytes([0, 5, 4, 3, 2, 1]) + bytes(range(6, 256))
+
+
+class AnswerMatrix:
+    """Answers of many individuals stored row by row in a single byte buffer."""
+
+    def __init__(self, question: int) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+        """
+        if question not in list(QuestionNumber):
+            raise ValueError(f"Type question {question} is invalid!")
+
+        self.question: int = int(question)
+        self.sex: list = []
+        self.age: array = array("h")
+        self.data: bytearray = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.age)
+
+    def append(self, sex: str, age: int, answers: list) -> None:
+        """
+        Add an individual to the end of the matrix.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: The selected options sorted by question.
+        """
+        assert (
+            len(answers) == self.question
+        ), f"The (answers) field should be of size {self.question}!"
+
+        self.data.extend(answers)
+        self.sex.append(sex)
+        self.age.append(age)
+
+    def row(self, index: int) -> bytearray:
+        """
+        Return the answers of an individual.
+
+        Args:
+            - index: Position of the individual in the matrix.
+        """
+        return self.data[index * self.question : (index + 1) * self.question]
+
+    def select(self, rows: list) -> "AnswerMatrix":
+        """
+        Return a new matrix with some rows of this one, in the given order.
+
+        Args:
+            - rows: Positions of the individuals in the matrix.
+        """
+        matrix = AnswerMatrix(question=self.question)
+        matrix.sex = [self.sex[i] for i in rows]
+        matrix.age = array("h", (self.age[i] for i in rows))
+        matrix.data = bytearray().join(self.row(index=i) for i in rows)
+        return matrix
+
+    def validate(self) -> bool | AssertionError | BaseException:
+        """Validate all rows at once, only looking row by row when there is an error."""
+        assert len(self.sex) == len(self.age), "The (sex) and (age) sizes differ!"
+        assert (
+            len(self.data) == len(self.age) * self.question
+        ), "The matrix size does not match the number of questions!"
+
+        for sex in set(self.sex):
+            raise_if_sex_is_invalid(sex=sex)
+
+        if self.age:
+            raise_if_age_is_invalid(age=min(self.age))
+            raise_if_age_is_invalid(age=max(self.age))
+
+        if self.data and (min(self.data) < 1 or max(self.data) > 5):
+            for i in range(len(self)):
+                try:
+                    answers_is_valid(answers=list(self.row(index=i)))
+                except BaseException as e:
+                    raise BaseException(f"Invalid answers in row {i}: {str(e)}")
+
+        return True
+
+
+def reverse_matrix(matrix: AnswerMatrix) -> bytearray:
+    """
+    Apply reverse scoring on all rows of the matrix (IPIP-120 or IPIP-300).
+
+    The whole buffer is translated once and only the reversed columns are copied
+    back, so the cost does not depend on a loop per answer.
+
+    Args:
+        - matrix: The matrix with the answers.
+    """
+    items = (
+        IPIP_NEO_ITEMS_REVERSED_120
+        if matrix.question == 120
+        else IPIP_NEO_ITEMS_REVERSED_300
+    )
+
+    flipped = matrix.data.translate(REVERSE_TABLE)
+    reversed = bytearray(matrix.data)
+
+    for item in items:
+        reversed[item - 1 :: matrix.question] = flipped[item - 1 :: matrix.question]
+
+    return reversed
+
+
+def unique_rows(matrix: AnswerMatrix, groups: list = None) -> tuple:
+    """
+    Find the rows of the matrix with the same sex, group and answers.
+
+    Return the position of the first row of each distinct tuple and, for each
+    row, the index of its tuple in that list.
+
+    Args:
+        - matrix: The matrix with the answers.
+        - groups: The norm group of each row, by default its age.
+    """
+    groups = matrix.age if groups is None else groups
+    assert len(groups) == len(matrix), "There must be one group per row!"
+
+    size, index, first, inverse = matrix.question, {}, [], []
+    for i, (sex, group) in enumerate(zip(matrix.sex, groups)):
+        key = (sex, group, bytes(matrix.data[i * size : (i + 1) * size]))
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(first)
+            first.append(i)
+        inverse.append(position)
+
+    return first, inverse
+
+
+def _lines(f: object, end: int = None, offset: list = None) -> iter:
+    """
+    Decoded lines of a binary file, from its position up to the offset (end).
+
+    The offset of the last line read is kept in (offset[0]).
+    """
+    position = f.tell()
+    for line in iter(f.readline, b""):
+        if end is not None and position >= end:
+            return
+        if offset is not None:
+            offset[0] = position
+        position += len(line)
+        yield line.decode("utf-8")
+
+
+def _validate(matrix: AnswerMatrix, offsets: array) -> None:
+    """Validate a matrix read from a file, the errors give the offset of the row."""
+    try:
+        matrix.validate()
+    except BaseException:
+        for i, offset in enumerate(offsets):
+            try:
+                raise_if_sex_is_invalid(sex=matrix.sex[i])
+                raise_if_age_is_invalid(age=matrix.age[i])
+                answers_is_valid(answers=list(matrix.row(index=i)))
+            except BaseException as e:
+                raise BaseException(f"Invalid row at byte {offset}: {str(e)}")
+        raise
+
+
+def read_csv(
+    path: str,
+    question: int,
+    chunk_size: int = 1000,
+    delimiter: str = None,
+    start: int = 0,
+    end: int = None,
+) -> iter:
+    """
+    Read a wide CSV/TSV file (sex, age, q1..qN) in chunks of validated matrices.
+
+    Args:
+        - path: The path of the file.
+        - question: Question type, 120 or 300.
+        - chunk_size: Maximum number of rows in each matrix.
+        - delimiter: Column separator, by default a tab for (.tsv) files.
+        - start: Offset of the first line to be read, after the header.
+        - end: Offset where the reading stops, the lines that start before it
+               are read. The file is read to the end by default.
+
+    The errors give the byte offset of the invalid row in the file.
+    """
+    assert isinstance(chunk_size, int) and chunk_size > 0, "Invalid (chunk_size)!"
+
+    if delimiter is None:
+        delimiter = "\t" if str(path).lower().endswith(".tsv") else ","
+
+    with open(path, "rb") as f:
+        header = next(csv.reader(_lines(f=f, end=None), delimiter=delimiter), [])
+        header = [x.strip().lower() for x in header]
+        f.seek(max(start, f.tell()))
+        offset = [f.tell()]
+        reader = csv.reader(_lines(f=f, end=end, offset=offset), delimiter=delimiter)
+
+        columns = ["sex", "age"] + [f"q{i}" for i in range(1, question + 1)]
+
+        missing = [x for x in columns if x not in header]
+        if missing:
+            raise BaseException(f"The columns {missing[:5]} were not found!")
+
+        sex_age = itemgetter(header.index("sex"), header.index("age"))
+        selects = itemgetter(*[header.index(x) for x in columns[2:]])
+
+        matrix, offsets = AnswerMatrix(question=question), array("q")
+        for row in reader:
+            if not row:
+                continue
+            try:
+                sex, age = sex_age(row)
+                matrix.append(
+                    sex=sex.strip(),
+                    age=int(age),
+                    answers=[int(x) for x in selects(row)],
+                )
+            except (IndexError, ValueError, OverflowError) as e:
+                raise BaseException(f"Invalid row at byte {offset[0]}: {str(e)}")
+            offsets.append(offset[0])
+
+            if len(matrix) == chunk_size:
+                _validate(matrix=matrix, offsets=offsets)
+                yield matrix
+                matrix, offsets = AnswerMatrix(question=question), array("q")
+
+        if len(matrix):
+            _validate(matrix=matrix, offsets=offsets)
+            yield matrix
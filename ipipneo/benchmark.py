@@ -0,0 +1,215 @@
+"""Benchmark of the memory allocated per scored individual."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import random
+import sys
+import tracemalloc
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.utility import organize_list_json
+
+# Maximum bytes per individual, (peak, retained) of each stage.
+MEMORY_BUDGETS = {
+    120: {
+        "validation": (1000, 1000),
+        "deepcopy": (30000, 15000),
+        "reverse": (50000, 36000),
+        "organize": (4000, 2000),
+        "norm": (2000, 1000),
+        "score": (2000, 2000),
+        "tscore": (16000, 8000),
+        "percentile": (14000, 10000),
+        "assembly": (10000, 3000),
+        "compute": (80000, 13000),
+        "batch": (14000, 13000),
+    },
+    300: {
+        "validation": (1000, 1000),
+        "deepcopy": (100000, 66000),
+        "reverse": (120000, 88000),
+        "organize": (12000, 4000),
+        "norm": (2000, 1000),
+        "score": (4000, 4000),
+        "tscore": (36000, 18000),
+        "percentile": (18000, 10000),
+        "assembly": (10000, 3000),
+        "compute": (196000, 13000),
+        "batch": (15000, 13000),
+    },
+}
+
+
+def sample_answers(question: int, seed: int = 0) -> dict:
+    """
+    Create a standardized dictionary with random answers.
+
+    Args:
+        - question: Question type, 120 or 300.
+        - seed: Seed of the random answers.
+    """
+    selects = random.Random(seed)
+    return {
+        "answers": [
+            {"id_question": i, "id_select": selects.randint(1, 5)}
+            for i in range(1, question + 1)
+        ]
+    }
+
+
+class MemoryMeter:
+    """Peak and retained bytes of consecutive stages, based on (tracemalloc)."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.stages: dict = {}
+        self._current: str = None
+        self._before: int = 0
+
+    def measure(self, stage: str, function: callable, *args, **kwargs) -> object:
+        """
+        Run a function and add its peak and retained bytes to the stage.
+
+        Args:
+            - stage: Name of the stage.
+            - function: The function to be measured.
+            - args: Positional arguments of the function.
+            - kwargs: Named arguments of the function.
+        """
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = function(*args, **kwargs)
+        after, peak = tracemalloc.get_traced_memory()
+
+        peaks, retained = self.stages.get(stage, (0, 0))
+        self.stages[stage] = (peaks + peak - before, retained + after - before)
+
+        return result
+
+    def stage(self, name: str) -> None:
+        """
+        Close the current stage and start another one, used as the stage
+        callback of the scoring steps.
+
+        Args:
+            - name: Name of the stage that starts.
+        """
+        self.close()
+        tracemalloc.reset_peak()
+        self._current, self._before = name, tracemalloc.get_traced_memory()[0]
+
+    def close(self) -> None:
+        """Add the peak and retained bytes of the current stage, if any."""
+        if self._current is None:
+            return
+
+        after, peak = tracemalloc.get_traced_memory()
+        peaks, retained = self.stages.get(self._current, (0, 0))
+        self.stages[self._current] = (
+            peaks + peak - self._before,
+            retained + after - self._before,
+        )
+        self._current = None
+
+
+def memory_report(question: int = 120, repeat: int = 20) -> dict:
+    """
+    Bytes allocated per individual in each stage of the compute method.
+
+    The stages are the ones of the compute method, measured while it runs. The
+    peak is the highest memory used above the start of the stage and the
+    retained is what is still allocated at the end of it. The (tscore) and
+    (percentile) stages hold the (X, Y, N, E, O, A, C) lists of (Facet) sized to
+    the number of answers, the (assembly) stage is the nested dictionary with its
+    footer. The last stage is closed after the compute method returned, so its
+    retained bytes are net of the copies freed on return and can be negative.
+
+    Args:
+        - question: Question type, 120 or 300.
+        - repeat: Number of individuals measured, the report is the average.
+    """
+    assert isinstance(repeat, int) and repeat > 0, "Invalid (repeat)!"
+
+    ipip, meter = IpipNeo(question=question), MemoryMeter()
+    samples = [sample_answers(question=question, seed=i) for i in range(repeat)]
+
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+
+    try:
+        for answers in samples:
+            ipip._compute_staged(
+                sex="M", age=40, answers=answers, compare=False, stage=meter.stage
+            )
+            meter.close()
+
+            meter.measure("compute", ipip.compute, sex="M", age=40, answers=answers)
+
+        matrix = AnswerMatrix(question=question)
+        for answers in samples:
+            matrix.append(sex="M", age=40, answers=organize_list_json(answers))
+        meter.measure("batch", ipip.compute_batch, matrix=matrix)
+    finally:
+        if not started:
+            tracemalloc.stop()
+
+    return {
+        "question": question,
+        "repeat": repeat,
+        "stages": {
+            stage: {"peak": peak // repeat, "retained": retained // repeat}
+            for stage, (peak, retained) in meter.stages.items()
+        },
+    }
+
+
+def assert_memory_budget(report: dict, budgets: dict = None) -> bool | AssertionError:
+    """
+    Fail when the bytes per individual of any stage are above the budget.
+
+    Args:
+        - report: The result of (memory_report).
+        - budgets: Dictionary of stage to (peak, retained), see (MEMORY_BUDGETS).
+    """
+    budgets = budgets if budgets is not None else MEMORY_BUDGETS[report["question"]]
+
+    regressions = [
+        f"{stage}: {key} {value[key]} > {limit}"
+        for stage, value in report.get("stages", {}).items()
+        if stage in budgets
+        for key, limit in zip(("peak", "retained"), budgets[stage])
+        if value[key] > limit
+    ]
+    assert not regressions, "Memory budget exceeded: " + "; ".join(regressions)
+
+    return True
+
+
+def main() -> None:
+    """Print the memory report of both inventories and check the budgets."""
+    failed = False
+    for question in (120, 300):
+        report = memory_report(question=question)
+        print(f"\nIPIP-NEO-{question}, bytes per individual:\n")
+        print(f"{'stage':<10} {'peak':>10} {'retained':>10}")
+        for stage, value in report.get("stages", {}).items():
+            print(f"{stage:<10} {value['peak']:>10} {value['retained']:>10}")
+        try:
+            assert_memory_budget(report=report)
+        except AssertionError as e:
+            print(f"\n{str(e)}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Compressed bitmap indexes of the levels (low, average, high) of the 35 scores."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+from array import array
+
+from ipipneo.store import LEVELS, ResultStore
+from ipipneo.utility import result_levels, score_names
+
+# Rows of each container, the key of a container is the row divided by it.
+CHUNK = 65536
+
+# Containers with up to this number of rows are sorted arrays, else bitmaps.
+ARRAY_LIMIT = 4096
+
+
+def _positions(bits: int) -> array:
+    """Return the sorted positions of the bits set in an integer."""
+    positions = array("H")
+    for i, byte in enumerate(bits.to_bytes(CHUNK // 8, "little")):
+        while byte:
+            low = byte & -byte
+            positions.append(i * 8 + low.bit_length() - 1)
+            byte ^= low
+    return positions
+
+
+def _bits(container: object) -> int:
+    """Return a container as an integer bitmap."""
+    if isinstance(container, int):
+        return container
+    data = bytearray(CHUNK // 8)
+    for x in container:
+        data[x >> 3] |= 1 << (x & 7)
+    return int.from_bytes(data, "little")
+
+
+def _normalize(container: object) -> object:
+    """Return the smallest form of a container, None when it is empty."""
+    if isinstance(container, int):
+        count = container.bit_count()
+        if count == 0:
+            return None
+        return _positions(bits=container) if count <= ARRAY_LIMIT else container
+    return container if len(container) else None
+
+
+def container_of(codes: bytes, code: int) -> object:
+    """
+    Return the container of the rows of a chunk with a given code.
+
+    Args:
+        - codes: One byte per row of the chunk.
+        - code: The code to be indexed.
+    """
+    count = codes.count(code)
+    if count == 0:
+        return None
+
+    if count <= ARRAY_LIMIT:
+        positions, start = array("H"), codes.find(code)
+        while start >= 0:
+            positions.append(start)
+            start = codes.find(code, start + 1)
+        return positions
+
+    table = bytearray(b"0" * 256)
+    table[code] = ord("1")
+    return int(codes.translate(table)[::-1], 2)
+
+
+class Bitmap:
+    """
+    Set of rows split in chunks of 65536, in the style of Roaring.
+
+    A sparse chunk is a sorted array of 16 bits positions and a dense chunk an
+    integer of 65536 bits, so the operations on dense chunks are a single
+    integer operation.
+    """
+
+    def __init__(self, containers: dict = None) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - containers: Dictionary of chunk to array or integer.
+        """
+        self.containers: dict = containers or {}
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return sum(
+            x.bit_count() if isinstance(x, int) else len(x)
+            for x in self.containers.values()
+        )
+
+    def __iter__(self) -> iter:
+        """Rows in ascending order."""
+        for key in sorted(self.containers):
+            container, base = self.containers[key], key * CHUNK
+            if isinstance(container, int):
+                container = _positions(bits=container)
+            for x in container:
+                yield base + x
+
+    def __contains__(self, row: int) -> bool:
+        container = self.containers.get(row // CHUNK)
+        if container is None:
+            return False
+        low = row % CHUNK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        return low in container
+
+    def __eq__(self, other: "Bitmap") -> bool:
+        return isinstance(other, Bitmap) and list(self) == list(other)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for key in self.containers.keys() & other.containers.keys():
+            a, b = self.containers[key], other.containers[key]
+            if isinstance(a, int) and isinstance(b, int):
+                found = _normalize(container=a & b)
+            elif isinstance(a, int) or isinstance(b, int):
+                bits, items = (a, b) if isinstance(a, int) else (b, a)
+                data = bits.to_bytes(CHUNK // 8, "little")
+                found = _normalize(
+                    container=array(
+                        "H", (x for x in items if data[x >> 3] >> (x & 7) & 1)
+                    )
+                )
+            else:
+                found = _normalize(container=array("H", sorted(set(a) & set(b))))
+            if found is not None:
+                containers[key] = found
+        return Bitmap(containers=containers)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        containers = dict(self.containers)
+        for key, b in other.containers.items():
+            a = containers.get(key)
+            if a is None:
+                containers[key] = b
+            elif isinstance(a, int) or isinstance(b, int):
+                containers[key] = _normalize(container=_bits(a) | _bits(b))
+            else:
+                union = sorted(set(a) | set(b))
+                containers[key] = (
+                    array("H", union)
+                    if len(union) <= ARRAY_LIMIT
+                    else _bits(container=union)
+                )
+        return Bitmap(containers=containers)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        containers = {}
+        for key, a in self.containers.items():
+            b = other.containers.get(key)
+            if b is None:
+                containers[key] = a
+                continue
+            if isinstance(a, int):
+                found = _normalize(container=a & ~_bits(container=b))
+            else:
+                remove = (
+                    b.to_bytes(CHUNK // 8, "little") if isinstance(b, int) else set(b)
+                )
+                if isinstance(b, int):
+                    kept = (x for x in a if not remove[x >> 3] >> (x & 7) & 1)
+                else:
+                    kept = (x for x in a if x not in remove)
+                found = _normalize(container=array("H", kept))
+            if found is not None:
+                containers[key] = found
+        return Bitmap(containers=containers)
+
+
+class LevelIndex:
+    """
+    Bitmap of the rows of each (score, level), built as the results arrive.
+
+    The rows of the current chunk are kept as one byte per score and turned
+    into containers when the chunk is full, so appending a row is cheap and a
+    query only builds the containers of the current chunk that it needs.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self.names: list = score_names()
+        self.rows: int = 0
+        self._bitmaps: dict = {}
+        self._tail: list = [bytearray() for _ in self.names]
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return self.rows
+
+    def add_codes(self, columns: list) -> None:
+        """
+        Add rows given by the level codes (positions of LEVELS) of each score.
+
+        Args:
+            - columns: The 35 columns of codes, in the order of (score_names).
+        """
+        assert len(columns) == len(self.names), "There must be 35 columns!"
+        size = len(columns[0])
+        assert all(len(x) == size for x in columns), "The columns sizes differ!"
+
+        start = 0
+        while start < size:
+            room = CHUNK - len(self._tail[0])
+            for tail, column in zip(self._tail, columns):
+                tail += column[start : start + room]
+            added = min(room, size - start)
+            start += added
+            self.rows += added
+            if len(self._tail[0]) == CHUNK:
+                self._freeze()
+
+    def _freeze(self) -> None:
+        key = (self.rows - 1) // CHUNK
+        for i, tail in enumerate(self._tail):
+            for code in range(len(LEVELS)):
+                container = container_of(codes=bytes(tail), code=code)
+                if container is not None:
+                    self._bitmaps.setdefault((i, code), {})[key] = container
+            tail.clear()
+
+    def add(self, result: dict) -> None:
+        """
+        Add a result of the compute method as the next row.
+
+        Args:
+            - result: The dictionary generated by the compute method.
+        """
+        self.add_codes(
+            columns=[bytes([LEVELS.index(x)]) for x in result_levels(result=result)]
+        )
+
+    def sync(self, store: ResultStore) -> None:
+        """
+        Add the rows of a result store that are not indexed yet.
+
+        Args:
+            - store: The store, whose rows are the rows of the index.
+        """
+        store.flush()
+        size = len(store)
+        if size > self.rows:
+            self.add_codes(
+                columns=[
+                    bytes(store.column(name=f"{x}.level")[self.rows : size])
+                    for x in self.names
+                ]
+            )
+
+    def bitmap(self, score: str, level: str) -> Bitmap:
+        """
+        Return the rows with a level of a score.
+
+        Args:
+            - score: Name of the score, see (score_names).
+            - level: The level, low, average or high.
+        """
+        if score not in self.names or level not in LEVELS:
+            raise BaseException(f"The score {score} or level {level} is invalid!")
+
+        i, code = self.names.index(score), LEVELS.index(level)
+        containers = dict(self._bitmaps.get((i, code), {}))
+        if self._tail[i]:
+            container = container_of(codes=bytes(self._tail[i]), code=code)
+            if container is not None:
+                containers[self.rows // CHUNK] = container
+        return Bitmap(containers=containers)
+
+    def all(self) -> Bitmap:
+        """Return all the rows, used to negate a bitmap with (-)."""
+        full, containers = (1 << CHUNK) - 1, {}
+        for key in range(self.rows // CHUNK):
+            containers[key] = full
+        if self.rows % CHUNK:
+            containers[self.rows // CHUNK] = _normalize(
+                container=(1 << (self.rows % CHUNK)) - 1
+            )
+        return Bitmap(containers=containers)
+
+    def query(self, where: dict) -> Bitmap:
+        """
+        Return the rows that match all the conditions.
+
+        Args:
+            - where: Dictionary of score name to a level or to a list of levels,
+                     such as {"conscientiousness": "high", "trust": ["average",
+                     "high"]}.
+        """
+        found = self.all()
+        for score, levels in where.items():
+            levels = [levels] if isinstance(levels, str) else levels
+            selected = Bitmap()
+            for level in levels:
+                selected = selected | self.bitmap(score=score, level=level)
+            found = found & selected
+        return found
+
+    def count(self, where: dict) -> int:
+        """
+        Return the number of rows that match all the conditions.
+
+        Args:
+            - where: The conditions, see (query).
+        """
+        return len(self.query(where=where))
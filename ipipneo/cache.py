@@ -0,0 +1,178 @@
+"""Persistent cache of the scored results, keyed by a hash of their inputs."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import hashlib
+import json
+import sqlite3
+
+# Maximum number of keys of each (IN) clause of a bulk lookup.
+LOOKUP_SIZE = 500
+
+
+def result_key(
+    question: int,
+    test: bool,
+    answers: list,
+    sex: str,
+    norm: dict,
+    scale: tuple,
+    level: tuple,
+    knots: list = None,
+) -> bytes:
+    """
+    Return the 16 bytes hash of everything that defines a scored result.
+
+    Args:
+        - question: Question type, 120 or 300.
+        - test: The test mode of the inventory.
+        - answers: The reversed answers, sorted by question.
+        - sex: Gender of the individual (M or F).
+        - norm: The norm group used, with its (id) and (ns) vector.
+        - scale: The minimum and maximum of the norm scale.
+        - level: The low and high facet levels.
+        - knots: The quantiles of the norm group, see (EmpiricalPercentile).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(
+        json.dumps(
+            [__version__, question, test, sex, norm.get("id"), norm.get("ns")]
+            + list(scale)
+            + list(level)
+        ).encode()
+    )
+    try:
+        digest.update(b"\0" + bytes(answers))
+    except (TypeError, ValueError):
+        # The scoring accepts answers that do not fit in a byte, so must the key.
+        digest.update(b"\1" + json.dumps(list(answers)).encode())
+    for x in knots or ():
+        digest.update(x.tobytes())
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    Personalities of scored results in a SQLite file, kept across restarts.
+
+    The file is in WAL mode, so many processes can read it while one of them
+    writes, each process must open its own cache. When the cache has more than
+    (max_entries) keys, the oldest written ones are evicted.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 1000000, name: str = "disk"
+    ) -> None:
+        """
+        Open a cache, created when the file does not exist.
+
+        Args:
+            - path: The path of the file, or (:memory:).
+            - max_entries: Maximum number of results kept.
+            - name: Name of the cache sent to (Recorder.cached).
+        """
+        assert (
+            isinstance(max_entries, int) and max_entries > 0
+        ), "The (max_entries) field must be > 0!"
+
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.name: str = name
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, value TEXT NOT NULL)"
+        )
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of results."""
+        return self.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.connection.close()
+
+    def get(self, key: bytes) -> object:
+        """
+        Return the value of a key, None when it is not cached.
+
+        Args:
+            - key: The key, see (result_key).
+        """
+        row = self.connection.execute(
+            "SELECT value FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Return a dictionary of key to value of the keys that are cached.
+
+        Args:
+            - keys: The keys, see (result_key).
+        """
+        keys, found = list(dict.fromkeys(keys)), {}
+        for start in range(0, len(keys), LOOKUP_SIZE):
+            chunk = keys[start : start + LOOKUP_SIZE]
+            for key, value in self.connection.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ):
+                found[key] = json.loads(value)
+        return found
+
+    def put(self, key: bytes, value: object) -> None:
+        """
+        Store the value of a key.
+
+        Args:
+            - key: The key, see (result_key).
+            - value: JSON compatible value, such as the personalities of a result.
+        """
+        self.put_many(items={key: value})
+
+    def put_many(self, items: dict) -> None:
+        """
+        Store many values in one transaction, then evict the oldest ones.
+
+        Args:
+            - items: Dictionary of key to value.
+        """
+        if not items:
+            return
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                (
+                    (key, json.dumps(value, separators=(",", ":")))
+                    for key, value in items.items()
+                ),
+            )
+            self.connection.execute(
+                "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY"
+                " rowid LIMIT MAX(0, (SELECT COUNT(*) FROM cache) - ?))",
+                (self.max_entries,),
+            )
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def clear(self) -> None:
+        """Remove all the results."""
+        self.connection.execute("DELETE FROM cache")
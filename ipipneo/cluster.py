@@ -0,0 +1,222 @@
+"""Archetypes of personality, clusters of the 30 facet percentiles."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import json
+import math
+import random
+
+from ipipneo.neighbors import DIMENSION, facet_vector
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+
+class MiniBatchKMeans:
+    """
+    K-means of Sculley, fed with small batches of profiles.
+
+    The centroids are seeded with k-means++ on the first batch. Each profile of a
+    batch moves its nearest centroid towards it by 1/n, where n is the number of
+    profiles the centroid has seen, so only one batch is in memory at a time.
+    """
+
+    def __init__(self, k: int = 8, batch: int = 1024, seed: int = None) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - k: Number of clusters.
+            - batch: Number of profiles of each batch of (fit).
+            - seed: Seed of the k-means++ and of the order of each batch.
+        """
+        assert isinstance(k, int) and k > 0, "The (k) field must be > 0!"
+        assert isinstance(batch, int) and batch >= k, "The (batch) field must be >= k!"
+
+        self.k: int = k
+        self.batch: int = batch
+        self.centers: list = []
+        self.counts: list = []
+        self._random = random.Random(seed)
+
+    def _seed(self, rows: list) -> None:
+        """Choose the first centroids with k-means++."""
+        centers = [list(self._random.choice(rows))]
+        nearest = [math.dist(x, centers[0]) ** 2 for x in rows]
+
+        while len(centers) < self.k:
+            if sum(nearest) > 0:
+                (center,) = self._random.choices(rows, weights=nearest)
+            else:
+                center = self._random.choice(rows)
+            centers.append(list(center))
+            nearest = [min(d, math.dist(x, center) ** 2) for x, d in zip(rows, nearest)]
+
+        self.centers, self.counts = centers, [0] * self.k
+
+    def _assign(self, rows: list) -> list:
+        """Return the nearest centroid of each profile and its exact distance."""
+        if numpy is not None:
+            x = numpy.asarray(rows, dtype=numpy.float64)
+            c = numpy.asarray(self.centers, dtype=numpy.float64)
+            squared = (
+                (x * x).sum(axis=1)[:, None]
+                - 2 * x @ c.T
+                + (c * c).sum(axis=1)[None, :]
+            )
+            best = squared.argmin(axis=1)
+            distances = numpy.linalg.norm(x - c[best], axis=1)
+            return list(zip(best.tolist(), distances.tolist()))
+
+        return [
+            min(
+                ((i, math.dist(x, c)) for i, c in enumerate(self.centers)),
+                key=lambda item: item[1],
+            )
+            for x in rows
+        ]
+
+    def partial_fit(self, rows: list) -> "MiniBatchKMeans":
+        """
+        Update the centroids with one batch of profiles.
+
+        Args:
+            - rows: The 30 facet percentiles of each profile.
+        """
+        if not rows:
+            return self
+        assert all(len(x) == DIMENSION for x in rows), "There must be 30 values!"
+
+        if not self.centers:
+            self._seed(rows=rows)
+
+        for x, (i, _) in zip(rows, self._assign(rows=rows)):
+            self.counts[i] += 1
+            rate, center = 1.0 / self.counts[i], self.centers[i]
+            for j, value in enumerate(x):
+                center[j] += rate * (value - center[j])
+
+        return self
+
+    def fit(self, vectors: iter, epochs: int = 1) -> "MiniBatchKMeans":
+        """
+        Cluster a stream of profiles, one batch at a time.
+
+        Args:
+            - vectors: Iterable of the 30 facet percentiles of each profile, or
+                       of results of compute. With (epochs) > 1 it must be
+                       possible to iterate it again, such as a list.
+            - epochs: Number of passes over the profiles.
+        """
+        assert isinstance(epochs, int) and epochs > 0, "The (epochs) field must be > 0!"
+
+        for _ in range(epochs):
+            rows = []
+            for values in vectors:
+                if isinstance(values, dict):
+                    values = facet_vector(result=values)
+                rows.append(values)
+                if len(rows) == self.batch:
+                    self._random.shuffle(rows)
+                    self.partial_fit(rows=rows)
+                    rows = []
+            self.partial_fit(rows=rows)
+
+        return self
+
+    def predict(self, values: list) -> tuple:
+        """
+        Return the (cluster, distance) of the nearest centroid of a profile.
+
+        Args:
+            - values: The 30 facet percentiles.
+        """
+        assert self.centers, "The clusters were not fitted!"
+        assert len(values) == DIMENSION, "There must be 30 values!"
+
+        return min(
+            ((i, math.dist(values, c)) for i, c in enumerate(self.centers)),
+            key=lambda item: item[1],
+        )
+
+    def predict_batch(self, rows: list) -> list:
+        """
+        Return the (cluster, distance) of many profiles, at once with NumPy.
+
+        Args:
+            - rows: The 30 facet percentiles of each profile.
+        """
+        assert self.centers, "The clusters were not fitted!"
+        return self._assign(rows=rows) if rows else []
+
+    def assign(self, result: dict) -> dict:
+        """
+        Return the archetype of a result of the compute method.
+
+        Args:
+            - result: The dictionary generated by the compute method.
+        """
+        cluster, distance = self.predict(values=facet_vector(result=result))
+        return {"cluster": cluster, "distance": distance}
+
+    def inertia(self, vectors: iter) -> float:
+        """
+        Return the sum of the squared distances of the profiles to their centroid.
+
+        Args:
+            - vectors: Iterable of the 30 facet percentiles of each profile.
+        """
+        return sum(self.predict(values=x)[1] ** 2 for x in vectors)
+
+    def to_dict(self) -> dict:
+        """Serialize the clusters, the output is JSON compatible."""
+        return {
+            "k": self.k,
+            "batch": self.batch,
+            "centers": self.centers,
+            "counts": self.counts,
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Write the clusters to a JSON file.
+
+        Args:
+            - path: The path of the file.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @staticmethod
+    def from_dict(data: dict, seed: int = None) -> "MiniBatchKMeans":
+        """
+        Load the clusters serialized by (to_dict).
+
+        Args:
+            - data: The serialized clusters.
+            - seed: Seed of the order of each batch, to continue the fit.
+        """
+        kmeans = MiniBatchKMeans(k=data["k"], batch=data["batch"], seed=seed)
+        kmeans.centers = [[float(x) for x in c] for c in data["centers"]]
+        kmeans.counts = [int(x) for x in data["counts"]]
+        return kmeans
+
+    @staticmethod
+    def load(path: str, seed: int = None) -> "MiniBatchKMeans":
+        """
+        Read the clusters written by (save).
+
+        Args:
+            - path: The path of the file.
+            - seed: Seed of the order of each batch, to continue the fit.
+        """
+        with open(path, encoding="utf-8") as f:
+            return MiniBatchKMeans.from_dict(data=json.load(f), seed=seed)
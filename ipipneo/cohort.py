@@ -0,0 +1,290 @@
+"""Streaming statistics of cohorts of results, mergeable across processes."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import math
+
+from ipipneo.norm import Norm
+from ipipneo.utility import result_scores, score_names
+
+
+class CohortStats:
+    """
+    Count, mean, variance (Welford) and histogram of each of the 35 scores.
+
+    Two partial stats are merged with the parallel formula of Chan et al., so
+    the result is the same as a single pass over all the values.
+    """
+
+    def __init__(self, bins: int = 20, low: float = 0.0, high: float = 100.0) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - bins: Number of bins of the histograms.
+            - low: Lower limit of the histograms, smaller values go to the first bin.
+            - high: Upper limit of the histograms, larger values go to the last bin.
+        """
+        assert isinstance(bins, int) and bins > 0, "The (bins) field must be > 0!"
+        assert low < high, "The (low) field must be less than (high)!"
+
+        size = len(score_names())
+        self.bins: int = bins
+        self.low: float = float(low)
+        self.high: float = float(high)
+        self.count: int = 0
+        self.mean: list = [0.0] * size
+        self.m2: list = [0.0] * size
+        self.histogram: list = [[0] * bins for _ in range(size)]
+
+    def update(self, values: list) -> None:
+        """
+        Add the scores of an individual.
+
+        Args:
+            - values: The 35 scores, in the order of (score_names).
+        """
+        assert len(values) == len(self.mean), "There must be 35 values!"
+
+        self.count += 1
+        n, mean, m2, histogram = self.count, self.mean, self.m2, self.histogram
+        width, last = (self.high - self.low) / self.bins, self.bins - 1
+
+        for i, x in enumerate(values):
+            delta = x - mean[i]
+            mean[i] += delta / n
+            m2[i] += delta * (x - mean[i])
+            histogram[i][min(max(int((x - self.low) / width), 0), last)] += 1
+
+    def merge(self, other: "CohortStats") -> "CohortStats":
+        """
+        Add the partial stats of another cohort with the same bins.
+
+        Args:
+            - other: The stats to be added.
+        """
+        assert (self.bins, self.low, self.high) == (
+            other.bins,
+            other.low,
+            other.high,
+        ), "The histograms must have the same bins!"
+
+        na, nb = self.count, other.count
+        if nb == 0:
+            return self
+
+        n = na + nb
+        for i in range(len(self.mean)):
+            delta = other.mean[i] - self.mean[i]
+            self.mean[i] += delta * nb / n
+            self.m2[i] += other.m2[i] + delta * delta * na * nb / n
+            self.histogram[i] = [
+                x + y for x, y in zip(self.histogram[i], other.histogram[i])
+            ]
+        self.count = n
+
+        return self
+
+    def variance(self, sample: bool = False) -> list:
+        """
+        Return the variance of each score.
+
+        Args:
+            - sample: If true, the sample variance (n - 1) is used.
+        """
+        n = self.count - 1 if sample else self.count
+        return [x / n if n > 0 else 0.0 for x in self.m2]
+
+    def summary(self) -> dict:
+        """Return the stats of each score by name."""
+        return {
+            name: {
+                "mean": mean,
+                "variance": variance,
+                "std": math.sqrt(variance),
+                "histogram": histogram,
+            }
+            for name, mean, variance, histogram in zip(
+                score_names(), self.mean, self.variance(), self.histogram
+            )
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the partial stats, to be merged in another process."""
+        return {
+            "bins": self.bins,
+            "low": self.low,
+            "high": self.high,
+            "count": self.count,
+            "mean": list(self.mean),
+            "m2": list(self.m2),
+            "histogram": [list(x) for x in self.histogram],
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "CohortStats":
+        """
+        Load the partial stats serialized by (to_dict).
+
+        Args:
+            - data: The serialized stats.
+        """
+        stats = CohortStats(bins=data["bins"], low=data["low"], high=data["high"])
+        assert len(data["mean"]) == len(stats.mean), "There must be 35 means!"
+
+        stats.count = int(data["count"])
+        stats.mean = [float(x) for x in data["mean"]]
+        stats.m2 = [float(x) for x in data["m2"]]
+        stats.histogram = [[int(x) for x in y] for y in data["histogram"]]
+        return stats
+
+
+class CohortAggregator:
+    """Stats of the results grouped by question type, sex and norm age band."""
+
+    def __init__(self, bins: int = 20, low: float = 0.0, high: float = 100.0) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - bins: Number of bins of the histograms.
+            - low: Lower limit of the histograms.
+            - high: Upper limit of the histograms.
+        """
+        assert isinstance(bins, int) and bins > 0, "The (bins) field must be > 0!"
+        assert low < high, "The (low) field must be less than (high)!"
+
+        self.bins: int = bins
+        self.low: float = float(low)
+        self.high: float = float(high)
+        self.groups: dict = {}
+
+    def _stats(self, key: tuple) -> CohortStats:
+        stats = self.groups.get(key)
+        if stats is None:
+            stats = self.groups[key] = CohortStats(
+                bins=self.bins, low=self.low, high=self.high
+            )
+        return stats
+
+    def add(self, question: int, sex: str, age: int, values: list) -> None:
+        """
+        Add the 35 scores of an individual to its group.
+
+        Args:
+            - question: Question type, 120 or 300.
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - values: The 35 scores, in the order of (score_names).
+        """
+        norm, _ = Norm.group(sex=sex, age=age, nquestion=question)
+        self._stats(key=(question, sex, norm)).update(values=values)
+
+    def add_result(self, result: dict) -> None:
+        """
+        Add a result of the compute method.
+
+        Args:
+            - result: The dictionary generated by the compute method.
+        """
+        person = result["person"]
+        self.add(
+            question=result["question"],
+            sex=person["sex"],
+            age=person["age"],
+            values=result_scores(result=result),
+        )
+
+    def add_results(self, results: iter) -> None:
+        """
+        Add the results of a stream in a single pass.
+
+        Args:
+            - results: Iterable with the results of the compute method.
+        """
+        for result in results:
+            self.add_result(result=result)
+
+    def merge(self, other: "CohortAggregator") -> "CohortAggregator":
+        """
+        Add the groups of another aggregator, such as another shard or file.
+
+        Args:
+            - other: The aggregator to be added.
+        """
+        for key, stats in other.groups.items():
+            self._stats(key=key).merge(other=stats)
+        return self
+
+    def total(self) -> CohortStats:
+        """Return the stats of all the groups together."""
+        total = CohortStats(bins=self.bins, low=self.low, high=self.high)
+        for stats in self.groups.values():
+            total.merge(other=stats)
+        return total
+
+    def summary(self) -> list:
+        """Return the stats of each group, with the category of its norm."""
+        summary = []
+        for (question, sex, norm), stats in sorted(self.groups.items()):
+            summary.append(
+                {
+                    "question": question,
+                    "sex": sex,
+                    "norm": norm,
+                    "category": category(question=question, sex=sex, norm=norm),
+                    "count": stats.count,
+                    "scores": stats.summary(),
+                }
+            )
+        return summary
+
+    def to_dict(self) -> dict:
+        """Serialize the partial aggregates, the output is JSON compatible."""
+        return {
+            "bins": self.bins,
+            "low": self.low,
+            "high": self.high,
+            "groups": [
+                {"question": q, "sex": s, "norm": n, "stats": x.to_dict()}
+                for (q, s, n), x in sorted(self.groups.items())
+            ],
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "CohortAggregator":
+        """
+        Load the partial aggregates serialized by (to_dict).
+
+        Args:
+            - data: The serialized aggregates.
+        """
+        aggregator = CohortAggregator(
+            bins=data["bins"], low=data["low"], high=data["high"]
+        )
+        for group in data.get("groups", []):
+            key = (int(group["question"]), group["sex"], int(group["norm"]))
+            aggregator.groups[key] = CohortStats.from_dict(data=group["stats"])
+        return aggregator
+
+
+def category(question: int, sex: str, norm: int) -> str:
+    """
+    Return the category of a norm group, such as (women under 21 years old).
+
+    Args:
+        - question: Question type, 120 or 300.
+        - sex: Gender of the group (M or F).
+        - norm: The id of the norm.
+    """
+    for age in range(10, 111):
+        id, category = Norm.group(sex=sex, age=age, nquestion=question)
+        if id == norm:
+            return category
+    return None
@@ -0,0 +1,349 @@
+"""Persistence of the results in SQLite, with bulk inserts and indexed scores."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import json
+import sqlite3
+import uuid
+
+from ipipneo.norm import Norm
+from ipipneo.utility import BIG5_DOMAINS, big5_target
+
+# Big-Five columns of the table (results), each one followed by its level.
+DOMAIN_COLUMNS = tuple(name for _, name in BIG5_DOMAINS)
+LEVEL_COLUMNS = tuple(f"{x}_level" for x in DOMAIN_COLUMNS)
+
+# Names of the 6 facets of each Big-Five, in the order of the results.
+FACET_NAMES = tuple(
+    tuple(x.value for x in big5_target(label=label)) for label, _ in BIG5_DOMAINS
+)
+FACETS = tuple(x for names in FACET_NAMES for x in names)
+
+COLUMNS = (
+    ("id", "BLOB PRIMARY KEY"),
+    ("question", "INTEGER NOT NULL"),
+    ("test", "INTEGER NOT NULL"),
+    ("sex", "TEXT NOT NULL"),
+    ("age", "INTEGER NOT NULL"),
+    ("norm", "INTEGER NOT NULL"),
+    ("library", "TEXT"),
+    ("version", "TEXT"),
+    ("date", "TEXT"),
+    ("extra", "TEXT"),
+    *((x, "REAL NOT NULL") for x in DOMAIN_COLUMNS),
+    *((x, "TEXT") for x in LEVEL_COLUMNS),
+)
+
+# Columns of the table (facets), one row per facet of a result.
+FACET_COLUMNS = (
+    ("result_id", "BLOB NOT NULL"),
+    ("facet", "TEXT NOT NULL"),
+    ("percentile", "REAL NOT NULL"),
+    ("level", "TEXT"),
+)
+
+# Columns of (results) that can be filtered by (ids), with the facet names and
+# their levels, such as (anxiety) and (anxiety_level).
+FILTER_COLUMNS = tuple(x for x, _ in COLUMNS if x not in ("id", "extra"))
+FILTER_FACETS = {
+    **{x: ("percentile", x) for x in FACETS},
+    **{f"{x}_level": ("level", x) for x in FACETS},
+}
+
+# Keys of a result that have a column, the others are kept as JSON in (extra).
+RESULT_KEYS = ("id", "theory", "model", "question", "test", "person")
+FOOTER_KEYS = ("library", "version", "date")
+
+
+class ResultDatabase:
+    """
+    Results in a SQLite file, one row per result in the table (results), whose
+    key is the binary (UUID) of the id.
+
+    The Big-Five percentiles and levels are columns with indexes. The 30 facets
+    of a result are rows of the table (facets), keyed by (result_id, facet) and
+    indexed by facet and percentile. The inserts are batched with (executemany)
+    in explicit transactions and the file is in WAL mode, so readers do not
+    block the writer. The result dictionary is rebuilt on demand by (get).
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a database, created when the file does not exist.
+
+        Args:
+            - path: The path of the file, or (:memory:).
+        """
+        self.path: str = path
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results "
+            f"({', '.join(f'{x} {y}' for x, y in COLUMNS)})"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS facets "
+            f"({', '.join(f'{x} {y}' for x, y in FACET_COLUMNS)}, "
+            "PRIMARY KEY (result_id, facet)) WITHOUT ROWID"
+        )
+        self.create_indexes()
+
+        names = [x for x, _ in COLUMNS]
+        self._insert = (
+            f"INSERT INTO results ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' * len(names))})"
+        )
+        self._insert_facets = (
+            f"INSERT INTO facets ({', '.join(x for x, _ in FACET_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(FACET_COLUMNS))})"
+        )
+        self._select = f"SELECT {', '.join(names)} FROM results WHERE id = ?"
+        self._select_facets = (
+            "SELECT facet, percentile, level FROM facets WHERE result_id = ?"
+        )
+
+    def __enter__(self) -> "ResultDatabase":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of results."""
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connection."""
+        self.connection.close()
+
+    def create_indexes(self) -> None:
+        """Create the indexes of the Big-Five and of the facet percentiles."""
+        for name in DOMAIN_COLUMNS + LEVEL_COLUMNS:
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS results_{name} ON results({name})"
+            )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS facets_percentile ON facets(facet, percentile)"
+        )
+
+    def drop_indexes(self) -> None:
+        """Drop the indexes of the Big-Five and facets, before a large load."""
+        for name in DOMAIN_COLUMNS + LEVEL_COLUMNS:
+            self.connection.execute(f"DROP INDEX IF EXISTS results_{name}")
+        self.connection.execute("DROP INDEX IF EXISTS facets_percentile")
+
+    def _rows(self, result: dict) -> tuple:
+        """Return the row of (results) of a result and its rows of (facets)."""
+        person = result["person"]
+        norm, _ = Norm.group(
+            sex=person["sex"], age=person["age"], nquestion=result["question"]
+        )
+
+        extra = {
+            key: value
+            for key, value in result.items()
+            if key not in RESULT_KEYS and key not in FOOTER_KEYS
+        }
+        if "compare" in person["result"]:
+            extra["compare"] = person["result"]["compare"]
+
+        key = uuid.UUID(result["id"]).bytes
+        domains, levels, facets = [], [], []
+        for (label, name), personality, names in zip(
+            BIG5_DOMAINS, person["result"]["personalities"], FACET_NAMES
+        ):
+            big5 = personality[name]
+            domains.append(big5[label])
+            levels.append(big5.get("score"))
+            for trait, facet in zip(big5["traits"], names):
+                facets.append((key, facet, trait[facet], trait.get("score")))
+
+        row = (
+            key,
+            result["question"],
+            int(result.get("test", False)),
+            person["sex"],
+            person["age"],
+            norm,
+            result.get("library"),
+            result.get("version"),
+            result.get("date"),
+            json.dumps(extra) if extra else None,
+            *domains,
+            *levels,
+        )
+        return row, facets
+
+    def insert(self, results: iter, batch: int = 10000, bulk: bool = False) -> int:
+        """
+        Insert results, each batch with (executemany) in one transaction.
+
+        Args:
+            - results: Iterable of dictionaries generated by the compute method.
+            - batch: Number of results of each transaction.
+            - bulk: If true, the indexes are dropped during the load and created
+                    again at the end, faster for large loads.
+        """
+        assert isinstance(batch, int) and batch > 0, "The (batch) field must be > 0!"
+
+        count, rows, facets = 0, [], []
+
+        def commit() -> None:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(self._insert, rows)
+                self.connection.executemany(self._insert_facets, facets)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+            rows.clear()
+            facets.clear()
+
+        if bulk:
+            self.drop_indexes()
+        try:
+            for result in results:
+                row, traits = self._rows(result=result)
+                rows.append(row)
+                facets.extend(traits)
+                count += 1
+                if len(rows) == batch:
+                    commit()
+            if rows:
+                commit()
+        finally:
+            if bulk:
+                self.create_indexes()
+
+        return count
+
+    def get(self, id: str) -> dict:
+        """
+        Return the result dictionary of an id, None when it does not exist.
+
+        Args:
+            - id: The id of the result.
+        """
+        key = uuid.UUID(id).bytes
+        row = self.connection.execute(self._select, (key,)).fetchone()
+        if row is None:
+            return None
+
+        facets = {
+            facet: (percentile, level)
+            for facet, percentile, level in self.connection.execute(
+                self._select_facets, (key,)
+            )
+        }
+        return self._result(row=row, facets=facets)
+
+    def _result(self, row: tuple, facets: dict) -> dict:
+        id, question, test, sex, age, _, library, version, date, extra = row[:10]
+        domains, levels = row[10:15], row[15:20]
+        extra = json.loads(extra) if extra else {}
+
+        personalities = []
+        for d, ((label, name), names) in enumerate(zip(BIG5_DOMAINS, FACET_NAMES)):
+            traits = []
+            for t, facet in enumerate(names):
+                percentile, level = facets[facet]
+                trait = {"trait": t + 1, facet: percentile}
+                if level is not None:
+                    trait["score"] = level
+                traits.append(trait)
+            big5 = {label: domains[d], "traits": traits}
+            if levels[d] is not None:
+                big5["score"] = levels[d]
+            personalities.append({name: big5})
+
+        detail = {"personalities": personalities}
+        if "compare" in extra:
+            detail["compare"] = extra.pop("compare")
+
+        result = {
+            "id": str(uuid.UUID(bytes=id)),
+            "theory": "Big 5 Personality Traits",
+            "model": "IPIP-NEO" if question == 120 else "IPIP",
+            "question": question,
+            "test": bool(test),
+            "person": {"sex": sex, "age": age, "result": detail},
+        }
+        for key, value in zip(FOOTER_KEYS, (library, version, date)):
+            if value is not None:
+                result[key] = value
+        result.update(extra)
+        return result
+
+    def ids(self, filters: dict = None) -> list:
+        """
+        Return the ids of the results that match all the filters.
+
+        The names are checked against the columns and facets, and the values are
+        always bound as parameters of the query.
+
+        Args:
+            - filters: Dictionary of a column of (results), a facet or a facet
+                       level (such as anxiety_level) to a value, or to an
+                       inclusive (low, high) range where None is open, such as
+                       {"openness": (70, None), "neuroticism_level": "low"}.
+        """
+        conditions, parameters = [], []
+        for name, value in (filters or {}).items():
+            assert (
+                name in FILTER_COLUMNS or name in FILTER_FACETS
+            ), f"The filter {name} is not a column or facet!"
+
+            column = name
+            if name in FILTER_FACETS:
+                column, facet = FILTER_FACETS[name]
+                parameters.append(facet)
+
+            if isinstance(value, tuple):
+                low, high = value
+                checks = [f"{column} >= ?"] * (low is not None)
+                checks += [f"{column} <= ?"] * (high is not None)
+                parameters.extend(x for x in value if x is not None)
+            else:
+                checks = [f"{column} = ?"]
+                parameters.append(value)
+            condition = " AND ".join(checks) or "1"
+
+            if name in FILTER_FACETS:
+                condition = (
+                    "id IN (SELECT result_id FROM facets "
+                    f"WHERE facet = ? AND {condition})"
+                )
+            conditions.append(condition)
+
+        sql = "SELECT id FROM results"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        return [
+            str(uuid.UUID(bytes=x)) for (x,) in self.connection.execute(sql, parameters)
+        ]
+
+    def delete(self, id: str) -> bool:
+        """
+        Delete a result, return true when it existed.
+
+        Args:
+            - id: The id of the result.
+        """
+        key = uuid.UUID(id).bytes
+        self.connection.execute("BEGIN")
+        try:
+            cursor = self.connection.execute("DELETE FROM results WHERE id = ?", (key,))
+            self.connection.execute("DELETE FROM facets WHERE result_id = ?", (key,))
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+        return cursor.rowcount > 0
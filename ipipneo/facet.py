@@ -162,6 +162,7 @@ class Facet:
         norm_scale_max: int = None,
         facet_score_level_low: int = None,
         facet_score_level_high: int = None,
+        percentiles: list = None,
     ) -> dict:
         """
         Calculate the personalities / facets for each Big-Five.
@@ -175,6 +176,7 @@ class Facet:
             - norm_scale_max: The maximum value of the norm scale.
             - facet_score_level_low: The score level is considered low.
             - facet_score_level_high: The score level is considered high.
+            - percentiles: Percentiles of the facets (1 to 6), instead of the cubic.
         """
         big5_ocean_is_valid(label=label)
 
@@ -216,23 +218,39 @@ class Facet:
                 elif int(traits[i]) > facet_score_level_high_value:
                     Y[i] = "high"
 
-                X[i] = (
-                    NormCubic.CONST1.value
-                    - (NormCubic.CONST2.value * traits[i])
-                    + (NormCubic.CONST3.value * traits[i] ** 2)
-                    - (NormCubic.CONST4.value * traits[i] ** 3)
-                )
-
-                if traits[i] < norm_min_value:
-                    X[i] = 1
+                if percentiles is not None:
+                    X[i] = percentiles[i]
+                    continue
 
-                if traits[i] > norm_max_value:
-                    X[i] = 99
+                X[i] = self.facet_percentile(
+                    trait=traits[i], norm_min=norm_min_value, norm_max=norm_max_value
+                )
         except IndexError as e:
             raise BaseException(f"The number of questions setting is wrong: {str(e)}")
 
         return create_big5_dict(label=label, big5=big5, x=X, y=Y) or {}
 
+    def facet_percentile(self, trait: float, norm_min: int, norm_max: int) -> float:
+        """
+        Convert the T-score of a facet to a percentile with the cubic approximation.
+
+        Args:
+            - trait: The T-score of the facet.
+            - norm_min: Below this T-score the percentile is 1.
+            - norm_max: Above this T-score the percentile is 99.
+        """
+        if trait < norm_min:
+            return 1
+        if trait > norm_max:
+            return 99
+
+        return (
+            NormCubic.CONST1.value
+            - (NormCubic.CONST2.value * trait)
+            + (NormCubic.CONST3.value * trait**2)
+            - (NormCubic.CONST4.value * trait**3)
+        )
+
     def big_five_level(
         self,
         big5: dict,
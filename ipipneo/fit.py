@@ -0,0 +1,278 @@
+"""Fit of candidates to role profiles, with the desired range of each score."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import heapq
+import math
+
+from ipipneo.utility import result_scores, score_names
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+METHODS = ("distance", "satisfaction")
+
+
+class RoleTemplate:
+    """Desired range (low, high) and weight of some of the 35 scores of a role."""
+
+    def __init__(self, name: str, scores: dict) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - name: Name of the role.
+            - scores: Dictionary of score name to (low, high) or to a dictionary
+                      with (low, high, weight), see (score_names).
+        """
+        assert isinstance(name, str) and name, "The (name) field is required!"
+        assert scores, "The (scores) field is required!"
+
+        names = {x: i for i, x in enumerate(score_names())}
+        self.name: str = name
+        self.low: list = [0.0] * len(names)
+        self.high: list = [100.0] * len(names)
+        self.weight: list = [0.0] * len(names)
+
+        for score, value in scores.items():
+            if score not in names:
+                raise BaseException(f"The score {score} of the role {name} is invalid!")
+            if isinstance(value, dict):
+                low, high = value.get("low", 0.0), value.get("high", 100.0)
+                weight = value.get("weight", 1.0)
+            else:
+                (low, high), weight = value, 1.0
+            if not (0 <= low <= high <= 100) or weight <= 0:
+                raise BaseException(
+                    f"The range of {score} of the role {name} is invalid!"
+                )
+
+            i = names[score]
+            self.low[i], self.high[i], self.weight[i] = (
+                float(low),
+                float(high),
+                float(weight),
+            )
+
+        self.total: float = sum(self.weight)
+        self.terms: list = [
+            (i, self.low[i], self.high[i], self.weight[i])
+            for i in range(len(names))
+            if self.weight[i] > 0
+        ]
+
+    def fit(self, values: list, method: str = "distance") -> float:
+        """
+        Return the fit (0 to 100) of the 35 scores of a candidate.
+
+        The (distance) is 100 minus the weighted root mean square of how far each
+        score is out of its range. The (satisfaction) is the weighted percentage
+        of the scores that are in the range.
+
+        Args:
+            - values: The 35 scores, in the order of (score_names).
+            - method: Method of the fit, distance or satisfaction.
+        """
+        if method == "satisfaction":
+            inside = sum(w for i, lo, hi, w in self.terms if lo <= values[i] <= hi)
+            return 100.0 * inside / self.total
+
+        gap = 0.0
+        for i, lo, hi, w in self.terms:
+            x = values[i]
+            d = lo - x if x < lo else x - hi if x > hi else 0.0
+            gap += w * d * d
+        return max(0.0, 100.0 - math.sqrt(gap / self.total))
+
+    @staticmethod
+    def from_dict(data: dict) -> "RoleTemplate":
+        """
+        Create a role from a dictionary, such as {"name": ..., "scores": {...}}.
+
+        Args:
+            - data: The role.
+        """
+        return RoleTemplate(name=data.get("name"), scores=data.get("scores", {}))
+
+
+class FitScorer:
+    """
+    Fit of all the pairs of candidates and roles, one block of candidates at a time.
+
+    Only the block and the k best of each candidate and role are in memory, so
+    any number of candidates can be streamed. With NumPy each block is a single
+    matrix operation with all the roles.
+    """
+
+    def __init__(
+        self, templates: list, method: str = "distance", block: int = 256
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - templates: List of (RoleTemplate).
+            - method: Method of the fit, distance or satisfaction.
+            - block: Number of candidates of each block.
+        """
+        assert templates, "The (templates) field is required!"
+        assert all(
+            isinstance(x, RoleTemplate) for x in templates
+        ), "The (templates) must be RoleTemplate!"
+        assert len({x.name for x in templates}) == len(
+            templates
+        ), "The names of the (templates) must be unique!"
+        assert method in METHODS, f"The (method) field must be one of {METHODS}!"
+        assert isinstance(block, int) and block > 0, "The (block) field must be > 0!"
+
+        self.templates: list = list(templates)
+        self.method: str = method
+        self.block: int = block
+        self._arrays: tuple = None if numpy is None else self._fit_arrays()
+
+    def fit(self, values: list) -> list:
+        """
+        Return the fit of a candidate to each role, in the order of the templates.
+
+        Args:
+            - values: The 35 scores, in the order of (score_names).
+        """
+        return [x.fit(values=values, method=self.method) for x in self.templates]
+
+    def fit_block(self, rows: list) -> list:
+        """
+        Return the matrix of fits (candidates x roles) of a block.
+
+        Args:
+            - rows: The 35 scores of each candidate.
+        """
+        if numpy is None:
+            return [self.fit(values=x) for x in rows]
+        return self._fit_matrix(rows=rows).tolist()
+
+    def _fit_matrix(self, rows: list) -> object:
+        """The NumPy matrix of fits (candidates x roles) of a block."""
+        # Same float64 operations of (RoleTemplate.fit), summed score by score
+        # in the same order, so both paths give the same fits and rankings.
+        columns, low, high, weight, total = self._arrays
+        x = numpy.asarray(rows, dtype=numpy.float64)[:, columns]
+        fits = numpy.zeros((len(rows), len(self.templates)))
+
+        if self.method == "satisfaction":
+            for i in range(len(columns)):
+                value = x[:, i, None]
+                inside = (value >= low[i]) & (value <= high[i])
+                fits += numpy.where(inside, weight[i], 0.0)
+            return 100.0 * fits / total
+
+        for i in range(len(columns)):
+            value = x[:, i, None]
+            d = numpy.maximum(numpy.maximum(low[i] - value, value - high[i]), 0.0)
+            fits += weight[i] * d * d
+        return numpy.maximum(100.0 - numpy.sqrt(fits / total), 0.0)
+
+    def _fit_arrays(self) -> tuple:
+        """The scores with weight in any role and their ranges (score x role)."""
+        columns = [
+            i
+            for i in range(len(score_names()))
+            if any(x.weight[i] > 0 for x in self.templates)
+        ]
+        return (
+            columns,
+            *(
+                numpy.asarray(
+                    [[getattr(x, key)[i] for x in self.templates] for i in columns],
+                    dtype=numpy.float64,
+                )
+                for key in ("low", "high", "weight")
+            ),
+            numpy.asarray([x.total for x in self.templates], dtype=numpy.float64),
+        )
+
+    def rank(self, candidates: iter, k: int = 10) -> dict:
+        """
+        Return the k best roles of each candidate and the k best candidates of
+        each role, with the fit, the best first.
+
+        Args:
+            - candidates: Iterable of (id, 35 scores) or of results of compute.
+            - k: Number of roles of each candidate and of candidates of each role.
+        """
+        assert isinstance(k, int) and k > 0, "The (k) field must be > 0!"
+
+        names = [x.name for x in self.templates]
+        best_roles, heaps, order = {}, [[] for _ in names], 0
+
+        def push(heap: list, item: tuple) -> None:
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+        def flush(ids: list, rows: list) -> None:
+            nonlocal order
+            if numpy is None:
+                for id, fits in zip(ids, self.fit_block(rows=rows)):
+                    best_roles[id] = heapq.nlargest(k, zip(fits, names))
+                    for heap, fit in zip(heaps, fits):
+                        push(heap=heap, item=(fit, -order, id))
+                    order += 1
+                return
+
+            # Only the fits up to the k-th largest of their row or column, ties
+            # included, can be in the k best, the others are never visited.
+            fits = self._fit_matrix(rows=rows)
+            count, roles = fits.shape
+            kth = numpy.partition(fits, roles - min(k, roles), axis=1)[
+                :, roles - min(k, roles)
+            ]
+            r, c = numpy.nonzero(fits >= kth[:, None])
+            chosen = [[] for _ in ids]
+            for i, j, fit in zip(r.tolist(), c.tolist(), fits[r, c].tolist()):
+                chosen[i].append((fit, names[j]))
+            for id, items in zip(ids, chosen):
+                best_roles[id] = heapq.nlargest(k, items)
+
+            kth = numpy.partition(fits, count - min(k, count), axis=0)[
+                count - min(k, count)
+            ]
+            r, c = numpy.nonzero(fits >= kth[None, :])
+            for i, j, fit in zip(r.tolist(), c.tolist(), fits[r, c].tolist()):
+                push(heap=heaps[j], item=(fit, -(order + i), ids[i]))
+            order += count
+
+        ids, rows = [], []
+        for candidate in candidates:
+            if isinstance(candidate, dict):
+                id, values = candidate["id"], result_scores(result=candidate)
+            else:
+                id, values = candidate
+            assert len(values) == len(score_names()), "There must be 35 values!"
+
+            ids.append(id)
+            rows.append(values)
+            if len(rows) == self.block:
+                flush(ids=ids, rows=rows)
+                ids, rows = [], []
+        if rows:
+            flush(ids=ids, rows=rows)
+
+        return {
+            "candidates": {
+                id: [(name, fit) for fit, name in roles]
+                for id, roles in best_roles.items()
+            },
+            "templates": {
+                name: [(id, fit) for fit, _, id in sorted(heap, reverse=True)]
+                for name, heap in zip(names, heaps)
+            },
+        }
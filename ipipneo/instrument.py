@@ -0,0 +1,191 @@
+"""Opt-in instrumentation of the time spent in each scoring stage."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+from bisect import bisect_left
+
+# Stages recorded by (IpipNeo.compute), in the order they run.
+STAGES = (
+    "validation",
+    "deepcopy",
+    "reverse",
+    "organize",
+    "norm",
+    "cache",
+    "score",
+    "tscore",
+    "percentile",
+    "assembly",
+    "compute",
+)
+
+# Upper bounds in seconds, from 10 microseconds up to 100 milliseconds.
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+)
+
+
+class LatencyHistogram:
+    """Histogram with fixed buckets, the last one holds values above all bounds."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - buckets: Upper bounds of the buckets in seconds.
+        """
+        assert len(buckets), "The (buckets) field cannot be empty!"
+
+        self.buckets: tuple = tuple(sorted(buckets))
+        self.counts: list = [0] * (len(self.buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Add a value to the histogram.
+
+        Args:
+            - value: The elapsed time in seconds.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """
+        Add the values of another histogram with the same buckets.
+
+        Args:
+            - other: The histogram to be added.
+        """
+        assert self.buckets == other.buckets, "The buckets must be the same!"
+
+        self.counts = [x + y for x, y in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+
+    def snapshot(self) -> dict:
+        """Return the cumulative counts of each bucket, the total and the sum."""
+        cumulative, total = [], 0
+        for le, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            cumulative.append((le, total))
+
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+class Recorder:
+    """Base of the objects that receive the events of (IpipNeo.compute)."""
+
+    def record(self, stage: str, elapsed: float) -> None:
+        """
+        Called at the end of each stage.
+
+        Args:
+            - stage: Name of the stage, see (STAGES).
+            - elapsed: The elapsed time in seconds.
+        """
+
+    def scored(self, question: int, norm: dict) -> None:
+        """
+        Called when an individual was scored.
+
+        Args:
+            - question: Question type, 120 or 300.
+            - norm: The norm group used, with its (id) and (category).
+        """
+
+    def failed(self, stage: str, error: BaseException) -> None:
+        """
+        Called when a stage raises an error, before it is propagated.
+
+        Args:
+            - stage: Name of the stage, see (STAGES).
+            - error: The error raised.
+        """
+
+    def cached(self, cache: str, hit: bool) -> None:
+        """
+        Called on every lookup of a cache of results.
+
+        Args:
+            - cache: Name of the cache.
+            - hit: If true, the result was found in the cache.
+        """
+
+    def deduplicated(self, rows: int, unique: int) -> None:
+        """
+        Called when a batch was deduplicated before being scored.
+
+        Args:
+            - rows: Number of rows of the batch.
+            - unique: Number of distinct rows that were scored.
+        """
+
+
+class StageRecorder(Recorder):
+    """Records the wall time and the number of calls of each stage."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - buckets: Upper bounds of the latency buckets in seconds.
+        """
+        self._buckets: tuple = tuple(buckets)
+        self.histograms: dict = {}
+
+    def record(self, stage: str, elapsed: float) -> None:
+        """
+        Add the elapsed time to the histogram of the stage.
+
+        Args:
+            - stage: Name of the stage, see (STAGES).
+            - elapsed: The elapsed time in seconds.
+        """
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram(self._buckets)
+        histogram.observe(elapsed)
+
+    def reset(self) -> None:
+        """Clear all the stages recorded."""
+        self.histograms = {}
+
+    def snapshot(self) -> dict:
+        """Return the histogram of each stage with its calls and total time."""
+        return {
+            stage: self.histograms[stage].snapshot()
+            for stage in sorted(self.histograms, key=stage_order)
+        }
+
+
+def stage_order(stage: str) -> int:
+    """
+    Position of a stage in the pipeline, unknown stages go to the end.
+
+    Args:
+        - stage: Name of the stage.
+    """
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
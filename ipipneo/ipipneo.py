@@ -9,15 +9,36 @@ __version__ = "1.12.1"
 __status__ = "production"
 
 import copy
+import functools
+import time
 import uuid
 
+from ipipneo.batch import AnswerMatrix, read_csv, reverse_matrix, unique_rows
+from ipipneo.cache import ResultCache, result_key
 from ipipneo.facet import Facet
-from ipipneo.model import FacetLevel, NormScale, QuestionNumber
+from ipipneo.instrument import Recorder
+from ipipneo.model import FacetLevel, FacetScale, NormScale, QuestionNumber
 from ipipneo.norm import Norm
+from ipipneo.normbuild import ns_sums, raise_if_norms_are_invalid
+from ipipneo.normset import NormSet, raise_if_norm_set_is_invalid
+from ipipneo.percentile import EmpiricalPercentile
+from ipipneo.profiler import SampledProfiler
+from ipipneo.quality import ResponseQuality
 from ipipneo.reverse import (ReverseScored120, ReverseScored300,
                              ReverseScoredCustom)
-from ipipneo.utility import (add_dict_footer, organize_list_json,
-                             raise_if_age_is_invalid, raise_if_sex_is_invalid)
+from ipipneo.store import LEVELS
+from ipipneo.utility import (BIG5_DOMAINS, add_dict_footer, copy_personalities,
+                             organize_list_json, raise_if_age_is_invalid,
+                             raise_if_sex_is_invalid, score_names)
+
+
+def _skip(stage: str) -> None:
+    """Stage callback of the scoring steps when nothing is recorded."""
+
+
+def _shift(position: int, indices: dict, route: callable, offset: int) -> bool:
+    """Call a (route) with the position of the row in the file."""
+    return route(offset + position, indices)
 
 
 class IpipNeo(Facet):
@@ -51,6 +72,13 @@ class IpipNeo(Facet):
         self._norm_scale_max: int = None
         self._score_level_low: int = None
         self._score_level_high: int = None
+        self._norms: dict = None
+        self._percentiles: EmpiricalPercentile = None
+        self._recorder: Recorder = None
+        self._profiler: SampledProfiler = None
+        self._cache: ResultCache = None
+        self._hooked: bool = False
+        self._last_dedup: dict = None
 
     def __del__(self):
         """Clear data."""
@@ -60,6 +88,13 @@ class IpipNeo(Facet):
         self._norm_scale_max: int = None
         self._score_level_low: int = None
         self._score_level_high: int = None
+        self._norms: dict = None
+        self._percentiles: EmpiricalPercentile = None
+        self._recorder: Recorder = None
+        self._profiler: SampledProfiler = None
+        self._cache: ResultCache = None
+        self._hooked: bool = False
+        self._last_dedup: dict = None
 
     def set_new_norm_scale(self, scale_min: int, scale_max: int) -> None:
         """
@@ -105,7 +140,153 @@ class IpipNeo(Facet):
             return self._score_level_low, self._score_level_high
         return FacetLevel.LOW.value, FacetLevel.HIGH.value
 
-    def evaluator(self, sex: str, age: int, score: list) -> dict:
+    def get_last_dedup(self) -> dict:
+        """
+        Shows the rows, unique rows and ratio of duplicated rows (0 to 1) of the
+        last (compute_batch) with dedup, None before the first one.
+        """
+        return None if self._last_dedup is None else dict(self._last_dedup)
+
+    def set_norms(self, norms: dict | NormSet = None) -> None:
+        """
+        Used to score with norms of a local population instead of Johnson's norms.
+
+        The norms are a (ipipneo.normset.NormSet) or a dictionary of norm id to
+        norm, such as the result of (ipipneo.normbuild.load_norms). Groups that
+        are not in the dictionary keep the default norms. Use None to return to
+        the default norms.
+
+        Args:
+            - norms: Norm set or dictionary with the norms of each group.
+        """
+        if isinstance(norms, NormSet):
+            raise_if_norm_set_is_invalid(normset=norms, question=self._nquestion)
+        elif norms is not None:
+            raise_if_norms_are_invalid(norms=norms)
+
+        self._norms = norms
+
+    def get_norm(self, sex: str, age: int, norms: NormSet = None) -> dict:
+        """
+        Return the norm used to score an individual.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - norms: Norm set of this call, by default the one of (set_norms).
+        """
+        norms = norms if norms is not None else self._norms
+        if isinstance(norms, NormSet):
+            return norms.get(sex=sex, age=age)
+
+        norm = Norm(sex=sex, age=age, nquestion=self._nquestion)
+        if norms is not None:
+            return norms.get(norm.get("id"), norm)
+        return norm
+
+    def set_percentiles(self, percentiles: EmpiricalPercentile = None) -> None:
+        """
+        Used to convert the scores to percentiles of a reference sample.
+
+        The percentiles are the (ipipneo.percentile.EmpiricalPercentile) of the
+        norm group, instead of the cubic approximation. Norm groups without a
+        reference sample keep the cubic approximation. Use None to disable it.
+
+        Args:
+            - percentiles: The percentile engine.
+        """
+        assert percentiles is None or isinstance(
+            percentiles, EmpiricalPercentile
+        ), "The (percentiles) field must be an EmpiricalPercentile!"
+        assert (
+            percentiles is None or percentiles.question == self._nquestion
+        ), f"The percentiles must be of {self._nquestion} questions!"
+
+        self._percentiles = percentiles
+
+    def set_recorder(self, recorder: Recorder = None) -> None:
+        """
+        Used to record the time spent in each stage of the compute method.
+
+        The recorder is a subclass of (ipipneo.instrument.Recorder), such as the
+        (StageRecorder) or the (ScoringMetrics). Use None to disable it, when
+        disabled the compute method only pays for a single check.
+
+        Args:
+            - recorder: Object that receives the events of each stage.
+        """
+        assert recorder is None or isinstance(
+            recorder, Recorder
+        ), "The (recorder) field must be a Recorder!"
+
+        self._recorder = recorder
+        self._hooked = self._is_hooked()
+
+    def set_profiler(self, profiler: SampledProfiler = None) -> None:
+        """
+        Used to profile a sampled fraction of the calls of the compute method.
+
+        Args:
+            - profiler: The (ipipneo.profiler.SampledProfiler), None to disable it.
+        """
+        assert profiler is None or isinstance(
+            profiler, SampledProfiler
+        ), "The (profiler) field must be a SampledProfiler!"
+
+        self._profiler = profiler
+        self._hooked = self._is_hooked()
+
+    def set_cache(self, cache: ResultCache = None) -> None:
+        """
+        Used to reuse the results of answers that were already scored.
+
+        The cache is a (ipipneo.cache.ResultCache), kept on disk, whose keys are
+        a hash of the inventory, the answers, the sex, the norm group,
+        the scale and levels and the library version. Each lookup is sent to
+        (Recorder.cached). Use None to disable it.
+
+        Args:
+            - cache: The persistent cache of results.
+        """
+        assert cache is None or isinstance(
+            cache, ResultCache
+        ), "The (cache) field must be a ResultCache!"
+
+        self._cache = cache
+        self._hooked = self._is_hooked()
+
+    def _is_hooked(self) -> bool:
+        return (
+            self._recorder is not None
+            or self._profiler is not None
+            or self._cache is not None
+        )
+
+    def _cache_key(self, sex: str, norm: dict, answers: list) -> bytes:
+        """
+        Return the key of a result in the cache.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - norm: The norm group used.
+            - answers: The reversed answers, sorted by question.
+        """
+        knots = None
+        if self._percentiles is not None and norm.get("id") in self._percentiles:
+            knots = self._percentiles.tables[norm.get("id")]
+
+        return result_key(
+            question=self._nquestion,
+            test=self._test,
+            answers=answers,
+            sex=sex,
+            norm=norm,
+            scale=self.get_current_norm(),
+            level=self.get_current_scale_level(),
+            knots=knots,
+        )
+
+    def evaluator(self, sex: str, age: int, score: list, norms: NormSet = None) -> dict:
         """
         Apply the calculation of the Big-Five and its personalities based on the answers.
 
@@ -113,10 +294,135 @@ class IpipNeo(Facet):
             - sex: Gender of the individual (M or F).
             - age: The age of the individual.
             - score: The normalized score.
+            - norms: Norm set of this call, by default the one of (set_norms).
         """
-        norm = Norm(sex=sex, age=age, nquestion=self._nquestion)
+        if self._hooked:
+            return self._observe(
+                self._evaluator_staged, sex=sex, age=age, score=score, norms=norms
+            )
+
+        return self._evaluator(sex=sex, age=age, score=score, norms=norms)
+
+    def _evaluator(
+        self,
+        sex: str,
+        age: int,
+        score: list,
+        norms: NormSet = None,
+        ranks: list = None,
+    ) -> dict:
+        """
+        Steps of the evaluator method, from the norm lookup to the assembly.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - score: The normalized score.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+        """
+        norm = self.get_norm(sex=sex, age=age, norms=norms)
+        assert isinstance(norm, dict), "norm must be a dict"
+
+        return self._evaluate(sex=sex, age=age, score=score, norm=norm, ranks=ranks)
+
+    def _evaluator_staged(
+        self,
+        sex: str,
+        age: int,
+        score: list,
+        norms: NormSet = None,
+        ranks: list = None,
+        stage: callable = _skip,
+    ) -> dict:
+        """
+        Instrumented copy of (_evaluator), used when hooked.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - score: The normalized score.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+            - stage: Called with the name of each stage when it starts.
+        """
+        stage("norm")
+        norm = self.get_norm(sex=sex, age=age, norms=norms)
         assert isinstance(norm, dict), "norm must be a dict"
 
+        return self._evaluate_staged(
+            sex=sex, age=age, score=score, norm=norm, ranks=ranks, stage=stage
+        )
+
+    def _evaluate(
+        self, sex: str, age: int, score: list, norm: dict, ranks: list = None
+    ) -> dict:
+        """
+        Convert the normalized score to T-scores and percentiles and assemble the result.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - score: The normalized score.
+            - norm: The norm group used.
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+        """
+        normc, distrib = self._tscore(score=score, norm=norm)
+        big5 = self._percentile(
+            size=len(score),
+            normc=normc,
+            distrib=distrib,
+            score=score,
+            norm=norm,
+            ranks=ranks,
+        )
+
+        return self._assemble(sex=sex, age=age, big5=big5)
+
+    def _evaluate_staged(
+        self,
+        sex: str,
+        age: int,
+        score: list,
+        norm: dict,
+        ranks: list = None,
+        stage: callable = _skip,
+    ) -> dict:
+        """
+        Instrumented copy of (_evaluate), used when hooked.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - score: The normalized score.
+            - norm: The norm group used.
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+            - stage: Called with the name of each stage when it starts.
+        """
+        stage("tscore")
+        normc, distrib = self._tscore(score=score, norm=norm)
+
+        stage("percentile")
+        big5 = self._percentile(
+            size=len(score),
+            normc=normc,
+            distrib=distrib,
+            score=score,
+            norm=norm,
+            ranks=ranks,
+        )
+
+        stage("assembly")
+        return self._assemble(sex=sex, age=age, big5=big5)
+
+    def _tscore(self, score: list, norm: dict) -> tuple:
+        """
+        Calculate the T-scores of the Big-Five and of its facets.
+
+        Args:
+            - score: The normalized score.
+            - norm: The values of norms.
+        """
         normc = Norm.calc(domain=self.domain(score=score), norm=norm)
         assert isinstance(normc, dict), "normc must be a dict"
 
@@ -125,16 +431,74 @@ class IpipNeo(Facet):
         )
         assert isinstance(distrib, dict), "distrib must be a dict"
 
-        normalize = Norm.normalize(
-            normc=normc,
-            percent=Norm.percent(normc=normc),
-            norm_scale_min=self._norm_scale_min if self._norm_scale_min else None,
-            norm_scale_max=self._norm_scale_max if self._norm_scale_max else None,
-        )
+        return normc, distrib
+
+    def _domains(
+        self, normc: dict, score: list = None, norm: dict = None, ranks: list = None
+    ) -> tuple:
+        """
+        Return the percentiles of the Big-Five and, if known, of their facets.
+
+        Args:
+            - normc: The calculated norms of the Big-Five.
+            - score: The normalized score, used by the percentiles of (set_percentiles).
+            - norm: The values of norms, used by the percentiles of (set_percentiles).
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+        """
+        facets = {}
+        if (
+            ranks is None
+            and self._percentiles is not None
+            and score is not None
+            and norm.get("id") in self._percentiles
+        ):
+            ranks = self._percentiles.percentiles(
+                norm=norm.get("id"), sums=ns_sums(score=score)
+            )
+
+        if ranks is not None:
+            normalize = {x: ranks[i] for i, x in enumerate(("N", "E", "O", "A", "C"))}
+            facets = {
+                x: [0] + ranks[5 + i * 6 : 11 + i * 6]
+                for i, x in enumerate(("N", "E", "O", "A", "C"))
+            }
+        else:
+            normalize = Norm.normalize(
+                normc=normc,
+                percent=Norm.percent(normc=normc),
+                norm_scale_min=self._norm_scale_min if self._norm_scale_min else None,
+                norm_scale_max=self._norm_scale_max if self._norm_scale_max else None,
+            )
         assert isinstance(normalize, dict), "normalize must be a dict"
 
+        return normalize, facets
+
+    def _percentile(
+        self,
+        size: int,
+        normc: dict,
+        distrib: dict,
+        score: list = None,
+        norm: dict = None,
+        ranks: list = None,
+    ) -> dict:
+        """
+        Convert the T-scores to percentiles and levels for each Big-Five.
+
+        Args:
+            - size: Vector size, must be the same as score size.
+            - normc: The calculated norms of the Big-Five.
+            - distrib: The distribution of the facets.
+            - score: The normalized score, used by the percentiles of (set_percentiles).
+            - norm: The values of norms, used by the percentiles of (set_percentiles).
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+        """
+        normalize, facets = self._domains(
+            normc=normc, score=score, norm=norm, ranks=ranks
+        )
+
         N = self.personality(
-            size=len(score),
+            size=size,
             big5=normalize,
             traits=distrib,
             label="N",
@@ -146,9 +510,10 @@ class IpipNeo(Facet):
             facet_score_level_high=self._score_level_high
             if self._score_level_high
             else None,
+            percentiles=facets.get("N"),
         )
         E = self.personality(
-            size=len(score),
+            size=size,
             big5=normalize,
             traits=distrib,
             label="E",
@@ -160,9 +525,10 @@ class IpipNeo(Facet):
             facet_score_level_high=self._score_level_high
             if self._score_level_high
             else None,
+            percentiles=facets.get("E"),
         )
         O = self.personality(
-            size=len(score),
+            size=size,
             big5=normalize,
             traits=distrib,
             label="O",
@@ -174,9 +540,10 @@ class IpipNeo(Facet):
             facet_score_level_high=self._score_level_high
             if self._score_level_high
             else None,
+            percentiles=facets.get("O"),
         )
         A = self.personality(
-            size=len(score),
+            size=size,
             big5=normalize,
             traits=distrib,
             label="A",
@@ -188,9 +555,10 @@ class IpipNeo(Facet):
             facet_score_level_high=self._score_level_high
             if self._score_level_high
             else None,
+            percentiles=facets.get("A"),
         )
         C = self.personality(
-            size=len(score),
+            size=size,
             big5=normalize,
             traits=distrib,
             label="C",
@@ -202,6 +570,7 @@ class IpipNeo(Facet):
             facet_score_level_high=self._score_level_high
             if self._score_level_high
             else None,
+            percentiles=facets.get("C"),
         )
         assert isinstance(O, dict), "O must be a dict"
         assert isinstance(C, dict), "C must be a dict"
@@ -209,6 +578,148 @@ class IpipNeo(Facet):
         assert isinstance(A, dict), "A must be a dict"
         assert isinstance(N, dict), "N must be a dict"
 
+        return {"O": O, "C": C, "E": E, "A": A, "N": N}
+
+    def _score_into(
+        self,
+        score: list,
+        norm: dict,
+        scores: memoryview,
+        levels: memoryview,
+        offset: int,
+        ranks: list = None,
+    ) -> None:
+        """
+        Write the 35 percentiles and level codes (positions of LEVELS) of a
+        normalized score at (offset), in the order of (score_names), without
+        assembling the result.
+
+        Args:
+            - score: The normalized score.
+            - norm: The norm group used.
+            - scores: Output of the percentiles, as floats.
+            - levels: Output of the level codes, as bytes.
+            - offset: Position of the first of the 35 values.
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+        """
+        normc, distrib = self._tscore(score=score, norm=norm)
+        normalize, facets = self._domains(
+            normc=normc, score=score, norm=norm, ranks=ranks
+        )
+
+        norm_min = self._norm_scale_min or NormScale.CONST_MIN.value
+        norm_max = self._norm_scale_max or NormScale.CONST_MAX.value
+        level = functools.partial(
+            self.score_level,
+            facet_score_level_low=self._score_level_low or FacetLevel.LOW.value,
+            facet_score_level_high=self._score_level_high or FacetLevel.HIGH.value,
+        )
+
+        position = offset + len(BIG5_DOMAINS)
+        for i, (label, _) in enumerate(BIG5_DOMAINS):
+            scores[offset + i] = normalize[label]
+            levels[offset + i] = LEVELS.index(level(score=normalize[label]))
+
+            traits, percentiles = distrib[label], facets.get(label)
+            for j in range(1, 7):
+                value = (
+                    percentiles[j]
+                    if percentiles is not None
+                    else self.facet_percentile(
+                        trait=traits[j], norm_min=norm_min, norm_max=norm_max
+                    )
+                )
+                scores[position] = value
+                levels[position] = LEVELS.index(
+                    level(score=value if value else traits[j])
+                )
+                position += 1
+
+    def _assemble(self, sex: str, age: int, big5: dict) -> dict:
+        """
+        Assemble the dictionary with the results.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - big5: Dictionary with the personalities of each Big-Five.
+        """
+        return self._result(
+            sex=sex,
+            age=age,
+            personalities=[
+                {
+                    "openness": self.big_five_level(
+                        big5=big5.get("O"),
+                        label="O",
+                        facet_score_level_low=self._score_level_low
+                        if self._score_level_low
+                        else None,
+                        facet_score_level_high=self._score_level_high
+                        if self._score_level_high
+                        else None,
+                    )
+                },
+                {
+                    "conscientiousness": self.big_five_level(
+                        big5=big5.get("C"),
+                        label="C",
+                        facet_score_level_low=self._score_level_low
+                        if self._score_level_low
+                        else None,
+                        facet_score_level_high=self._score_level_high
+                        if self._score_level_high
+                        else None,
+                    )
+                },
+                {
+                    "extraversion": self.big_five_level(
+                        big5=big5.get("E"),
+                        label="E",
+                        facet_score_level_low=self._score_level_low
+                        if self._score_level_low
+                        else None,
+                        facet_score_level_high=self._score_level_high
+                        if self._score_level_high
+                        else None,
+                    )
+                },
+                {
+                    "agreeableness": self.big_five_level(
+                        big5=big5.get("A"),
+                        label="A",
+                        facet_score_level_low=self._score_level_low
+                        if self._score_level_low
+                        else None,
+                        facet_score_level_high=self._score_level_high
+                        if self._score_level_high
+                        else None,
+                    )
+                },
+                {
+                    "neuroticism": self.big_five_level(
+                        big5=big5.get("N"),
+                        label="N",
+                        facet_score_level_low=self._score_level_low
+                        if self._score_level_low
+                        else None,
+                        facet_score_level_high=self._score_level_high
+                        if self._score_level_high
+                        else None,
+                    )
+                },
+            ],
+        )
+
+    def _result(self, sex: str, age: int, personalities: list) -> dict:
+        """
+        Assemble the dictionary with the results of the personalities.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - personalities: The Big-Five, each one with its facets.
+        """
         return {
             "id": str(uuid.uuid4()),
             "theory": "Big 5 Personality Traits",
@@ -218,75 +729,19 @@ class IpipNeo(Facet):
             "person": {
                 "sex": sex,
                 "age": age,
-                "result": {
-                    "personalities": [
-                        {
-                            "openness": self.big_five_level(
-                                big5=O,
-                                label="O",
-                                facet_score_level_low=self._score_level_low
-                                if self._score_level_low
-                                else None,
-                                facet_score_level_high=self._score_level_high
-                                if self._score_level_high
-                                else None,
-                            )
-                        },
-                        {
-                            "conscientiousness": self.big_five_level(
-                                big5=C,
-                                label="C",
-                                facet_score_level_low=self._score_level_low
-                                if self._score_level_low
-                                else None,
-                                facet_score_level_high=self._score_level_high
-                                if self._score_level_high
-                                else None,
-                            )
-                        },
-                        {
-                            "extraversion": self.big_five_level(
-                                big5=E,
-                                label="E",
-                                facet_score_level_low=self._score_level_low
-                                if self._score_level_low
-                                else None,
-                                facet_score_level_high=self._score_level_high
-                                if self._score_level_high
-                                else None,
-                            )
-                        },
-                        {
-                            "agreeableness": self.big_five_level(
-                                big5=A,
-                                label="A",
-                                facet_score_level_low=self._score_level_low
-                                if self._score_level_low
-                                else None,
-                                facet_score_level_high=self._score_level_high
-                                if self._score_level_high
-                                else None,
-                            )
-                        },
-                        {
-                            "neuroticism": self.big_five_level(
-                                big5=N,
-                                label="N",
-                                facet_score_level_low=self._score_level_low
-                                if self._score_level_low
-                                else None,
-                                facet_score_level_high=self._score_level_high
-                                if self._score_level_high
-                                else None,
-                            )
-                        },
-                    ]
-                },
+                "result": {"personalities": personalities},
             },
             **add_dict_footer(),
         }
 
-    def compute(self, sex: str, age: int, answers: dict, compare: bool = False) -> dict:
+    def compute(
+        self,
+        sex: str,
+        age: int,
+        answers: dict,
+        compare: bool = False,
+        norms: NormSet = None,
+    ) -> dict:
         """
         Compute the answers and generate the data with the results.
 
@@ -295,41 +750,610 @@ class IpipNeo(Facet):
             - age: The age of the individual.
             - answers: Standardized dictionary with answers.
             - compare: If true, it shows the user's answers and reverse score.
+            - norms: Norm set of this call, by default the one of (set_norms).
+        """
+        if self._hooked:
+            return self._observe(
+                self._compute_staged,
+                sex=sex,
+                age=age,
+                answers=answers,
+                compare=compare,
+                norms=norms,
+            )
+
+        return self._compute(
+            sex=sex, age=age, answers=answers, compare=compare, norms=norms
+        )
+
+    def _compute(
+        self,
+        sex: str,
+        age: int,
+        answers: dict,
+        compare: bool,
+        norms: NormSet = None,
+    ) -> dict:
+        """
+        Steps of the compute method.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: Standardized dictionary with answers.
+            - compare: If true, it shows the user's answers and reverse score.
+            - norms: Norm set of this call, by default the one of (set_norms).
         """
         raise_if_sex_is_invalid(sex=sex)
         raise_if_age_is_invalid(age=age)
         assert isinstance(answers, dict), "answers must be a dict"
+        if norms is not None:
+            raise_if_norm_set_is_invalid(normset=norms, question=self._nquestion)
 
         original = copy.deepcopy(answers)
         assert isinstance(original, dict), "original must be a dict"
 
-        reversed = (
-            ReverseScoredCustom(answers=copy.deepcopy(answers))
-            if self._test
-            else (
-                ReverseScored120(answers=copy.deepcopy(answers))
-                if self._nquestion == 120
-                else ReverseScored300(answers=copy.deepcopy(answers))
-            )
+        reversed = self._reverse(answers=copy.deepcopy(answers))
+        assert isinstance(reversed, dict), "reversed must be a dict"
+
+        norm = self.get_norm(sex=sex, age=age, norms=norms)
+        assert isinstance(norm, dict), "norm must be a dict"
+
+        result = self._evaluate(
+            sex=sex,
+            age=age,
+            score=self.score(answers=organize_list_json(answers=reversed)),
+            norm=norm,
         )
+        assert isinstance(result, dict), "result must be a dict"
+
+        if compare:
+            result["person"]["result"]["compare"] = {
+                "user_answers_original": original.get("answers", []),
+                "user_answers_reversed": reversed.get("answers", []),
+            }
+
+        return result
+
+    def _compute_staged(
+        self,
+        sex: str,
+        age: int,
+        answers: dict,
+        compare: bool,
+        norms: NormSet = None,
+        stage: callable = _skip,
+    ) -> dict:
+        """
+        Instrumented copy of (_compute), used when hooked, each step announced
+        to (stage) and the results taken from the cache when one is set.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: Standardized dictionary with answers.
+            - compare: If true, it shows the user's answers and reverse score.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - stage: Called with the name of each stage when it starts.
+        """
+        stage("validation")
+        raise_if_sex_is_invalid(sex=sex)
+        raise_if_age_is_invalid(age=age)
+        assert isinstance(answers, dict), "answers must be a dict"
+        if norms is not None:
+            raise_if_norm_set_is_invalid(normset=norms, question=self._nquestion)
+
+        stage("deepcopy")
+        original = copy.deepcopy(answers)
+        assert isinstance(original, dict), "original must be a dict"
+
+        stage("reverse")
+        reversed = self._reverse(answers=copy.deepcopy(answers))
         assert isinstance(reversed, dict), "reversed must be a dict"
 
-        score = self.score(answers=organize_list_json(answers=reversed))
-        assert isinstance(score, list), "score must be a list"
+        stage("organize")
+        organized = organize_list_json(answers=reversed)
 
-        result = self.evaluator(sex=sex, age=age, score=score)
-        assert isinstance(result, dict), "result 1 must be a dict"
+        stage("norm")
+        norm = self.get_norm(sex=sex, age=age, norms=norms)
+        assert isinstance(norm, dict), "norm must be a dict"
+
+        if self._cache is not None:
+            result = self._evaluate_cached(
+                sex=sex, age=age, answers=organized, norm=norm, stage=stage
+            )
+        else:
+            stage("score")
+            result = self._evaluate_staged(
+                sex=sex,
+                age=age,
+                score=self.score(answers=organized),
+                norm=norm,
+                stage=stage,
+            )
+        assert isinstance(result, dict), "result must be a dict"
 
         if compare:
             result["person"]["result"]["compare"] = {
                 "user_answers_original": original.get("answers", []),
                 "user_answers_reversed": reversed.get("answers", []),
             }
-        assert isinstance(result, dict), "result 2 must be a dict"
 
-        if "answers" in locals():
-            del answers
-        if "original" in locals():
-            del original
+        return result
+
+    def _evaluate_cached(
+        self, sex: str, age: int, answers: list, norm: dict, stage: callable = _skip
+    ) -> dict:
+        """
+        Return the result from the cache, or score and store it on a miss.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: The reversed answers, sorted by question.
+            - norm: The norm group used.
+            - stage: Called with the name of each stage when it starts.
+        """
+        stage("cache")
+        key = self._cache_key(sex=sex, norm=norm, answers=answers)
+        personalities = self._cache.get(key=key)
+        if self._recorder is not None:
+            self._recorder.cached(self._cache.name, personalities is not None)
+
+        if personalities is not None:
+            stage("assembly")
+            return self._result(sex=sex, age=age, personalities=personalities)
+
+        stage("score")
+        result = self._evaluate_staged(
+            sex=sex, age=age, score=self.score(answers=answers), norm=norm, stage=stage
+        )
+        self._cache.put(key=key, value=result["person"]["result"]["personalities"])
+        return result
+
+    def _reverse(self, answers: dict) -> dict:
+        """
+        Apply the reverse scoring of the inventory, or of the custom questions in test mode.
+
+        Args:
+            - answers: Standardized dictionary with answers, changed in place.
+        """
+        if self._test:
+            return ReverseScoredCustom(answers=answers)
+        if self._nquestion == 120:
+            return ReverseScored120(answers=answers)
+        return ReverseScored300(answers=answers)
+
+    def _score_row(
+        self,
+        sex: str,
+        age: int,
+        answers: bytearray,
+        norms: NormSet = None,
+        ranks: list = None,
+    ) -> dict:
+        """
+        Steps of a row of a batch, whose answers are already reversed.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: The reversed answers, sorted by question.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+        """
+        return self._evaluator(
+            sex=sex,
+            age=age,
+            score=self.score(answers=list(answers)),
+            norms=norms,
+            ranks=ranks,
+        )
 
-        return result or {}
+    def _score_row_staged(
+        self,
+        sex: str,
+        age: int,
+        answers: bytearray,
+        norms: NormSet = None,
+        ranks: list = None,
+        stage: callable = _skip,
+    ) -> dict:
+        """
+        Instrumented copy of (_score_row), used when hooked.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: The reversed answers, sorted by question.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - ranks: The 35 percentiles of (set_percentiles), if already known.
+            - stage: Called with the name of each stage when it starts.
+        """
+        stage("score")
+        score = self.score(answers=list(answers))
+
+        return self._evaluator_staged(
+            sex=sex, age=age, score=score, norms=norms, ranks=ranks, stage=stage
+        )
+
+    def _batch_ranks(
+        self,
+        matrix: AnswerMatrix,
+        reversed: bytearray,
+        rows: list,
+        norms: NormSet = None,
+    ) -> dict:
+        """
+        Return the percentiles of (set_percentiles) of the rows of a batch, by
+        position, with one (percentiles_batch) call per norm group.
+
+        Args:
+            - matrix: Matrix with the answers sorted by question.
+            - reversed: The reversed answers of the matrix.
+            - rows: Positions of the rows to be scored.
+            - norms: Norm set of this call, by default the one of (set_norms).
+        """
+        if self._percentiles is None:
+            return {}
+
+        groups = {}
+        for i in rows:
+            norm = self.get_norm(sex=matrix.sex[i], age=matrix.age[i], norms=norms)
+            if norm.get("id") in self._percentiles:
+                groups.setdefault(norm.get("id"), []).append(i)
+
+        size, step, ranks = self._nquestion, FacetScale.IPIP_MAX.value, {}
+        for norm, positions in groups.items():
+            sums = []
+            for i in positions:
+                row = reversed[i * size : (i + 1) * size]
+                sums.append(
+                    ns_sums(score=[0] + [sum(row[j::step]) for j in range(step)])
+                )
+            ranks.update(
+                zip(
+                    positions, self._percentiles.percentiles_batch(norm=norm, rows=sums)
+                )
+            )
+        return ranks
+
+    def _row_scorer(self) -> callable:
+        """Return the function that scores a row of a batch, observed when hooked."""
+        if self._hooked:
+            return functools.partial(self._observe, self._score_row_staged)
+        return self._score_row
+
+    def _observe(self, function: callable, **kwargs) -> dict:
+        """
+        Run a scoring function with the recorder and the profiler that are set.
+
+        Args:
+            - function: One of the scoring steps, such as (_compute_staged).
+            - kwargs: Named arguments of the function, with its (sex), (age) and (norms).
+        """
+        if self._recorder is not None:
+            function = functools.partial(self._recorded, function)
+
+        if self._profiler is not None and self._profiler.sample():
+            return self._profiler.profile(function, **kwargs)
+
+        return function(**kwargs)
+
+    def _recorded(self, function: callable, **kwargs) -> dict:
+        """
+        Run a scoring function sending the time of each stage to the recorder.
+
+        Args:
+            - function: One of the scoring steps, such as (_compute_staged).
+            - kwargs: Named arguments of the function, with its (sex), (age) and (norms).
+        """
+        recorder, clock = self._recorder, time.perf_counter
+        begin = last = clock()
+        current = None
+
+        def stage(name: str) -> None:
+            nonlocal current, last
+            now = clock()
+            if current is not None:
+                recorder.record(current, now - last)
+            current, last = name, clock()
+
+        try:
+            result = function(stage=stage, **kwargs)
+        except BaseException as e:
+            recorder.failed(current, e)
+            raise
+
+        end = clock()
+        recorder.record(current, end - last)
+        recorder.record("compute", end - begin)
+        recorder.scored(
+            self._nquestion,
+            self.get_norm(
+                sex=kwargs.get("sex"), age=kwargs.get("age"), norms=kwargs.get("norms")
+            ),
+        )
+
+        return result
+
+    def compute_batch(
+        self,
+        matrix: AnswerMatrix,
+        norms: NormSet = None,
+        quality: ResponseQuality = None,
+        dedup: bool = False,
+        route: callable = None,
+    ) -> list:
+        """
+        Compute the answers of many individuals stored in a compact matrix.
+
+        The careless responding indices of (quality) are computed on the whole
+        matrix before the scoring, so the flagged rows can be routed away.
+
+        Args:
+            - matrix: Matrix with the answers sorted by question.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - quality: Adds the careless responding indices to each result.
+            - dedup: If true, the rows with the same sex, norm group and answers
+                     are scored once, each row keeps its own id and age. The
+                     dedup ratio of the call is given by (get_last_dedup).
+            - route: Called with the position and the indices of each flagged
+                     row, when it returns true the row is not scored and is left
+                     out of the results. It requires (quality).
+        """
+        assert isinstance(matrix, AnswerMatrix), "matrix must be an AnswerMatrix"
+        assert not self._test, "The (test) mode is not supported in batches!"
+        assert (
+            matrix.question == self._nquestion
+        ), f"The matrix must have {self._nquestion} questions!"
+        if norms is not None:
+            raise_if_norm_set_is_invalid(normset=norms, question=self._nquestion)
+
+        if quality is not None:
+            assert isinstance(
+                quality, ResponseQuality
+            ), "The (quality) field must be a ResponseQuality!"
+        assert route is None or quality is not None, "The (route) needs (quality)!"
+
+        try:
+            matrix.validate()
+        except BaseException as e:
+            if self._recorder is not None:
+                self._recorder.failed("validation", e)
+            raise
+        reversed, size = reverse_matrix(matrix=matrix), self._nquestion
+
+        if quality is not None:
+            indices = quality.assess(matrix=matrix, reversed=reversed)
+            if route is not None:
+                keep = [
+                    i for i, x in enumerate(indices) if not (x["flags"] and route(i, x))
+                ]
+                if len(keep) < len(matrix):
+                    matrix = matrix.select(rows=keep)
+                    indices = [indices[i] for i in keep]
+                    reversed = bytearray().join(
+                        reversed[i * size : (i + 1) * size] for i in keep
+                    )
+
+        rows = range(len(matrix))
+        if dedup:
+            rows, inverse = unique_rows(
+                matrix=matrix,
+                groups=[
+                    self.get_norm(sex=sex, age=age, norms=norms).get("id")
+                    for sex, age in zip(matrix.sex, matrix.age)
+                ],
+            )
+            self._last_dedup = {
+                "rows": len(matrix),
+                "unique": len(rows),
+                "ratio": 1.0 - len(rows) / len(matrix) if len(matrix) else 0.0,
+            }
+            if self._recorder is not None:
+                self._recorder.deduplicated(len(matrix), len(rows))
+
+        if self._cache is not None:
+            results = self._compute_batch_cached(
+                matrix=matrix, reversed=reversed, rows=rows, norms=norms
+            )
+        else:
+            score_row = self._row_scorer()
+            ranks = self._batch_ranks(
+                matrix=matrix, reversed=reversed, rows=rows, norms=norms
+            )
+            results = [
+                score_row(
+                    sex=matrix.sex[i],
+                    age=matrix.age[i],
+                    answers=reversed[i * size : (i + 1) * size],
+                    norms=norms,
+                    ranks=ranks.get(i),
+                )
+                for i in rows
+            ]
+
+        if dedup:
+            if self._recorder is not None:
+                for i, j in enumerate(inverse):
+                    if rows[j] != i:
+                        self._recorder.scored(
+                            self._nquestion,
+                            self.get_norm(
+                                sex=matrix.sex[i], age=matrix.age[i], norms=norms
+                            ),
+                        )
+            results = [
+                (
+                    results[j]
+                    if rows[j] == i
+                    else self._result(
+                        sex=matrix.sex[i],
+                        age=matrix.age[i],
+                        personalities=copy_personalities(
+                            personalities=results[j]["person"]["result"][
+                                "personalities"
+                            ]
+                        ),
+                    )
+                )
+                for i, j in enumerate(inverse)
+            ]
+
+        if quality is not None:
+            for result, row in zip(results, indices):
+                result["quality"] = row
+
+        return results
+
+    def _compute_batch_into(
+        self,
+        matrix: AnswerMatrix,
+        scores: memoryview,
+        levels: memoryview,
+        offset: int = 0,
+        norms: NormSet = None,
+    ) -> None:
+        """
+        Compute the answers of a matrix writing the 35 percentiles and level codes
+        of each row straight into the outputs, see (_score_into).
+
+        Args:
+            - matrix: Matrix with the answers sorted by question.
+            - scores: Output of the percentiles, as floats.
+            - levels: Output of the level codes, as bytes.
+            - offset: Position of the first value of the first row in the outputs.
+            - norms: Norm set of this call, by default the one of (set_norms).
+        """
+        assert isinstance(matrix, AnswerMatrix), "matrix must be an AnswerMatrix"
+        assert not self._test, "The (test) mode is not supported in batches!"
+        assert (
+            matrix.question == self._nquestion
+        ), f"The matrix must have {self._nquestion} questions!"
+        if norms is not None:
+            raise_if_norm_set_is_invalid(normset=norms, question=self._nquestion)
+
+        matrix.validate()
+        reversed, size = reverse_matrix(matrix=matrix), self._nquestion
+
+        rows, width = range(len(matrix)), len(score_names())
+        ranks = self._batch_ranks(
+            matrix=matrix, reversed=reversed, rows=rows, norms=norms
+        )
+        for i in rows:
+            self._score_into(
+                score=self.score(answers=list(reversed[i * size : (i + 1) * size])),
+                norm=self.get_norm(sex=matrix.sex[i], age=matrix.age[i], norms=norms),
+                scores=scores,
+                levels=levels,
+                offset=offset + i * width,
+                ranks=ranks.get(i),
+            )
+
+    def _compute_batch_cached(
+        self,
+        matrix: AnswerMatrix,
+        reversed: bytearray,
+        rows: list,
+        norms: NormSet = None,
+    ) -> list:
+        """
+        Score the rows of a batch that are not in the cache, with one lookup.
+
+        Args:
+            - matrix: Matrix with the answers sorted by question.
+            - reversed: The reversed answers of the matrix.
+            - rows: Positions of the rows to be scored.
+            - norms: Norm set of this call, by default the one of (set_norms).
+        """
+        size = self._nquestion
+        keys = [
+            self._cache_key(
+                sex=matrix.sex[i],
+                norm=self.get_norm(sex=matrix.sex[i], age=matrix.age[i], norms=norms),
+                answers=reversed[i * size : (i + 1) * size],
+            )
+            for i in rows
+        ]
+        found = self._cache.get_many(keys=keys)
+        ranks = self._batch_ranks(
+            matrix=matrix,
+            reversed=reversed,
+            rows=[i for i, key in zip(rows, keys) if key not in found],
+            norms=norms,
+        )
+
+        results, missed, score_row = [], {}, self._row_scorer()
+        for i, key in zip(rows, keys):
+            sex, age = matrix.sex[i], matrix.age[i]
+            personalities = found.get(key)
+            if self._recorder is not None:
+                self._recorder.cached(self._cache.name, personalities is not None)
+
+            if personalities is None:
+                result = score_row(
+                    sex=sex,
+                    age=age,
+                    answers=reversed[i * size : (i + 1) * size],
+                    norms=norms,
+                    ranks=ranks.get(i),
+                )
+                missed[key] = result["person"]["result"]["personalities"]
+            else:
+                result = self._result(sex=sex, age=age, personalities=personalities)
+                if self._recorder is not None:
+                    self._recorder.scored(
+                        self._nquestion,
+                        self.get_norm(sex=sex, age=age, norms=norms),
+                    )
+            results.append(result)
+
+        self._cache.put_many(items=missed)
+        return results
+
+    def compute_csv(
+        self,
+        path: str,
+        chunk_size: int = 1000,
+        delimiter: str = None,
+        norms: NormSet = None,
+        quality: ResponseQuality = None,
+        dedup: bool = False,
+        route: callable = None,
+    ) -> iter:
+        """
+        Compute a wide CSV/TSV file (sex, age, q1..qN) chunk by chunk.
+
+        Only one chunk is kept in memory, each one yields a list of results.
+
+        Args:
+            - path: The path of the file.
+            - chunk_size: Maximum number of rows in each chunk.
+            - delimiter: Column separator, by default a tab for (.tsv) files.
+            - norms: Norm set of this call, by default the one of (set_norms).
+            - quality: Adds the careless responding indices to each result.
+            - dedup: If true, the duplicated rows of each chunk are scored once.
+            - route: Called with the position in the file (from 0, without the
+                     header) and the quality indices of each flagged row, see
+                     (compute_batch).
+        """
+        offset = 0
+        for matrix in read_csv(
+            path=path,
+            question=self._nquestion,
+            chunk_size=chunk_size,
+            delimiter=delimiter,
+        ):
+            yield self.compute_batch(
+                matrix=matrix,
+                norms=norms,
+                quality=quality,
+                dedup=dedup,
+                route=(
+                    None
+                    if route is None
+                    else functools.partial(_shift, route=route, offset=offset)
+                ),
+            )
+            offset += len(matrix)
@@ -0,0 +1,353 @@
+"""Resumable batch jobs that score large CSV/TSV files shard by shard."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ipipneo.batch import read_csv
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.normset import NormSet
+from ipipneo.quality import ResponseQuality
+
+# Size in bytes of the input of each shard.
+SHARD_SIZE = 64 * 1024 * 1024
+
+# State of the worker processes, set by (_init).
+_state: dict = {}
+
+
+def shard_ranges(path: str, size: int = SHARD_SIZE) -> list:
+    """
+    Split the lines of a CSV/TSV file, after the header, in byte ranges.
+
+    Each range starts at the beginning of a line and has about (size) bytes.
+
+    Args:
+        - path: The path of the file.
+        - size: Size in bytes of each range.
+    """
+    assert isinstance(size, int) and size > 0, "The (size) field must be > 0!"
+
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        bounds = [len(f.readline())]
+        while bounds[-1] < total:
+            f.seek(bounds[-1] + size - 1)
+            f.readline()
+            bounds.append(min(f.tell(), total))
+
+    return list(zip(bounds, bounds[1:]))
+
+
+def file_checksum(path: str, start: int = 0, end: int = None) -> str:
+    """
+    Return the SHA-256 of a file, or of the byte range [start, end) of it.
+
+    Args:
+        - path: The path of the file.
+        - start: First byte of the range.
+        - end: End of the range, by default the end of the file.
+    """
+    digest = hashlib.sha256()
+    remaining = (os.path.getsize(path) if end is None else end) - start
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            block = f.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Write a file that is either complete or absent, even after a crash.
+
+    Args:
+        - path: The path of the file.
+        - data: The content of the file.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def _init(question: int, options: dict) -> None:
+    _state.clear()
+    _state.update(ipip=IpipNeo(question=question), question=question, options=options)
+
+
+def _score_shard(path: str, start: int, end: int, output: str) -> tuple:
+    """
+    Score a shard into a JSON lines file, return its rows, the SHA-256 of the
+    output and the SHA-256 of the byte range of the input.
+    """
+    ipip, options = _state["ipip"], _state["options"]
+    digest, rows = hashlib.sha256(), 0
+    source = file_checksum(path=path, start=start, end=end)
+
+    temporary = f"{output}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            for matrix in read_csv(
+                path=path,
+                question=_state["question"],
+                chunk_size=options["chunk_size"],
+                delimiter=options["delimiter"],
+                start=start,
+                end=end,
+            ):
+                results = ipip.compute_batch(
+                    matrix=matrix,
+                    norms=options["norms"],
+                    quality=options["quality"],
+                    dedup=options["dedup"],
+                )
+                data = "".join(
+                    json.dumps(x, separators=(",", ":")) + "\n" for x in results
+                ).encode("utf-8")
+                digest.update(data)
+                f.write(data)
+                rows += len(results)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    os.replace(temporary, output)
+
+    return rows, digest.hexdigest(), source
+
+
+class ScoringJob:
+    """
+    Batch job that scores CSV/TSV files split in shards, in a pool of processes.
+
+    Each shard is a byte range of an input and is written to its own JSON lines
+    file, renamed only when complete. The manifest of the job has the rows and
+    the SHA-256 of the output and of the input range of the completed shards and
+    the errors of the failed ones, so a restarted job skips the finished shards
+    and only scores the others, or the ones whose input was edited.
+    """
+
+    def __init__(
+        self,
+        paths: list,
+        output: str,
+        question: int,
+        shard_size: int = SHARD_SIZE,
+        chunk_size: int = 1000,
+        workers: int = None,
+        delimiter: str = None,
+        norms: NormSet = None,
+        quality: ResponseQuality = None,
+        dedup: bool = False,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - paths: The input files, one path or a list of paths.
+            - output: The directory of the shards and of the manifest.
+            - question: Question type, 120 or 300.
+            - shard_size: Size in bytes of the input of each shard.
+            - chunk_size: Maximum number of rows scored at once, see (compute_csv).
+            - workers: Number of processes, by default the number of CPUs. With 1
+                       the shards are scored in this process.
+            - delimiter: Column separator, by default a tab for (.tsv) files.
+            - norms: Norm set of the job, by default Johnson's norms.
+            - quality: Adds the careless responding indices to each result.
+            - dedup: If true, the duplicated rows of each chunk are scored once.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+        assert workers is None or workers > 0, "The (workers) field must be > 0!"
+
+        self.paths: list = [paths] if isinstance(paths, str) else list(paths)
+        self.output: str = output
+        self.question: int = question
+        self.shard_size: int = shard_size
+        self.workers: int = workers or os.cpu_count() or 1
+        self.options: dict = {
+            "chunk_size": chunk_size,
+            "delimiter": delimiter,
+            "norms": norms,
+            "quality": quality,
+            "dedup": dedup,
+        }
+
+        for path in self.paths:
+            if not os.path.isfile(path):
+                raise BaseException(f"The file {path} was not found!")
+
+        self.shards: dict = {}
+        for n, path in enumerate(self.paths):
+            for i, (start, end) in enumerate(
+                shard_ranges(path=path, size=self.shard_size)
+            ):
+                self.shards[f"{n:04d}-{i:06d}"] = {
+                    "path": os.path.abspath(path),
+                    "start": start,
+                    "end": end,
+                }
+
+        os.makedirs(output, exist_ok=True)
+        self.manifest: dict = self._load()
+
+    def _spec(self) -> dict:
+        return {
+            "version": 1,
+            "question": self.question,
+            "shard_size": self.shard_size,
+            "inputs": [os.path.abspath(x) for x in self.paths],
+        }
+
+    def _load(self) -> dict:
+        path = os.path.join(self.output, "manifest.json")
+        if not os.path.exists(path):
+            return {**self._spec(), "shards": {}}
+
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if {x: manifest.get(x) for x in self._spec()} != self._spec():
+            raise BaseException(f"The job in {self.output} has other inputs!")
+        return manifest
+
+    def _save(self) -> None:
+        write_atomic(
+            path=os.path.join(self.output, "manifest.json"),
+            data=json.dumps(self.manifest, indent=2).encode("utf-8"),
+        )
+
+    def _file(self, shard: str) -> str:
+        return os.path.join(self.output, f"shard-{shard}.jsonl")
+
+    def _is_done(self, shard: str, verify: bool) -> bool:
+        entry, path = self.manifest["shards"].get(shard, {}), self._file(shard=shard)
+        if entry.get("status") != "done" or not os.path.exists(path):
+            return False
+        current = self.shards[shard]
+        if (entry.get("start"), entry.get("end")) != (current["start"], current["end"]):
+            return False
+        return not verify or (
+            file_checksum(path=path) == entry.get("sha256")
+            and file_checksum(
+                path=current["path"], start=current["start"], end=current["end"]
+            )
+            == entry.get("input_sha256")
+        )
+
+    def pending(self, verify: bool = True) -> list:
+        """
+        Return the shards that are not done, in order.
+
+        Args:
+            - verify: If true, the outputs and the input ranges of the completed
+                      shards must match the checksums of the manifest.
+        """
+        return [x for x in self.shards if not self._is_done(shard=x, verify=verify)]
+
+    def run(self, verify: bool = True) -> dict:
+        """
+        Score the pending shards and return the report of this run.
+
+        Args:
+            - verify: If true, the outputs and input ranges of the completed
+                      shards are checked against the checksums of the manifest
+                      and scored again on mismatch.
+        """
+        pending = self.pending(verify=verify)
+        report = {
+            "shards": len(self.shards),
+            "skipped": len(self.shards) - len(pending),
+            "done": 0,
+            "rows": 0,
+            "failed": {},
+        }
+
+        def finish(shard: str, outcome: object) -> None:
+            entry = dict(self.shards[shard])
+            if isinstance(outcome, BaseException):
+                entry.update(status="failed", error=str(outcome))
+                report["failed"][shard] = str(outcome)
+            else:
+                rows, checksum, source = outcome
+                entry.update(
+                    status="done", rows=rows, sha256=checksum, input_sha256=source
+                )
+                report["done"] += 1
+                report["rows"] += rows
+            self.manifest["shards"][shard] = entry
+            self._save()
+
+        def tasks() -> iter:
+            for shard in pending:
+                entry = self.shards[shard]
+                yield shard, (
+                    entry["path"],
+                    entry["start"],
+                    entry["end"],
+                    self._file(shard=shard),
+                )
+
+        if self.workers == 1:
+            _init(question=self.question, options=self.options)
+            try:
+                for shard, arguments in tasks():
+                    try:
+                        outcome = _score_shard(*arguments)
+                    except (KeyboardInterrupt, SystemExit):
+                        raise
+                    except BaseException as e:
+                        outcome = e
+                    finish(shard=shard, outcome=outcome)
+            finally:
+                _state.clear()
+            return report
+
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, max(len(pending), 1)),
+            initializer=_init,
+            initargs=(self.question, self.options),
+        ) as executor:
+            futures = {
+                executor.submit(_score_shard, *arguments): shard
+                for shard, arguments in tasks()
+            }
+            for future in as_completed(futures):
+                error = future.exception()
+                finish(
+                    shard=futures[future],
+                    outcome=error if error is not None else future.result(),
+                )
+
+        return report
+
+    def outputs(self) -> list:
+        """Return the files of the completed shards, in the order of the inputs."""
+        return [
+            self._file(shard=x)
+            for x in self.shards
+            if self.manifest["shards"].get(x, {}).get("status") == "done"
+        ]
+
+    def results(self) -> iter:
+        """Read the results of the completed shards, in the order of the inputs."""
+        for path in self.outputs():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
@@ -0,0 +1,393 @@
+"""Registry of counters and histograms exposed in the Prometheus text format."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler
+
+from ipipneo.instrument import LATENCY_BUCKETS, LatencyHistogram, Recorder
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric(ABC):
+    """
+    Base of the metrics, each thread updates its own shard without locks.
+
+    The shards are only summed when the registry is exposed, so the hot paths
+    never wait for each other in a thread pool.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - name: Name of the metric.
+            - help: Description of the metric.
+            - labels: Names of the labels of the metric.
+        """
+        assert re.fullmatch(r"[a-zA-Z_:][a-zA-Z0-9_:]*", name), "Invalid (name)!"
+
+        self.name: str = name
+        self.help: str = help
+        self.labels: tuple = tuple(labels)
+        self._local = threading.local()
+        self._shards: list = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _key(self, labels: dict) -> tuple:
+        assert len(labels) == len(self.labels), f"The labels are {self.labels}!"
+        return tuple(str(labels[x]) for x in self.labels)
+
+    def _snapshots(self) -> list:
+        with self._lock:
+            shards = list(self._shards)
+        return [x.copy() for x in shards]
+
+    @abstractmethod
+    def collect(self) -> list:
+        """Return the lines of the metric in the text format."""
+
+
+class Counter(Metric):
+    """Counter that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increment the counter.
+
+        Args:
+            - amount: Value to be added.
+            - labels: Values of the labels.
+        """
+        shard, key = self._shard(), self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """
+        Return the current value of the counter.
+
+        Args:
+            - labels: Values of the labels.
+        """
+        key = self._key(labels)
+        return sum(x.get(key, 0) for x in self._snapshots())
+
+    def collect(self) -> list:
+        totals = {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+
+        return [
+            f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"
+            for key, value in sorted(totals.items())
+        ]
+
+
+class Histogram(Metric):
+    """Histogram with fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - name: Name of the metric.
+            - help: Description of the metric.
+            - labels: Names of the labels of the metric.
+            - buckets: Upper bounds of the buckets.
+        """
+        super().__init__(name=name, help=help, labels=labels)
+        self.buckets: tuple = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Add a value to the histogram.
+
+        Args:
+            - value: The observed value.
+            - labels: Values of the labels.
+        """
+        shard, key = self._shard(), self._key(labels)
+        histogram = shard.get(key)
+        if histogram is None:
+            histogram = shard[key] = LatencyHistogram(self.buckets)
+        histogram.observe(value)
+
+    def merged(self) -> dict:
+        """Return the histograms of all threads merged by labels."""
+        merged = {}
+        for shard in self._snapshots():
+            for key, histogram in shard.items():
+                if key not in merged:
+                    merged[key] = LatencyHistogram(self.buckets)
+                merged[key].merge(histogram)
+        return merged
+
+    def collect(self) -> list:
+        lines = []
+        for key, histogram in sorted(self.merged().items()):
+            snapshot = histogram.snapshot()
+            for le, count in snapshot.get("buckets"):
+                labels = format_labels(self.labels + ("le",), key + (format_value(le),))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(snapshot['sum'])}")
+            lines.append(f"{self.name}_count{labels} {snapshot['count']}")
+        return lines
+
+
+class Registry:
+    """Group of metrics exposed together."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self._metrics: dict = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric to the registry.
+
+        Args:
+            - metric: The counter or histogram.
+        """
+        assert isinstance(metric, Metric), "The (metric) field must be a Metric!"
+
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"The metric {metric.name} is already registered!")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        """
+        Create and register a counter.
+
+        Args:
+            - name: Name of the metric.
+            - help: Description of the metric.
+            - labels: Names of the labels of the metric.
+        """
+        return self.register(Counter(name=name, help=help, labels=labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+    ) -> Histogram:
+        """
+        Create and register a histogram.
+
+        Args:
+            - name: Name of the metric.
+            - help: Description of the metric.
+            - labels: Names of the labels of the metric.
+            - buckets: Upper bounds of the buckets.
+        """
+        return self.register(
+            Histogram(name=name, help=help, labels=labels, buckets=buckets)
+        )
+
+    def get(self, name: str) -> Metric:
+        """
+        Return a registered metric.
+
+        Args:
+            - name: Name of the metric.
+        """
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        """Render all the metrics in the Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {escape(metric.help, quote=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+
+        return "\n".join(lines) + "\n"
+
+
+class ScoringMetrics(Recorder):
+    """Metrics of the scoring service, used as recorder of (IpipNeo)."""
+
+    def __init__(self, registry: Registry = None) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - registry: Where the metrics are registered, a new one by default.
+        """
+        self.registry: Registry = registry if registry is not None else Registry()
+
+        self.scored_total = self.registry.counter(
+            "ipipneo_respondents_scored_total",
+            "Individuals scored by question type.",
+            labels=("question",),
+        )
+        self.norm_total = self.registry.counter(
+            "ipipneo_norm_group_total",
+            "Individuals scored by norm group.",
+            labels=("question", "norm", "category"),
+        )
+        self.failures_total = self.registry.counter(
+            "ipipneo_validation_failures_total",
+            "Errors raised while scoring, by stage and reason.",
+            labels=("stage", "error", "reason"),
+        )
+        self.cache_total = self.registry.counter(
+            "ipipneo_cache_requests_total",
+            "Lookups of the caches of results, by cache and result (hit or miss).",
+            labels=("cache", "result"),
+        )
+        self.batch_rows_total = self.registry.counter(
+            "ipipneo_batch_rows_total",
+            "Rows of the deduplicated batches, by result (unique or duplicate).",
+            labels=("result",),
+        )
+        self.compute_seconds = self.registry.histogram(
+            "ipipneo_compute_seconds",
+            "Latency of each call of the compute method.",
+        )
+        self.stage_seconds = self.registry.histogram(
+            "ipipneo_stage_seconds",
+            "Latency of each stage of the compute method.",
+            labels=("stage",),
+        )
+
+    def record(self, stage: str, elapsed: float) -> None:
+        if stage == "compute":
+            self.compute_seconds.observe(elapsed)
+        else:
+            self.stage_seconds.observe(elapsed, stage=stage)
+
+    def scored(self, question: int, norm: dict) -> None:
+        self.scored_total.inc(question=question)
+        self.norm_total.inc(
+            question=question,
+            norm=norm.get("id", 0),
+            category=norm.get("category", ""),
+        )
+
+    def failed(self, stage: str, error: BaseException) -> None:
+        self.failures_total.inc(
+            stage=stage, error=type(error).__name__, reason=failure_reason(error)
+        )
+
+    def cached(self, cache: str, hit: bool) -> None:
+        self.cache_total.inc(cache=cache, result="hit" if hit else "miss")
+
+    def deduplicated(self, rows: int, unique: int) -> None:
+        self.batch_rows_total.inc(unique, result="unique")
+        self.batch_rows_total.inc(rows - unique, result="duplicate")
+
+
+def failure_reason(error: BaseException) -> str:
+    """
+    Reason of an error, with the numbers masked to keep the labels bounded.
+
+    Args:
+        - error: The error raised.
+    """
+    return re.sub(r"\d+", "#", str(error))[:100] or type(error).__name__
+
+
+def escape(value: str, quote: bool = True) -> str:
+    """
+    Escape a text to be used in the text format.
+
+    Args:
+        - value: The text.
+        - quote: If true, the double quotes are also escaped.
+    """
+    value = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    """
+    Format the labels of a sample.
+
+    Args:
+        - names: Names of the labels.
+        - values: Values of the labels.
+    """
+    if not names:
+        return ""
+    return "{" + ",".join(f'{x}="{escape(y)}"' for x, y in zip(names, values)) + "}"
+
+
+def format_value(value: float) -> str:
+    """
+    Format the value of a sample.
+
+    Args:
+        - value: The value.
+    """
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def metrics_handler(registry: Registry) -> type:
+    """
+    Create a request handler of (http.server) that serves the registry.
+
+    Example: ThreadingHTTPServer(("", 9100), metrics_handler(registry)).serve_forever()
+
+    Args:
+        - registry: The registry to be exposed.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = registry.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    return MetricsHandler
@@ -0,0 +1,304 @@
+"""Index of the nearest personality profiles, based on the facet and domain percentiles."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import heapq
+import math
+import mmap
+import operator
+import struct
+from array import array
+
+from ipipneo.utility import result_scores
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+# Number of facets of a profile.
+DIMENSION = 30
+
+# Sizes of a profile: the 30 facets, or the 5 domains followed by the 30 facets.
+DIMENSIONS = (DIMENSION, DIMENSION + 5)
+
+# Quantization of the percentiles (0 to 100) to one byte (0 to 255).
+SCALE = 2.55
+
+# Header of the index file: magic, version, dimension and number of profiles.
+HEADER = struct.Struct("<4sHHQ")
+MAGIC = b"IPNN"
+
+METRICS = ("euclidean", "cosine")
+
+
+def facet_vector(result: dict) -> list:
+    """
+    Return the 30 facet percentiles of a result, in the order of (score_names).
+
+    Args:
+        - result: The dictionary generated by the compute method.
+    """
+    return result_scores(result=result)[5:]
+
+
+def profile_vector(result: dict, dimension: int = DIMENSION) -> list:
+    """
+    Return the percentiles of a profile of (dimension) scores, in the order of
+    (score_names): the 30 facets, or the 5 domains and the 30 facets.
+
+    Args:
+        - result: The dictionary generated by the compute method.
+        - dimension: Number of scores, 30 or 35.
+    """
+    assert (
+        dimension in DIMENSIONS
+    ), f"The (dimension) field must be one of {DIMENSIONS}!"
+    return result_scores(result=result)[-dimension:]
+
+
+def quantize(values: list, dimension: int = DIMENSION) -> bytes:
+    """
+    Convert the percentiles to bytes.
+
+    Args:
+        - values: The percentiles of the profile.
+        - dimension: Number of scores of the profile, 30 or 35.
+    """
+    assert len(values) == dimension, f"There must be {dimension} values!"
+    return bytes(min(255, max(0, int(round(x * SCALE)))) for x in values)
+
+
+class ProfileIndex:
+    """
+    Flat index of quantized profiles, one byte per score.
+
+    A profile has the 30 facets, or the 5 domains and the 30 facets with a
+    (dimension) of 35. The search reads all the profiles, at 30 or 35 bytes each
+    a pool of millions of people fits in memory or in a memory mapped file. The
+    distances are in percentile points. With NumPy the distances are calculated
+    in blocks.
+    """
+
+    def __init__(self, block: int = 65536, dimension: int = DIMENSION) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - block: Number of profiles of each block of the NumPy search.
+            - dimension: Number of scores of each profile, 30 or 35.
+        """
+        assert isinstance(block, int) and block > 0, "The (block) field must be > 0!"
+        assert (
+            dimension in DIMENSIONS
+        ), f"The (dimension) field must be one of {DIMENSIONS}!"
+
+        self.block: int = block
+        self.dimension: int = dimension
+        self.ids: list = []
+        self.data: bytearray = bytearray()
+        self.norms: array = array("f")
+        self._mmap: mmap.mmap = None
+
+    def __len__(self) -> int:
+        """Number of profiles."""
+        return len(self.ids)
+
+    def close(self) -> None:
+        """Copy the profiles to memory and release the memory mapped file."""
+        if self._mmap is not None:
+            data, norms = self.data, self.norms
+            self.data, self.norms = bytearray(data), array("f", norms)
+            data.release()
+            norms.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def add(self, id: str, values: list) -> None:
+        """
+        Add the profile of an individual.
+
+        Args:
+            - id: Identifier of the individual, such as the id of the result.
+            - values: The percentiles of the profile, see (profile_vector).
+        """
+        self.close()
+
+        vector = quantize(values=values, dimension=self.dimension)
+        self.ids.append(id)
+        self.data += vector
+        self.norms.append(math.sqrt(sum(x * x for x in vector)))
+
+    def add_result(self, result: dict) -> None:
+        """
+        Add the profile of a result of the compute method, by its id.
+
+        Args:
+            - result: The dictionary generated by the compute method.
+        """
+        self.add(
+            id=result["id"],
+            values=profile_vector(result=result, dimension=self.dimension),
+        )
+
+    def build(self, ids: list, vectors: list) -> "ProfileIndex":
+        """
+        Add many profiles at once.
+
+        Args:
+            - ids: Identifiers of the individuals.
+            - vectors: The percentiles of each profile, see (profile_vector).
+        """
+        assert len(ids) == len(
+            vectors
+        ), "The (ids) and (vectors) must have the same size!"
+        self.close()
+
+        dimension = self.dimension
+        data = b"".join(quantize(values=x, dimension=dimension) for x in vectors)
+        self.ids.extend(ids)
+        self.data += data
+        self.norms.extend(
+            math.sqrt(sum(x * x for x in data[i : i + dimension]))
+            for i in range(0, len(data), dimension)
+        )
+        return self
+
+    def vector(self, index: int) -> list:
+        """
+        Return the percentiles of a profile, after the quantization.
+
+        Args:
+            - index: Position of the profile.
+        """
+        row = self.data[index * self.dimension : (index + 1) * self.dimension]
+        return [x / SCALE for x in row]
+
+    def search(self, values: list, k: int = 10, metric: str = "euclidean") -> list:
+        """
+        Return the (id, distance) of the k nearest profiles, the nearest first.
+
+        The euclidean distance is in percentile points, the cosine distance is
+        1 minus the cosine similarity.
+
+        Args:
+            - values: The percentiles of the query, see (profile_vector).
+            - k: Number of profiles.
+            - metric: Distance, euclidean or cosine.
+        """
+        assert metric in METRICS, f"The (metric) field must be one of {METRICS}!"
+        assert isinstance(k, int) and k > 0, "The (k) field must be > 0!"
+
+        query = quantize(values=values, dimension=self.dimension)
+        if numpy is not None:
+            nearest = self._search_numpy(query=query, k=k, metric=metric)
+        else:
+            nearest = self._search_python(query=query, k=k, metric=metric)
+
+        if metric == "euclidean":
+            return [(self.ids[i], d / SCALE) for d, i in nearest]
+        return [(self.ids[i], d) for d, i in nearest]
+
+    def _search_python(self, query: bytes, k: int, metric: str) -> list:
+        data, size, dimension = self.data, len(self.ids), self.dimension
+        rows = (data[i * dimension : (i + 1) * dimension] for i in range(size))
+
+        if metric == "euclidean":
+            distances = (math.dist(row, query) for row in rows)
+        else:
+            norm = math.sqrt(sum(x * x for x in query)) or 1.0
+            distances = (
+                1.0 - sum(map(operator.mul, row, query)) / ((n or 1.0) * norm)
+                for row, n in zip(rows, self.norms)
+            )
+
+        return heapq.nsmallest(k, zip(distances, range(size)))
+
+    def _search_numpy(self, query: bytes, k: int, metric: str) -> list:
+        matrix = numpy.frombuffer(self.data, dtype=numpy.uint8).reshape(
+            -1, self.dimension
+        )
+        norms = numpy.frombuffer(self.norms, dtype=numpy.float32)
+        q = numpy.frombuffer(query, dtype=numpy.uint8).astype(numpy.float32)
+        qnorm = float(numpy.sqrt(q @ q)) or 1.0
+
+        best = []
+        for start in range(0, len(matrix), self.block):
+            block = matrix[start : start + self.block].astype(numpy.float32)
+            if metric == "euclidean":
+                distances = numpy.sqrt(((block - q) ** 2).sum(axis=1))
+            else:
+                scale = norms[start : start + len(block)]
+                scale = numpy.where(scale > 0, scale, 1.0)
+                distances = 1.0 - (block @ q) / (scale * qnorm)
+
+            top = min(k, len(distances))
+            index = numpy.argpartition(distances, top - 1)[:top]
+            best.extend((float(distances[i]), start + int(i)) for i in index)
+            best = heapq.nsmallest(k, best)
+
+        return best
+
+    def save(self, path: str) -> None:
+        """
+        Write the index to a file.
+
+        The header is followed by the norms (float32), the profiles (30 or 35
+        bytes each) and the ids, one per line.
+
+        Args:
+            - path: The path of the file.
+        """
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 1, self.dimension, len(self.ids)))
+            f.write(self.norms)
+            f.write(self.data)
+            f.write("\n".join(self.ids).encode("utf-8"))
+
+    @staticmethod
+    def load(path: str, memory_map: bool = True) -> "ProfileIndex":
+        """
+        Read an index written by (save).
+
+        With a memory mapped file the profiles are read by the operating system
+        on demand and shared between processes. Adding a profile copies them to
+        memory.
+
+        Args:
+            - path: The path of the file.
+            - memory_map: If true, the profiles are not read to memory.
+        """
+        with open(path, "rb") as f:
+            if memory_map:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buffer = f.read()
+
+        magic, version, dimension, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != 1 or dimension not in DIMENSIONS:
+            if memory_map:
+                buffer.close()
+            raise BaseException(f"The file {path} is not a profile index!")
+
+        index = ProfileIndex(dimension=dimension)
+        if memory_map:
+            index._mmap = buffer
+
+        view = memoryview(buffer)
+        start = HEADER.size + count * index.norms.itemsize
+        end = start + count * dimension
+        index.norms = view[HEADER.size : start].cast("f")
+        index.data = view[start:end]
+        index.ids = bytes(view[end:]).decode("utf-8").split("\n") if count else []
+        view.release()
+
+        if not memory_map:
+            index.norms, index.data = array("f", index.norms), bytearray(index.data)
+
+        return index
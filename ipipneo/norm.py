@@ -9,6 +9,7 @@ __version__ = "1.12.1"
 __status__ = "production"
 
 from enum import IntEnum
+from functools import lru_cache
 
 from ipipneo.model import NormCubic, NormScale
 from ipipneo.utility import raise_if_age_is_invalid, raise_if_sex_is_invalid
@@ -998,6 +999,37 @@ class Norm:
 
         return {"O": O, "C": C, "E": E, "A": A, "N": N}
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def group(sex: str, age: int, nquestion: int) -> tuple:
+        """
+        Return the (id, category) of the norm group of an individual.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - nquestion: Question type, 120 or 300.
+        """
+        norm = Norm(sex=sex, age=age, nquestion=nquestion)
+        return norm.get("id"), norm.get("category")
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def groups(nquestion: int) -> tuple:
+        """
+        Return the (id, category, sex, min age, max age) of each norm group.
+
+        Args:
+            - nquestion: Question type, 120 or 300.
+        """
+        groups = {}
+        for sex in ("M", "F"):
+            for age in range(10, 111):
+                id, category = Norm.group(sex=sex, age=age, nquestion=nquestion)
+                low = groups.get(id, (id, category, sex, age, age))[3]
+                groups[id] = (id, category, sex, low, age)
+        return tuple(groups[id] for id in sorted(groups))
+
     @staticmethod
     def percent(normc: dict) -> dict:
         """
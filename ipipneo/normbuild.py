@@ -0,0 +1,301 @@
+"""Creation of norm tables from the answers of a local population."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import argparse
+import copy
+import json
+import math
+
+from ipipneo.batch import AnswerMatrix, read_csv, reverse_matrix
+from ipipneo.cohort import CohortStats
+from ipipneo.facet import Facet
+from ipipneo.model import FacetScale
+from ipipneo.norm import Norm
+from ipipneo.reverse import ReverseScored120, ReverseScored300
+from ipipneo.utility import organize_list_json
+
+# Size of the (ns) vector: 0, 5 means, 5 SDs and 5 blocks of 6 means and 6 SDs.
+NS_SIZE = 71
+
+
+def ns_mean(index: int) -> int:
+    """
+    Return the position in the (ns) vector of the mean of an accumulated sum.
+
+    The 35 sums are the domains (N, E, O, A, C) and then the 6 facets of each
+    domain, in the same order.
+
+    Args:
+        - index: Position of the sum, 0 to 4 are domains and 5 to 34 facets.
+    """
+    if index < 5:
+        return 1 + index
+    domain, facet = divmod(index - 5, 6)
+    return 11 + domain * 12 + facet
+
+
+def ns_sd(index: int) -> int:
+    """
+    Return the position in the (ns) vector of the SD of an accumulated sum.
+
+    Args:
+        - index: Position of the sum, 0 to 4 are domains and 5 to 34 facets.
+    """
+    return ns_mean(index=index) + (5 if index < 5 else 6)
+
+
+def ns_sums(score: list) -> list:
+    """
+    Reorder the result of (Facet.score) in the 35 sums of the (ns) layout.
+
+    The facets of the score are interleaved (N1, E1, O1, A1, C1, N2, ...) and
+    the domains are the sum of its 6 facets.
+
+    Args:
+        - score: The facet score result.
+    """
+    facets = [
+        score[1 + domain + 5 * facet] for domain in range(5) for facet in range(6)
+    ]
+    domains = [sum(facets[i * 6 : (i + 1) * 6]) for i in range(5)]
+    return domains + facets
+
+
+class NormBuilder:
+    """Streaming means and SDs of the domain and facet sums of each norm group."""
+
+    def __init__(self, question: int) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+
+        self.question: int = question
+        self.groups: dict = {}
+        self._facet = Facet(nquestion=question)
+        self._reverse = ReverseScored120 if question == 120 else ReverseScored300
+
+    def _stats(self, sex: str, age: int) -> CohortStats:
+        norm, _ = Norm.group(sex=sex, age=age, nquestion=self.question)
+        stats = self.groups.get(norm)
+        if stats is None:
+            stats = self.groups[norm] = CohortStats(
+                bins=1, low=0.0, high=float(self.question * 5)
+            )
+        return stats
+
+    def update(self, sex: str, age: int, sums: list) -> None:
+        """
+        Add the 35 sums of an individual to its norm group.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - sums: The domain and facet sums, in the order of (ns_sums).
+        """
+        self._stats(sex=sex, age=age).update(values=sums)
+
+    def add(self, sex: str, age: int, answers: dict) -> None:
+        """
+        Add the answers of an individual, in the standardized dictionary.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - answers: Standardized dictionary with answers.
+        """
+        reversed = self._reverse(answers=copy.deepcopy(answers))
+        score = self._facet.score(answers=organize_list_json(answers=reversed))
+        self.update(sex=sex, age=age, sums=ns_sums(score=score))
+
+    def add_matrix(self, matrix: AnswerMatrix) -> None:
+        """
+        Add the answers of a matrix, reversed in bulk.
+
+        The facet sums are the strided slices of each row, the same values as
+        (Facet.score) without a Python loop per answer.
+
+        Args:
+            - matrix: Matrix with the answers sorted by question.
+        """
+        assert isinstance(matrix, AnswerMatrix), "matrix must be an AnswerMatrix"
+        assert (
+            matrix.question == self.question
+        ), f"The matrix must have {self.question} questions!"
+
+        matrix.validate()
+        reversed, size = reverse_matrix(matrix=matrix), self.question
+        step = FacetScale.IPIP_MAX.value
+
+        for i, (sex, age) in enumerate(zip(matrix.sex, matrix.age)):
+            row = reversed[i * size : (i + 1) * size]
+            score = [0] + [sum(row[j::step]) for j in range(step)]
+            self.update(sex=sex, age=age, sums=ns_sums(score=score))
+
+    def add_csv(self, path: str, chunk_size: int = 10000, delimiter: str = None) -> int:
+        """
+        Add a wide CSV/TSV file (sex, age, q1..qN), one chunk at a time.
+
+        Args:
+            - path: The path of the file.
+            - chunk_size: Maximum number of rows in each chunk.
+            - delimiter: Column separator, by default a tab for (.tsv) files.
+        """
+        count = 0
+        for matrix in read_csv(
+            path=path,
+            question=self.question,
+            chunk_size=chunk_size,
+            delimiter=delimiter,
+        ):
+            self.add_matrix(matrix=matrix)
+            count += len(matrix)
+        return count
+
+    def merge(self, other: "NormBuilder") -> "NormBuilder":
+        """
+        Add the groups of another builder, such as another shard of the data.
+
+        Args:
+            - other: The builder to be added.
+        """
+        assert other.question == self.question, "The question types are different!"
+
+        for norm, stats in other.groups.items():
+            if norm not in self.groups:
+                self.groups[norm] = CohortStats(
+                    bins=stats.bins, low=stats.low, high=stats.high
+                )
+            self.groups[norm].merge(other=stats)
+        return self
+
+    def table(self, min_count: int = 2, precision: int = 2) -> dict:
+        """
+        Return the norms of each group, in the same format of the (Norm) class.
+
+        The SD is the sample standard deviation. Groups with less individuals
+        than (min_count) or with a constant sum are left out.
+
+        Args:
+            - min_count: Minimum number of individuals of a group.
+            - precision: Number of decimal places of the means and SDs.
+        """
+        assert min_count >= 2, "The (min_count) field must be >= 2!"
+
+        groups = {x[0]: x for x in Norm.groups(nquestion=self.question)}
+
+        table = {}
+        for norm, stats in sorted(self.groups.items()):
+            if stats.count < min_count:
+                continue
+
+            ns = [0] * NS_SIZE
+            for i, (mean, variance) in enumerate(
+                zip(stats.mean, stats.variance(sample=True))
+            ):
+                ns[ns_mean(index=i)] = round(mean, precision)
+                ns[ns_sd(index=i)] = round(math.sqrt(variance), precision)
+
+            if all(ns[ns_sd(index=i)] > 0 for i in range(35)):
+                _, category, sex, low, high = groups[norm]
+                table[norm] = {
+                    "id": norm,
+                    "ns": ns,
+                    "category": category,
+                    "sex": sex,
+                    "age": [low, high],
+                    "count": stats.count,
+                }
+        return table
+
+    def save(self, path: str, min_count: int = 2, precision: int = 2) -> dict:
+        """
+        Write the norm table to a JSON file, to be used with (load_norms).
+
+        The file is also a norm set, see (ipipneo.normset.NormSet.load).
+
+        Args:
+            - path: The path of the file.
+            - min_count: Minimum number of individuals of a group.
+            - precision: Number of decimal places of the means and SDs.
+        """
+        table = self.table(min_count=min_count, precision=precision)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"question": self.question, "norms": list(table.values())},
+                f,
+                indent=2,
+            )
+        return table
+
+
+def raise_if_norms_are_invalid(norms: dict) -> bool | BaseException:
+    """
+    Raise an exception if a norm table can not be used to score.
+
+    Args:
+        - norms: Dictionary of norm id to the norm, see (NormBuilder.table).
+    """
+    if not isinstance(norms, dict):
+        raise BaseException("The norms must be a dict!")
+
+    for id, norm in norms.items():
+        ns = norm.get("ns") if isinstance(norm, dict) else None
+        if not isinstance(ns, list) or len(ns) != NS_SIZE:
+            raise BaseException(f"The norm {id} must have {NS_SIZE} values!")
+        if norm.get("id") != id:
+            raise BaseException(f"The norm {id} has a different id!")
+        if any(ns[ns_sd(index=i)] <= 0 for i in range(35)):
+            raise BaseException(f"The norm {id} has an SD that is not positive!")
+
+    return True
+
+
+def load_norms(path: str) -> dict:
+    """
+    Read a norm table written by (NormBuilder.save).
+
+    Args:
+        - path: The path of the file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    norms = {int(x["id"]): {**x, "id": int(x["id"])} for x in data.get("norms", [])}
+    raise_if_norms_are_invalid(norms=norms)
+
+    return norms
+
+
+def main() -> None:
+    """Create a norm table from CSV/TSV files."""
+    parser = argparse.ArgumentParser(
+        description="Create IPIP-NEO norms from a local population."
+    )
+    parser.add_argument("question", type=int, choices=(120, 300))
+    parser.add_argument("files", nargs="+", help="CSV/TSV files (sex, age, q1..qN).")
+    parser.add_argument("-o", "--output", default="norms.json")
+    parser.add_argument("--min-count", type=int, default=2)
+    args = parser.parse_args()
+
+    builder = NormBuilder(question=args.question)
+    for path in args.files:
+        builder.add_csv(path=path)
+
+    table = builder.save(path=args.output, min_count=args.min_count)
+    for norm in table.values():
+        print(f"{norm['id']:>3} {norm['count']:>10} {norm['category']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Sets of norms loaded from data files, indexed by sex and age."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import json
+import os
+
+from ipipneo.norm import Norm
+from ipipneo.normbuild import raise_if_norms_are_invalid
+
+
+class NormSet:
+    """
+    Norm groups of a population, such as a country or an updated sample.
+
+    Each group has an id, a category, a sex, an age range and the (ns) vector in
+    the layout of the (Norm) class. The groups are validated once and indexed by
+    (sex, age), so the norm of an individual is a single dictionary lookup.
+    """
+
+    def __init__(self, name: str, question: int, norms: list) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - name: Name of the norm set.
+            - question: Question type, 120 or 300.
+            - norms: List with the norm groups.
+        """
+        assert isinstance(name, str) and name, "The (name) field is required!"
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+
+        self.name: str = name
+        self.question: int = question
+        self.norms: dict = {}
+        self._index: dict = {}
+
+        for norm in norms:
+            norm = raise_if_norm_group_is_invalid(norm=norm)
+            if norm["id"] in self.norms:
+                raise BaseException(f"The norm {norm['id']} is duplicated!")
+            self.norms[norm["id"]] = norm
+
+            low, high = norm["age"]
+            for age in range(low, high + 1):
+                key = (norm["sex"], age)
+                if key in self._index:
+                    raise BaseException(
+                        f"The norms {self._index[key]['id']} and {norm['id']} "
+                        f"overlap at sex {key[0]} and age {age}!"
+                    )
+                self._index[key] = norm
+
+    def __len__(self) -> int:
+        """Number of norm groups."""
+        return len(self.norms)
+
+    def get(self, sex: str, age: int) -> dict | BaseException:
+        """
+        Return the norm of an individual.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+        """
+        norm = self._index.get((sex, age))
+        if norm is None:
+            raise BaseException(
+                f"The norm set {self.name} has no norm for sex {sex} and age {age}!"
+            )
+        return norm
+
+    def to_dict(self) -> dict:
+        """Serialize the norm set, the output is JSON compatible."""
+        return {
+            "name": self.name,
+            "question": self.question,
+            "norms": [
+                {**norm, "age": list(norm["age"])}
+                for _, norm in sorted(self.norms.items())
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Write the norm set to a JSON file.
+
+        Args:
+            - path: The path of the file.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @staticmethod
+    def from_dict(data: dict, name: str = None) -> "NormSet":
+        """
+        Create a norm set from a dictionary, such as the content of a file.
+
+        Args:
+            - data: Dictionary with the (question) and the list of (norms).
+            - name: Name of the norm set, by default the (name) of the data.
+        """
+        return NormSet(
+            name=name or data.get("name"),
+            question=data.get("question"),
+            norms=data.get("norms", []),
+        )
+
+    @staticmethod
+    def load(path: str, name: str = None) -> "NormSet":
+        """
+        Read a norm set from a JSON file, such as the output of (NormBuilder.save).
+
+        Args:
+            - path: The path of the file.
+            - name: Name of the norm set, by default the name in the file or the
+                    file name without extension.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        name = name or data.get("name") or os.path.splitext(os.path.basename(path))[0]
+        return NormSet.from_dict(data=data, name=name)
+
+    @staticmethod
+    def default(question: int) -> "NormSet":
+        """
+        Return the norms of Dr. Johnson, the ones used by default.
+
+        Args:
+            - question: Question type, 120 or 300.
+        """
+        return NormSet(
+            name=f"johnson-{question}",
+            question=question,
+            norms=[
+                {
+                    **Norm(sex=sex, age=low, nquestion=question),
+                    "sex": sex,
+                    "age": [low, high],
+                }
+                for _, _, sex, low, high in Norm.groups(nquestion=question)
+            ],
+        )
+
+
+class NormSets:
+    """Several norm sets in memory, selected by name on each call."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self._sets: dict = {}
+
+    def __contains__(self, name: str) -> bool:
+        """Check if there is a norm set with the name."""
+        return name in self._sets
+
+    def names(self) -> list:
+        """Return the names of the norm sets."""
+        return sorted(self._sets)
+
+    def add(self, normset: NormSet) -> NormSet:
+        """
+        Add a norm set, replacing the one with the same name.
+
+        Args:
+            - normset: The norm set.
+        """
+        assert isinstance(normset, NormSet), "The (normset) field must be a NormSet!"
+
+        self._sets[normset.name] = normset
+        return normset
+
+    def load(self, path: str, name: str = None) -> NormSet:
+        """
+        Read a norm set from a file and add it.
+
+        Args:
+            - path: The path of the file.
+            - name: Name of the norm set, see (NormSet.load).
+        """
+        return self.add(normset=NormSet.load(path=path, name=name))
+
+    def remove(self, name: str) -> None:
+        """
+        Remove a norm set.
+
+        Args:
+            - name: Name of the norm set.
+        """
+        self._sets.pop(name, None)
+
+    def get(self, name: str) -> NormSet | BaseException:
+        """
+        Return a norm set by name.
+
+        Args:
+            - name: Name of the norm set.
+        """
+        normset = self._sets.get(name)
+        if normset is None:
+            raise BaseException(f"The norm set {name} was not found!")
+        return normset
+
+
+def raise_if_norm_group_is_invalid(norm: dict) -> dict | BaseException:
+    """
+    Validate a norm group of a norm set and return it with the fields normalized.
+
+    Args:
+        - norm: Dictionary with (id, category, sex, age, ns).
+    """
+    if not isinstance(norm, dict):
+        raise BaseException("The norm must be a dict!")
+
+    try:
+        id, (low, high) = int(norm["id"]), norm["age"]
+        sex, category = str(norm["sex"]).upper(), str(norm.get("category", ""))
+        ns = [float(x) for x in norm["ns"]]
+    except (KeyError, TypeError, ValueError) as e:
+        raise BaseException(f"The norm {norm.get('id')} is invalid: {str(e)}")
+
+    if sex not in ("M", "F"):
+        raise BaseException(f"The sex of the norm {id} must be M or F!")
+
+    if not (
+        isinstance(low, int) and isinstance(high, int) and 10 <= low <= high <= 110
+    ):
+        raise BaseException(f"The age of the norm {id} must be between 10 and 110!")
+
+    norm = {
+        **norm,
+        "id": id,
+        "ns": ns,
+        "category": category,
+        "sex": sex,
+        "age": (low, high),
+    }
+    raise_if_norms_are_invalid(norms={id: norm})
+
+    return norm
+
+
+def raise_if_norm_set_is_invalid(
+    normset: NormSet, question: int
+) -> bool | BaseException:
+    """
+    Raise an exception if the norm set can not be used with the question type.
+
+    Args:
+        - normset: The norm set.
+        - question: Question type, 120 or 300.
+    """
+    if not isinstance(normset, NormSet):
+        raise BaseException("The (norms) field must be a NormSet!")
+
+    if normset.question != question:
+        raise BaseException(
+            f"The norm set {normset.name} is for {normset.question} questions!"
+        )
+
+    return True
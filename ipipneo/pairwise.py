@@ -0,0 +1,356 @@
+"""Distances between all the pairs of profiles of an index, computed by tiles."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import math
+import mmap
+import operator
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from ipipneo.neighbors import METRICS, SCALE, ProfileIndex
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+# Record of a pair of the sparse output: positions i < j and the distance.
+PAIR = struct.Struct("<IIf")
+
+# State of each worker process: profiles, norms, metric and outputs.
+_state: dict = {}
+
+
+def _init(
+    data: bytes,
+    norms: bytes,
+    dimension: int,
+    metric: str,
+    path: str,
+    threshold: float,
+    folder: str,
+) -> None:
+    _state.clear()
+    _state.update(data=data, metric=metric, threshold=threshold, output=None)
+    _state.update(norms=array("f", norms), dimension=dimension, folder=folder)
+    _state["size"] = len(data) // dimension
+
+    if path is not None:
+        with open(path, "r+b") as f:
+            _state["output"] = mmap.mmap(f.fileno(), 0)
+
+
+def _close() -> None:
+    if _state.get("output") is not None:
+        _state["output"].close()
+    _state.clear()
+
+
+def _tile_python(i0: int, i1: int, j0: int, j1: int) -> list:
+    data, norms, dimension = _state["data"], _state["norms"], _state["dimension"]
+    rows = [data[j * dimension : (j + 1) * dimension] for j in range(j0, j1)]
+
+    tile = []
+    for i in range(i0, i1):
+        a = data[i * dimension : (i + 1) * dimension]
+        if _state["metric"] == "euclidean":
+            tile.append(array("f", (math.dist(a, b) / SCALE for b in rows)))
+        else:
+            na = norms[i] or 1.0
+            tile.append(
+                array(
+                    "f",
+                    (
+                        1.0 - sum(map(operator.mul, a, b)) / (na * (norms[j] or 1.0))
+                        for j, b in zip(range(j0, j1), rows)
+                    ),
+                )
+            )
+    return tile
+
+
+def _tile_numpy(i0: int, i1: int, j0: int, j1: int) -> object:
+    matrix = numpy.frombuffer(_state["data"], dtype=numpy.uint8).reshape(
+        -1, _state["dimension"]
+    )
+    a = matrix[i0:i1].astype(numpy.float32)
+    b = matrix[j0:j1].astype(numpy.float32)
+    dot = a @ b.T
+
+    if _state["metric"] == "euclidean":
+        na, nb = (a * a).sum(axis=1), (b * b).sum(axis=1)
+        squared = numpy.maximum(na[:, None] + nb[None, :] - 2 * dot, 0.0)
+        return numpy.sqrt(squared) / numpy.float32(SCALE)
+
+    norms = numpy.frombuffer(_state["norms"], dtype=numpy.float32)
+    na, nb = norms[i0:i1], norms[j0:j1]
+    na, nb = numpy.where(na > 0, na, 1.0), numpy.where(nb > 0, nb, 1.0)
+    return 1.0 - dot / (na[:, None] * nb[None, :])
+
+
+def _tile_file(folder: str, i0: int, j0: int) -> str:
+    return os.path.join(folder, f"{i0}-{j0}.bin")
+
+
+def _tile(i0: int, i1: int, j0: int, j1: int) -> int:
+    """
+    Compute a tile and its mirror, write the pairs (i < j) up to the threshold to
+    the file of the tile and return their number.
+    """
+    size, output = _state["size"], _state["output"]
+    threshold = _state["threshold"]
+    if threshold is not None:
+        pairs = _tile_file(folder=_state["folder"], i0=i0, j0=j0)
+
+    if numpy is not None:
+        tile = _tile_numpy(i0=i0, i1=i1, j0=j0, j1=j1)
+        if output is not None:
+            out = numpy.frombuffer(output, dtype=numpy.float32).reshape(size, size)
+            out[i0:i1, j0:j1] = tile
+            out[j0:j1, i0:i1] = tile.T
+            del out
+        if threshold is None:
+            return 0
+        mask = tile <= threshold
+        if i0 == j0:
+            mask &= numpy.triu(numpy.ones(mask.shape, dtype=bool), k=1)
+        rows, cols = numpy.nonzero(mask)
+        records = numpy.empty(
+            len(rows), dtype=[("i", "<u4"), ("j", "<u4"), ("d", "<f4")]
+        )
+        records["i"], records["j"], records["d"] = i0 + rows, j0 + cols, tile[mask]
+        records.tofile(pairs)
+        return len(records)
+
+    tile = _tile_python(i0=i0, i1=i1, j0=j0, j1=j1)
+    if output is not None:
+        for r, row in enumerate(tile):
+            start = ((i0 + r) * size + j0) * 4
+            output[start : start + len(row) * 4] = row.tobytes()
+        for c in range(j1 - j0):
+            column = array("f", (row[c] for row in tile))
+            start = ((j0 + c) * size + i0) * 4
+            output[start : start + len(column) * 4] = column.tobytes()
+    if threshold is None:
+        return 0
+    count = 0
+    with open(pairs, "wb") as f:
+        for r, row in enumerate(tile):
+            found = [
+                PAIR.pack(i0 + r, j0 + c, d)
+                for c, d in enumerate(row)
+                if d <= threshold and i0 + r < j0 + c
+            ]
+            f.write(b"".join(found))
+            count += len(found)
+    return count
+
+
+class PairwiseMatrix:
+    """
+    Distances between every pair of profiles of a (ProfileIndex).
+
+    The N x N matrix is split in square tiles, only the tiles above the diagonal
+    are computed and each one is written with its mirror. The tiles run in worker
+    processes and are written straight to a memory mapped file, so the matrix
+    never has to fit in memory. The sparse pairs up to a threshold are written by
+    each tile to its own file, then joined in one file in the order of the
+    tiles, so they are never held in memory either. The same pass can fill the
+    matrix and the pairs. The distances are the ones of (ProfileIndex),
+    over the 5 domains and 30 facets of an index of (dimension) 35, or over the
+    30 facets only.
+    """
+
+    def __init__(
+        self,
+        index: ProfileIndex,
+        metric: str = "euclidean",
+        tile: int = 1024,
+        workers: int = None,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - index: The profiles.
+            - metric: Distance, euclidean or cosine.
+            - tile: Number of profiles of each side of a tile.
+            - workers: Number of processes, by default the number of CPUs and
+                       with 1 the tiles run in the current process.
+        """
+        assert isinstance(index, ProfileIndex), "The (index) must be ProfileIndex!"
+        assert metric in METRICS, f"The (metric) field must be one of {METRICS}!"
+        assert isinstance(tile, int) and tile > 0, "The (tile) field must be > 0!"
+        assert workers is None or workers > 0, "The (workers) field must be > 0!"
+
+        self.index: ProfileIndex = index
+        self.metric: str = metric
+        self.tile: int = tile
+        self.workers: int = workers or os.cpu_count() or 1
+
+    def tiles(self) -> list:
+        """Return the (i0, i1, j0, j1) of the tiles on and above the diagonal."""
+        size = len(self.index)
+        bounds = [(x, min(x + self.tile, size)) for x in range(0, size, self.tile)]
+        return [
+            (i0, i1, j0, j1)
+            for n, (i0, i1) in enumerate(bounds)
+            for j0, j1 in bounds[n:]
+        ]
+
+    def _run(self, path: str = None, threshold: float = None, pairs: str = None) -> int:
+        """Compute all the tiles once, filling the matrix and the pairs file."""
+        tiles, folder = self.tiles(), None
+        if threshold is not None:
+            folder = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(pairs)))
+        args = (
+            bytes(self.index.data),
+            bytes(self.index.norms),
+            self.index.dimension,
+            self.metric,
+            path,
+            threshold,
+            folder,
+        )
+
+        try:
+            if self.workers == 1 or len(tiles) == 1:
+                _init(*args)
+                try:
+                    count = sum(_tile(*tile) for tile in tiles)
+                finally:
+                    _close()
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init, initargs=args
+                ) as executor:
+                    count = sum(executor.map(_tile, *zip(*tiles)))
+
+            if folder is not None:
+                with open(pairs, "wb") as f:
+                    for i0, _, j0, _ in tiles:
+                        name = _tile_file(folder=folder, i0=i0, j0=j0)
+                        with open(name, "rb") as tile:
+                            shutil.copyfileobj(tile, f)
+                        os.remove(name)
+        finally:
+            if folder is not None:
+                shutil.rmtree(folder, ignore_errors=True)
+
+        return count
+
+    def save(self, path: str, pairs: str = None, threshold: float = None) -> int:
+        """
+        Write the matrix (float32, row by row) to a file, see (load_matrix), and
+        in the same pass the pairs up to a threshold, see (save_pairs). Return
+        the number of pairs.
+
+        Args:
+            - path: The path of the matrix file.
+            - pairs: The path of the pairs file, written with a (threshold).
+            - threshold: The maximum distance of the pairs.
+        """
+        assert (pairs is None) == (
+            threshold is None
+        ), "The (pairs) and (threshold) fields must be given together!"
+        assert (
+            threshold is None or threshold >= 0
+        ), "The (threshold) field must be >= 0!"
+
+        size = len(self.index)
+        with open(path, "wb") as f:
+            f.truncate(size * size * 4)
+        if pairs is not None:
+            open(pairs, "wb").close()
+
+        if not size:
+            return 0
+        return self._run(path=path, threshold=threshold, pairs=pairs)
+
+    def save_pairs(self, path: str, threshold: float) -> int:
+        """
+        Write the pairs of profiles (i < j) with a distance up to the threshold to
+        a file, see (load_pairs), without the matrix. Return the number of pairs.
+
+        Args:
+            - path: The path of the pairs file.
+            - threshold: The maximum distance, in percentile points for the
+                         euclidean and 1 minus the similarity for the cosine.
+        """
+        assert threshold >= 0, "The (threshold) field must be >= 0!"
+
+        open(path, "wb").close()
+        if not len(self.index):
+            return 0
+        return self._run(threshold=threshold, pairs=path)
+
+    def pairs(self, threshold: float) -> iter:
+        """
+        Yield the (id, id, distance) of the pairs of profiles with a distance up
+        to the threshold, the most similar pairs only.
+
+        The pairs are written to a temporary file and read back one block at a
+        time, see (save_pairs).
+
+        Args:
+            - threshold: The maximum distance, in percentile points for the
+                         euclidean and 1 minus the similarity for the cosine.
+        """
+        assert threshold >= 0, "The (threshold) field must be >= 0!"
+
+        ids = self.index.ids
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "pairs.bin")
+            self.save_pairs(path=path, threshold=threshold)
+            for i, j, d in load_pairs(path=path):
+                yield ids[i], ids[j], d
+
+
+def load_matrix(path: str) -> object:
+    """
+    Open a matrix written by (PairwiseMatrix.save), without reading it to memory.
+
+    The result is a NumPy memory map or a memory view of shape (N, N), the
+    distance of the profiles (i, j) is (matrix[i, j]).
+
+    Args:
+        - path: The path of the file.
+    """
+    size = math.isqrt(os.path.getsize(path) // 4)
+    if size == 0:
+        return memoryview(array("f"))
+
+    if numpy is not None:
+        return numpy.memmap(path, dtype=numpy.float32, mode="r", shape=(size, size))
+
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(buffer).cast("f", (size, size))
+
+
+def load_pairs(path: str, block: int = 65536) -> iter:
+    """
+    Read the pairs written by (PairwiseMatrix.save_pairs), block by block.
+
+    Yield the positions (i < j) of the profiles in the index and their distance.
+
+    Args:
+        - path: The path of the file.
+        - block: Number of pairs read at once.
+    """
+    assert isinstance(block, int) and block > 0, "The (block) field must be > 0!"
+
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(block * PAIR.size), b""):
+            yield from PAIR.iter_unpack(data)
@@ -0,0 +1,283 @@
+"""Percentiles of the domains and facets based on a reference sample."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+
+from ipipneo.norm import Norm
+from ipipneo.normbuild import NormBuilder
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+# Number of sums of each individual, see (ipipneo.normbuild.ns_sums).
+SIZE = 35
+
+
+def quantile_knots(counts: dict, quantiles: int) -> array:
+    """
+    Return the quantiles of a sample at the same distance, from 0 to 1.
+
+    The quantiles are interpolated between the order statistics, like the
+    (linear) method of NumPy.
+
+    Args:
+        - counts: Dictionary of value to the number of times it was seen.
+        - quantiles: Number of quantiles.
+    """
+    values = sorted(counts)
+    ends, total = [], 0
+    for value in values:
+        total += counts[value]
+        ends.append(total)
+
+    def order(i: int) -> float:
+        return values[bisect_right(ends, i)]
+
+    knots = array("f")
+    for k in range(quantiles):
+        rank = k * (total - 1) / (quantiles - 1)
+        low = int(rank)
+        x = order(low)
+        if rank > low:
+            x += (rank - low) * (order(low + 1) - x)
+        knots.append(x)
+    return knots
+
+
+def rank(knots: array, value: float) -> float:
+    """
+    Return the percentile (1 to 99) of a value among the quantiles.
+
+    A value equal to one or more quantiles gets the middle of them, a value
+    between two quantiles is interpolated. Like the cubic approximation, the
+    percentile is clamped to 1 and 99.
+
+    Args:
+        - knots: The quantiles, see (quantile_knots).
+        - value: The value.
+    """
+    n = len(knots)
+    low, high = bisect_left(knots, value), bisect_right(knots, value)
+
+    if high > low:
+        position = (low + high - 1) / 2
+    elif low == 0:
+        position = 0.0
+    elif low == n:
+        position = n - 1.0
+    else:
+        a, b = knots[low - 1], knots[low]
+        position = low - 1 + (value - a) / (b - a)
+
+    return min(max(100.0 * position / (n - 1), 1.0), 99.0)
+
+
+def rank_batch(knots: array, values: list) -> list:
+    """
+    Return the percentiles of many values, with (searchsorted) when NumPy exists.
+
+    Args:
+        - knots: The quantiles, see (quantile_knots).
+        - values: The values.
+    """
+    if numpy is None:
+        return [rank(knots=knots, value=x) for x in values]
+
+    k = numpy.frombuffer(knots, dtype=numpy.float32).astype(numpy.float64)
+    n = len(knots)
+    x = numpy.asarray(values, dtype=numpy.float64)
+    low = numpy.searchsorted(k, x, side="left")
+    high = numpy.searchsorted(k, x, side="right")
+
+    inner = numpy.clip(low, 1, n - 1)
+    a, b = k[inner - 1], k[inner]
+    width = numpy.where(b > a, b - a, 1)
+    position = numpy.where(
+        high > low,
+        (low + high - 1) / 2,
+        numpy.where(
+            low == 0, 0.0, numpy.where(low == n, n - 1.0, inner - 1 + (x - a) / width)
+        ),
+    )
+    return numpy.clip(100.0 * position / (n - 1), 1.0, 99.0).tolist()
+
+
+class EmpiricalPercentile:
+    """
+    Percentiles against the quantiles of a reference sample of each norm group.
+
+    It is an alternative to the cubic approximation of (Norm.percent), the
+    quantiles of the 5 domain and 30 facet sums are kept in typed arrays.
+    """
+
+    def __init__(self, question: int, tables: dict = None) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+            - tables: Dictionary of norm id to the 35 lists of quantiles.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+
+        self.question: int = question
+        self.tables: dict = {}
+
+        for norm, knots in (tables or {}).items():
+            assert len(knots) == SIZE, f"The norm {norm} must have {SIZE} quantiles!"
+            assert all(
+                len(x) > 1 and list(x) == sorted(x) for x in knots
+            ), f"The quantiles of the norm {norm} must be sorted!"
+            self.tables[int(norm)] = [array("f", x) for x in knots]
+
+    def __contains__(self, norm: int) -> bool:
+        """Check if there are quantiles for the norm group."""
+        return norm in self.tables
+
+    def percentiles(self, norm: int, sums: list) -> list:
+        """
+        Return the percentiles of the 35 sums of an individual.
+
+        Args:
+            - norm: The id of the norm group.
+            - sums: The domain and facet sums, in the order of (ns_sums).
+        """
+        return [rank(knots=k, value=x) for k, x in zip(self.tables[norm], sums)]
+
+    def percentiles_batch(self, norm: int, rows: list) -> list:
+        """
+        Return the percentiles of the 35 sums of many individuals of a group.
+
+        Args:
+            - norm: The id of the norm group.
+            - rows: List with the 35 sums of each individual.
+        """
+        columns = [
+            rank_batch(knots=k, values=[x[i] for x in rows])
+            for i, k in enumerate(self.tables[norm])
+        ]
+        return [list(x) for x in zip(*columns)]
+
+    def to_dict(self) -> dict:
+        """Serialize the quantiles, the output is JSON compatible."""
+        return {
+            "question": self.question,
+            "tables": {
+                str(norm): [x.tolist() for x in knots]
+                for norm, knots in sorted(self.tables.items())
+            },
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Write the quantiles to a JSON file.
+
+        Args:
+            - path: The path of the file.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @staticmethod
+    def from_dict(data: dict) -> "EmpiricalPercentile":
+        """
+        Load the quantiles serialized by (to_dict).
+
+        Args:
+            - data: The serialized quantiles.
+        """
+        return EmpiricalPercentile(question=data["question"], tables=data["tables"])
+
+    @staticmethod
+    def load(path: str) -> "EmpiricalPercentile":
+        """
+        Read the quantiles written by (save).
+
+        Args:
+            - path: The path of the file.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return EmpiricalPercentile.from_dict(data=json.load(f))
+
+
+class PercentileBuilder(NormBuilder):
+    """
+    Distribution of the sums of each norm group, read in a single pass.
+
+    The sums are integers, so the counts of each value are enough to find the
+    exact quantiles. The means and SDs of the (NormBuilder) are also kept.
+    """
+
+    def __init__(self, question: int) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+        """
+        super().__init__(question=question)
+        self.counts: dict = {}
+
+    def update(self, sex: str, age: int, sums: list) -> None:
+        """
+        Add the 35 sums of an individual to its norm group.
+
+        Args:
+            - sex: Gender of the individual (M or F).
+            - age: The age of the individual.
+            - sums: The domain and facet sums, in the order of (ns_sums).
+        """
+        super().update(sex=sex, age=age, sums=sums)
+
+        norm, _ = Norm.group(sex=sex, age=age, nquestion=self.question)
+        counts = self.counts.get(norm)
+        if counts is None:
+            counts = self.counts[norm] = [{} for _ in range(SIZE)]
+        for count, x in zip(counts, sums):
+            count[x] = count.get(x, 0) + 1
+
+    def merge(self, other: "PercentileBuilder") -> "PercentileBuilder":
+        """
+        Add the groups of another builder, such as another shard of the data.
+
+        Args:
+            - other: The builder to be added.
+        """
+        super().merge(other=other)
+
+        for norm, counts in other.counts.items():
+            mine = self.counts.setdefault(norm, [{} for _ in range(SIZE)])
+            for count, values in zip(mine, counts):
+                for x, n in values.items():
+                    count[x] = count.get(x, 0) + n
+        return self
+
+    def build(self, quantiles: int = 1001, min_count: int = 2) -> EmpiricalPercentile:
+        """
+        Return the percentile engine with the quantiles of each norm group.
+
+        Args:
+            - quantiles: Number of quantiles of each sum.
+            - min_count: Minimum number of individuals of a group.
+        """
+        assert quantiles > 1, "The (quantiles) field must be > 1!"
+
+        return EmpiricalPercentile(
+            question=self.question,
+            tables={
+                norm: [quantile_knots(counts=x, quantiles=quantiles) for x in counts]
+                for norm, counts in self.counts.items()
+                if self.groups[norm].count >= min_count
+            },
+        )
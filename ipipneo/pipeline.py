@@ -0,0 +1,282 @@
+"""Pipelined file to file scoring, with the reading, scoring and writing overlapped."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from ipipneo.batch import AnswerMatrix, read_csv
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.normset import NormSet
+from ipipneo.quality import ResponseQuality
+
+# Stages of the pipeline, each one in its own thread.
+PIPELINE_STAGES = ("read", "score", "write")
+
+# Marks the end of the items of a queue.
+_END = object()
+
+# State of the worker processes, set by (_init).
+_state: dict = {}
+
+
+def encode_results(results: list) -> bytes:
+    """
+    Return the results as JSON lines.
+
+    Args:
+        - results: The dictionaries generated by the compute method.
+    """
+    return "".join(json.dumps(x, separators=(",", ":")) + "\n" for x in results).encode(
+        "utf-8"
+    )
+
+
+def _scorer(question: int, options: dict) -> dict:
+    """Return the state of a scorer: the inventory and the options of the batches."""
+    return {"ipip": IpipNeo(question=question), "options": options}
+
+
+def _init(question: int, options: dict) -> None:
+    _state.clear()
+    _state.update(_scorer(question=question, options=options))
+
+
+def _score_chunk(matrix: AnswerMatrix, state: dict = None) -> tuple:
+    """
+    Score a chunk, return its JSON lines, rows and the seconds spent.
+
+    The scorer is (state), by default the one of the worker process.
+    """
+    state = _state if state is None else state
+    begin = time.perf_counter()
+    results = state["ipip"].compute_batch(matrix=matrix, **state["options"])
+    return encode_results(results=results), len(results), time.perf_counter() - begin
+
+
+class ScoringPipeline:
+    """
+    Scores a CSV/TSV file into a JSON lines file with a thread per stage.
+
+    A reader thread parses the chunks of the input, the scorer scores them in a
+    pool of processes (or in its thread with one worker) and a writer thread
+    appends them to the output, in the order of the input. The stages are
+    linked by bounded queues, so a slow stage blocks the previous ones and the
+    memory is capped. The rows, time and queue depth of each stage are given by
+    (stats), the stage whose input queue stays full is the bottleneck.
+    """
+
+    def __init__(
+        self,
+        question: int,
+        chunk_size: int = 1000,
+        queue_size: int = 4,
+        workers: int = 1,
+        norms: NormSet = None,
+        quality: ResponseQuality = None,
+        dedup: bool = False,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+            - chunk_size: Number of rows of each chunk.
+            - queue_size: Maximum number of chunks waiting between two stages.
+            - workers: Number of scoring processes, with 1 the chunks are scored
+                       in the thread of the scorer.
+            - norms: Norm set of the scoring, by default Johnson's norms.
+            - quality: Adds the careless responding indices to each result.
+            - dedup: If true, the duplicated rows of each chunk are scored once.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+        assert (
+            isinstance(queue_size, int) and queue_size > 0
+        ), "The (queue_size) field must be > 0!"
+        assert (
+            isinstance(workers, int) and workers > 0
+        ), "The (workers) field must be > 0!"
+
+        self.question: int = question
+        self.chunk_size: int = chunk_size
+        self.queue_size: int = queue_size
+        self.workers: int = workers
+        self.options: dict = {"norms": norms, "quality": quality, "dedup": dedup}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._queues: dict = {
+            "score": queue.Queue(maxsize=self.queue_size),
+            "write": queue.Queue(maxsize=self.queue_size),
+        }
+        self._stats: dict = {
+            x: {"chunks": 0, "rows": 0, "seconds": 0.0, "max_queue": 0}
+            for x in PIPELINE_STAGES
+        }
+        self._stop = threading.Event()
+        self._error: BaseException = None
+        self._begin: float = time.perf_counter()
+        self._end: float = None
+
+    def stats(self) -> dict:
+        """
+        Return the chunks, rows, busy seconds and rows per second of each stage,
+        with the current and maximum depth of its input queue.
+        """
+        elapsed = (self._end or time.perf_counter()) - self._begin
+        stats = {}
+        for stage in PIPELINE_STAGES:
+            stage_stats = dict(self._stats[stage])
+            stage_stats["rate"] = (
+                stage_stats["rows"] / stage_stats["seconds"]
+                if stage_stats["seconds"]
+                else 0.0
+            )
+            stage_stats["queue"] = (
+                self._queues[stage].qsize() if stage in self._queues else 0
+            )
+            stats[stage] = stage_stats
+        return {"elapsed": elapsed, "stages": stats}
+
+    def _put(self, stage: str, item: object) -> None:
+        """Put an item in the input queue of a stage, waiting while it is full."""
+        target = self._queues[stage]
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            stats = self._stats[stage]
+            stats["max_queue"] = max(stats["max_queue"], target.qsize())
+            return
+
+    def _get(self, stage: str) -> object:
+        """Get the next item of the input queue of a stage, (_END) when stopped."""
+        while not self._stop.is_set():
+            try:
+                return self._queues[stage].get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _guard(self, target: object, *args) -> None:
+        try:
+            target(*args)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            self._stop.set()
+
+    def _read(self, path: str, delimiter: str) -> None:
+        stats = self._stats["read"]
+        chunks = read_csv(
+            path=path,
+            question=self.question,
+            chunk_size=self.chunk_size,
+            delimiter=delimiter,
+        )
+        while True:
+            begin = time.perf_counter()
+            matrix = next(chunks, _END)
+            stats["seconds"] += time.perf_counter() - begin
+            if matrix is _END:
+                break
+            stats["chunks"] += 1
+            stats["rows"] += len(matrix)
+            self._put(stage="score", item=matrix)
+        self._put(stage="score", item=_END)
+
+    def _score(self, executor: ProcessPoolExecutor, state: dict) -> None:
+        while True:
+            matrix = self._get(stage="score")
+            if matrix is _END:
+                break
+            if executor is not None:
+                future = executor.submit(_score_chunk, matrix)
+            else:
+                future = Future()
+                future.set_result(_score_chunk(matrix, state))
+            self._put(stage="write", item=future)
+        self._put(stage="write", item=_END)
+
+    def _write(self, output: str) -> None:
+        score, stats = self._stats["score"], self._stats["write"]
+        with open(output, "wb") as f:
+            while True:
+                future = self._get(stage="write")
+                if future is _END:
+                    break
+                data, rows, seconds = future.result()
+                score["chunks"] += 1
+                score["rows"] += rows
+                score["seconds"] += seconds
+
+                begin = time.perf_counter()
+                f.write(data)
+                stats["seconds"] += time.perf_counter() - begin
+                stats["chunks"] += 1
+                stats["rows"] += rows
+
+            if self._error is None:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def run(self, path: str, output: str, delimiter: str = None) -> dict:
+        """
+        Score a CSV/TSV file (sex, age, q1..qN) into a JSON lines file.
+
+        The output is written to a temporary file and renamed when complete, the
+        first error of any stage stops the others and is raised. Return the
+        final (stats).
+
+        Args:
+            - path: The path of the input file.
+            - output: The path of the JSON lines file.
+            - delimiter: Column separator, by default a tab for (.tsv) files.
+        """
+        self._reset()
+        temporary = f"{output}.tmp"
+
+        executor, state = None, None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init,
+                initargs=(self.question, self.options),
+            )
+        else:
+            state = _scorer(question=self.question, options=self.options)
+
+        threads = [
+            threading.Thread(target=self._guard, args=(self._read, path, delimiter)),
+            threading.Thread(target=self._guard, args=(self._score, executor, state)),
+            threading.Thread(target=self._guard, args=(self._write, temporary)),
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self._stop.set()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self._end = time.perf_counter()
+
+        if self._error is not None:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise self._error
+
+        os.replace(temporary, output)
+        return self.stats()
@@ -0,0 +1,228 @@
+"""Profiling of a sampled fraction of the scoring calls."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+FORMATS = ("pstats", "collapsed")
+
+
+class SampledProfiler:
+    """
+    Profiles a fraction of the calls and merges the stats in memory.
+
+    The stats are written to the directory every (interval) seconds, one file per
+    period: (.pstats) files can be merged with pstats.Stats(*files) and
+    (.collapsed) files are the input of flamegraph tools.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0.001,
+        directory: str = None,
+        interval: float = 60.0,
+        format: str = "pstats",
+        seed: int = None,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - rate: Fraction of the calls that are profiled, between 0 and 1.
+            - directory: Where the stats are written, if None they stay in memory.
+            - interval: Minimum time in seconds between two files.
+            - format: The output format, pstats or collapsed.
+            - seed: Seed of the sampling, used for testing.
+        """
+        assert 0 <= rate <= 1, "The (rate) field must be between 0 and 1!"
+        assert interval >= 0, "The (interval) field cannot be negative!"
+
+        if format not in FORMATS:
+            raise ValueError(f"The available formats are: {list(FORMATS)}")
+
+        self.rate: float = float(rate)
+        self.directory: str = directory
+        self.interval: float = float(interval)
+        self.format: str = format
+        self.calls: int = 0
+        self.sampled: int = 0
+        self.files: list = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._stats: pstats.Stats = None
+        self._stacks: dict = {}
+        self._last_dump: float = time.monotonic()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def sample(self) -> bool:
+        """Decide if the current call is profiled."""
+        self.calls += 1
+        return self._random.random() < self.rate
+
+    def profile(self, function: callable, *args, **kwargs) -> object:
+        """
+        Run the function under the profiler and merge its stats.
+
+        Only one call is profiled at a time, concurrent calls run without it.
+
+        Args:
+            - function: The function to be profiled.
+            - args: Positional arguments of the function.
+            - kwargs: Named arguments of the function.
+        """
+        if not self._busy.acquire(blocking=False):
+            return function(*args, **kwargs)
+
+        try:
+            if self.format == "pstats":
+                profile = cProfile.Profile()
+                try:
+                    return profile.runcall(function, *args, **kwargs)
+                finally:
+                    self._merge_pstats(profile=profile)
+
+            stacks = {}
+            try:
+                return trace_stacks(stacks, function, *args, **kwargs)
+            finally:
+                self._merge_stacks(stacks=stacks)
+        finally:
+            self._busy.release()
+
+    def _merge_pstats(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            self.sampled += 1
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+        self._dump_if_due()
+
+    def _merge_stacks(self, stacks: dict) -> None:
+        with self._lock:
+            self.sampled += 1
+            for stack, elapsed in stacks.items():
+                self._stacks[stack] = self._stacks.get(stack, 0) + elapsed
+        self._dump_if_due()
+
+    def _dump_if_due(self) -> None:
+        if self.directory and time.monotonic() - self._last_dump >= self.interval:
+            self.dump()
+
+    def stats(self) -> pstats.Stats:
+        """Return the merged stats of the current period (pstats format)."""
+        return self._stats
+
+    def collapsed(self) -> str:
+        """Return the merged stacks of the current period, in microseconds."""
+        with self._lock:
+            return format_collapsed(stacks=self._stacks)
+
+    def dump(self) -> str:
+        """Write the stats of the current period to the directory and clear them."""
+        assert self.directory, "The (directory) field is required to dump!"
+
+        with self._lock:
+            self._last_dump = time.monotonic()
+            if self._stats is None and not self._stacks:
+                return None
+
+            name = "ipipneo-%d-%s-%d.%s" % (
+                os.getpid(),
+                time.strftime("%Y%m%d-%H%M%S"),
+                len(self.files),
+                self.format,
+            )
+            path = os.path.join(self.directory, name)
+
+            if self.format == "pstats":
+                self._stats.dump_stats(path)
+            else:
+                with open(path, "w") as f:
+                    f.write(format_collapsed(stacks=self._stacks))
+
+            self._stats, self._stacks = None, {}
+            self.files.append(path)
+
+        return path
+
+
+def format_collapsed(stacks: dict) -> str:
+    """
+    Format the stacks as lines (name;name;name microseconds) of flamegraph tools.
+
+    Args:
+        - stacks: Dictionary of stack (tuple of names) to seconds.
+    """
+    return "".join(
+        f"{';'.join(stack)} {int(elapsed * 1e6)}\n"
+        for stack, elapsed in sorted(stacks.items())
+        if int(elapsed * 1e6) > 0
+    )
+
+
+def frame_name(frame: object) -> str:
+    """
+    Name of a Python frame, as module:function.
+
+    Args:
+        - frame: The frame.
+    """
+    code = frame.f_code
+    return "%s:%s" % (
+        frame.f_globals.get("__name__", "?"),
+        getattr(code, "co_qualname", code.co_name),
+    )
+
+
+def trace_stacks(stacks: dict, function: callable, *args, **kwargs) -> object:
+    """
+    Run the function adding the self time of each call stack to (stacks).
+
+    Args:
+        - stacks: Dictionary of stack (tuple of names) to seconds.
+        - function: The function to be traced.
+        - args: Positional arguments of the function.
+        - kwargs: Named arguments of the function.
+    """
+    clock = time.perf_counter
+    paths = [(frame_name(sys._getframe()),)]
+    last = clock()
+
+    def tracer(frame: object, event: str, arg: object) -> None:
+        nonlocal last
+        now = clock()
+        stacks[paths[-1]] = stacks.get(paths[-1], 0) + now - last
+
+        if event == "call":
+            paths.append(paths[-1] + (frame_name(frame),))
+        elif event == "c_call":
+            name = getattr(arg, "__qualname__", getattr(arg, "__name__", "?"))
+            paths.append(paths[-1] + (f"builtins:{name}",))
+        elif len(paths) > 1 and event in ("return", "c_return", "c_exception"):
+            paths.pop()
+
+        last = clock()
+
+    previous = sys.getprofile()
+    sys.setprofile(tracer)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        sys.setprofile(previous)
+        stacks[paths[-1]] = stacks.get(paths[-1], 0) + clock() - last
@@ -0,0 +1,325 @@
+"""Careless responding indices of an answer matrix, computed before scoring."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import math
+
+from ipipneo.batch import AnswerMatrix, reverse_matrix
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+# Number of facets, the item (j) belongs to the facet (j % 30).
+FACETS = 30
+
+# Squared Mahalanobis distance of the chi-square with 30 degrees, p < 0.001.
+MAHALANOBIS_LIMIT = 59.70
+
+
+def invert(matrix: list) -> list | BaseException:
+    """
+    Return the inverse of a square matrix, by Gauss-Jordan elimination.
+
+    Args:
+        - matrix: The matrix, a list of rows.
+    """
+    size = len(matrix)
+    rows = [
+        [float(x) for x in row] + [1.0 if i == j else 0.0 for j in range(size)]
+        for i, row in enumerate(matrix)
+    ]
+
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda i: abs(rows[i][col]))
+        if abs(rows[pivot][col]) < 1e-12:
+            raise BaseException("The covariance matrix is singular!")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+
+        scale = rows[col][col]
+        rows[col] = [x / scale for x in rows[col]]
+        for i in range(size):
+            if i != col and rows[i][col]:
+                factor = rows[i][col]
+                rows[i] = [x - factor * y for x, y in zip(rows[i], rows[col])]
+
+    return [row[size:] for row in rows]
+
+
+class ResponseQuality:
+    """
+    Indices of careless responding of each row of an answer matrix.
+
+    - long_string: Longest run of the same option in the raw answers.
+    - irv: Standard deviation of the raw answers of the individual.
+    - even_odd: Correlation of the even and odd item halves of the 30 facets,
+                with the Spearman-Brown correction.
+    - mahalanobis: Squared distance of the 30 facet sums to the reference.
+
+    Each index out of its limit adds its name to the (flags) of the row.
+    """
+
+    def __init__(
+        self,
+        question: int,
+        max_long_string: int = 10,
+        min_irv: float = 0.5,
+        min_even_odd: float = 0.3,
+        max_mahalanobis: float = MAHALANOBIS_LIMIT,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+            - max_long_string: Flag runs of the same option longer than it.
+            - min_irv: Flag standard deviations below it.
+            - min_even_odd: Flag even-odd consistencies below it.
+            - max_mahalanobis: Flag squared distances above it.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+
+        self.question: int = question
+        self.max_long_string: int = max_long_string
+        self.min_irv: float = min_irv
+        self.min_even_odd: float = min_even_odd
+        self.max_mahalanobis: float = max_mahalanobis
+        self.count: int = 0
+        self.sums: list = [0] * FACETS
+        self.cross: list = [[0] * FACETS for _ in range(FACETS)]
+        self._reference: tuple = None
+
+    def fit(self, matrix: AnswerMatrix) -> "ResponseQuality":
+        """
+        Add the facet sums of a matrix to the reference mean and covariance.
+
+        Args:
+            - matrix: The matrix of the reference population.
+        """
+        assert (
+            matrix.question == self.question
+        ), f"The (matrix) must have {self.question} questions!"
+
+        for sums in self._facet_sums(reversed=reverse_matrix(matrix=matrix)):
+            self.count += 1
+            self.sums = [x + y for x, y in zip(self.sums, sums)]
+            for row, x in zip(self.cross, sums):
+                row[:] = [c + x * y for c, y in zip(row, sums)]
+
+        self._reference = None
+        return self
+
+    def reference(self) -> tuple:
+        """Return the mean and the inverse of the covariance of the facet sums."""
+        if self._reference is None and self.count > FACETS:
+            n = self.count
+            mean = [x / n for x in self.sums]
+            covariance = [
+                [
+                    (c - self.sums[a] * self.sums[b] / n) / (n - 1)
+                    for b, c in enumerate(row)
+                ]
+                for a, row in enumerate(self.cross)
+            ]
+            self._reference = (mean, invert(matrix=covariance))
+        return self._reference
+
+    def _facet_sums(self, reversed: bytes) -> list:
+        size = self.question
+        return [
+            [sum(reversed[i + f : i + size : FACETS]) for f in range(FACETS)]
+            for i in range(0, len(reversed), size)
+        ]
+
+    def assess(self, matrix: AnswerMatrix, reversed: bytes = None) -> list:
+        """
+        Return the indices and the flags of each row of a matrix, at once.
+
+        Args:
+            - matrix: The matrix with the answers sorted by question.
+            - reversed: The answers after (reverse_matrix), when already known.
+        """
+        assert (
+            matrix.question == self.question
+        ), f"The (matrix) must have {self.question} questions!"
+
+        if reversed is None:
+            reversed = reverse_matrix(matrix=matrix)
+        if numpy is not None:
+            rows = self._assess_numpy(data=matrix.data, reversed=reversed)
+        else:
+            rows = self._assess_python(data=matrix.data, reversed=reversed)
+
+        for row in rows:
+            row["flags"] = self.flags(indices=row)
+        return rows
+
+    def flags(self, indices: dict) -> list:
+        """
+        Return the names of the indices out of their limits.
+
+        Args:
+            - indices: The indices of a row.
+        """
+        flags = []
+        if indices["long_string"] > self.max_long_string:
+            flags.append("long_string")
+        if indices["irv"] < self.min_irv:
+            flags.append("irv")
+        if indices["even_odd"] is None or indices["even_odd"] < self.min_even_odd:
+            flags.append("even_odd")
+        if (
+            indices["mahalanobis"] is not None
+            and indices["mahalanobis"] > self.max_mahalanobis
+        ):
+            flags.append("mahalanobis")
+        return flags
+
+    def _assess_python(self, data: bytes, reversed: bytes) -> list:
+        size, reference = self.question, self.reference()
+
+        rows = []
+        for i, sums in zip(
+            range(0, len(data), size), self._facet_sums(reversed=reversed)
+        ):
+            answers = data[i : i + size]
+
+            longest, run = 1, 1
+            for a, b in zip(answers, answers[1:]):
+                run = run + 1 if a == b else 1
+                longest = max(longest, run)
+
+            mean = sum(answers) / size
+            irv = math.sqrt(sum((x - mean) ** 2 for x in answers) / size)
+
+            row = reversed[i : i + size]
+            even = [sum(row[f : size : 2 * FACETS]) for f in range(FACETS)]
+            odd = [sum(row[f + FACETS : size : 2 * FACETS]) for f in range(FACETS)]
+
+            distance = None
+            if reference is not None:
+                center, inverse = reference
+                diff = [x - y for x, y in zip(sums, center)]
+                distance = sum(
+                    x * sum(y * z for y, z in zip(line, diff))
+                    for x, line in zip(diff, inverse)
+                )
+
+            rows.append(
+                {
+                    "long_string": longest,
+                    "irv": irv,
+                    "even_odd": spearman_brown(r=correlation(x=even, y=odd)),
+                    "mahalanobis": distance,
+                }
+            )
+        return rows
+
+    def _assess_numpy(self, data: bytes, reversed: bytes) -> list:
+        size, reference = self.question, self.reference()
+        answers = numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, size)
+        items = numpy.frombuffer(reversed, dtype=numpy.uint8).reshape(
+            -1, size // FACETS, FACETS
+        )
+        if not len(answers):
+            return []
+
+        run = numpy.ones(len(answers), dtype=numpy.int64)
+        longest = run.copy()
+        for j in range(1, size):
+            run = numpy.where(answers[:, j] == answers[:, j - 1], run + 1, 1)
+            longest = numpy.maximum(longest, run)
+
+        irv = answers.astype(numpy.float64).std(axis=1)
+
+        even = items[:, 0::2, :].sum(axis=1, dtype=numpy.float64)
+        odd = items[:, 1::2, :].sum(axis=1, dtype=numpy.float64)
+        even -= even.mean(axis=1, keepdims=True)
+        odd -= odd.mean(axis=1, keepdims=True)
+        scale = numpy.sqrt((even * even).sum(axis=1) * (odd * odd).sum(axis=1))
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            r = (even * odd).sum(axis=1) / scale
+
+        distances = [None] * len(answers)
+        if reference is not None:
+            center, inverse = (numpy.asarray(x) for x in reference)
+            diff = items.sum(axis=1, dtype=numpy.float64) - center
+            distances = numpy.einsum("ij,jk,ik->i", diff, inverse, diff).tolist()
+
+        return [
+            {
+                "long_string": int(a),
+                "irv": float(b),
+                "even_odd": spearman_brown(r=None if math.isnan(c) else float(c)),
+                "mahalanobis": d,
+            }
+            for a, b, c, d in zip(longest, irv, r, distances)
+        ]
+
+    def to_dict(self) -> dict:
+        """Serialize the limits and the reference, the output is JSON compatible."""
+        return {
+            "question": self.question,
+            "max_long_string": self.max_long_string,
+            "min_irv": self.min_irv,
+            "min_even_odd": self.min_even_odd,
+            "max_mahalanobis": self.max_mahalanobis,
+            "count": self.count,
+            "sums": self.sums,
+            "cross": self.cross,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "ResponseQuality":
+        """
+        Load the limits and the reference serialized by (to_dict).
+
+        Args:
+            - data: The serialized limits and reference.
+        """
+        quality = ResponseQuality(
+            question=data["question"],
+            max_long_string=data["max_long_string"],
+            min_irv=data["min_irv"],
+            min_even_odd=data["min_even_odd"],
+            max_mahalanobis=data["max_mahalanobis"],
+        )
+        quality.count = int(data.get("count", 0))
+        quality.sums = [int(x) for x in data.get("sums", quality.sums)]
+        quality.cross = [
+            [int(x) for x in row] for row in data.get("cross", quality.cross)
+        ]
+        return quality
+
+
+def correlation(x: list, y: list) -> float:
+    """
+    Return the Pearson correlation, None when a side is constant.
+
+    Args:
+        - x: The first values.
+        - y: The second values.
+    """
+    mx, my = sum(x) / len(x), sum(y) / len(y)
+    dx, dy = [a - mx for a in x], [b - my for b in y]
+    scale = math.sqrt(sum(a * a for a in dx) * sum(b * b for b in dy))
+    return sum(a * b for a, b in zip(dx, dy)) / scale if scale else None
+
+
+def spearman_brown(r: float) -> float:
+    """
+    Return the reliability of the full length test from the one of its halves.
+
+    Args:
+        - r: The correlation of the halves.
+    """
+    if r is None:
+        return None
+    return 2 * r / (1 + r) if r > -1 else -1.0
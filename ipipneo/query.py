@@ -0,0 +1,143 @@
+"""Top-k and range queries on the columns of a result store, with zone maps."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import heapq
+from array import array
+
+from ipipneo.store import ResultStore
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+
+class ScoreQuery:
+    """
+    Queries on the numeric columns of a (ResultStore), such as the percentiles.
+
+    Each column has a zone map, the minimum and maximum of each block of rows.
+    A range query skips the blocks out of the range and takes the whole blocks
+    inside it, a top-k query reads the blocks by their maximum and stops when no
+    block can beat the k-th value. The zone maps grow with the store.
+    """
+
+    def __init__(self, store: ResultStore, block: int = 4096) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - store: The result store.
+            - block: Number of rows of each zone.
+        """
+        assert isinstance(store, ResultStore), "The (store) must be ResultStore!"
+        assert isinstance(block, int) and block > 0, "The (block) field must be > 0!"
+
+        self.store: ResultStore = store
+        self.block: int = block
+        self._zones: dict = {}
+
+    def _column(self, name: str) -> memoryview:
+        if name == "id" or name not in self.store.columns:
+            raise BaseException(f"The column {name} can not be queried!")
+        return self.store.column(name=name)
+
+    def zones(self, name: str) -> tuple:
+        """
+        Return the minimum and the maximum of each block of a column.
+
+        Args:
+            - name: Name of the column, see (store_columns).
+        """
+        self.store.flush()
+        values, rows = self._column(name=name), len(self.store)
+        low, high, done = self._zones.get(name, (array("d"), array("d"), 0))
+
+        start = done - done % self.block
+        del low[start // self.block :], high[start // self.block :]
+        if numpy is not None and rows > start:
+            data = numpy.frombuffer(values, dtype=self.store.columns[name])[start:rows]
+            full = len(data) - len(data) % self.block
+            blocks = data[:full].reshape(-1, self.block)
+            low.extend(blocks.min(axis=1).tolist())
+            high.extend(blocks.max(axis=1).tolist())
+            start += full
+        for a in range(start, rows, self.block):
+            block = values[a : min(a + self.block, rows)]
+            low.append(min(block))
+            high.append(max(block))
+
+        self._zones[name] = (low, high, rows)
+        return low, high
+
+    def range(self, name: str, low: float, high: float) -> list:
+        """
+        Return the rows with a value between low and high, inclusive.
+
+        Args:
+            - name: Name of the column.
+            - low: The minimum value.
+            - high: The maximum value.
+        """
+        mins, maxs = self.zones(name=name)
+        values, rows = self._column(name=name), len(self.store)
+
+        found = []
+        for n, (a, b) in enumerate(zip(mins, maxs)):
+            if b < low or a > high:
+                continue
+            start, end = n * self.block, min((n + 1) * self.block, rows)
+            if low <= a and b <= high:
+                found.extend(range(start, end))
+            else:
+                found.extend(i for i in range(start, end) if low <= values[i] <= high)
+        return found
+
+    def count(self, name: str, low: float, high: float) -> int:
+        """
+        Return the number of rows with a value between low and high, inclusive.
+
+        Args:
+            - name: Name of the column.
+            - low: The minimum value.
+            - high: The maximum value.
+        """
+        return len(self.range(name=name, low=low, high=high))
+
+    def top(self, name: str, k: int = 100, largest: bool = True) -> list:
+        """
+        Return the (row, value) of the k largest or smallest values, the first
+        rows first on ties.
+
+        Args:
+            - name: Name of the column.
+            - k: Number of rows.
+            - largest: If false, the smallest values.
+        """
+        assert isinstance(k, int) and k > 0, "The (k) field must be > 0!"
+
+        mins, maxs = self.zones(name=name)
+        values, rows = self._column(name=name), len(self.store)
+        sign = 1 if largest else -1
+        bounds = maxs if largest else mins
+
+        heap = []
+        for n in sorted(range(len(bounds)), key=lambda n: -sign * bounds[n]):
+            if len(heap) == k and sign * bounds[n] < heap[0][0]:
+                break
+            start, end = n * self.block, min((n + 1) * self.block, rows)
+            for i in range(start, end):
+                value = sign * values[i]
+                if len(heap) < k:
+                    heapq.heappush(heap, (value, -i))
+                elif value >= heap[0][0] and (value, -i) > heap[0]:
+                    heapq.heapreplace(heap, (value, -i))
+
+        return [(-i, sign * value) for value, i in sorted(heap, reverse=True)]
@@ -0,0 +1,220 @@
+"""Streaming reliability of the items, Cronbach's alpha of each facet and domain."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import math
+
+from ipipneo.batch import AnswerMatrix, reverse_matrix
+from ipipneo.utility import BIG5_DOMAINS, big5_target, organize_list_json
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+# Domains in the order of the items: the item (j) belongs to the domain (j % 5).
+ITEM_DOMAINS = "NEOAC"
+
+
+class ReliabilityStats:
+    """
+    Sums and cross products of the reversed answers, one matrix per domain.
+
+    The sums are integers, so the statistics are exact for any number of
+    respondents and the merge of shards is a plain sum. The raw answers are not
+    kept, the memory only depends on the number of questions.
+    """
+
+    def __init__(self, question: int) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+
+        self.question: int = question
+        self.count: int = 0
+        self.sums: list = [0] * question
+        size = question // len(ITEM_DOMAINS)
+        self.cross: list = [
+            [[0] * (size - a) for a in range(size)] for _ in ITEM_DOMAINS
+        ]
+
+    def update(self, answers: list) -> None:
+        """
+        Add the reversed answers of an individual.
+
+        Args:
+            - answers: The reversed answers sorted by question, such as the
+                       selected options of (ReverseScored120/300).
+        """
+        if isinstance(answers, dict):
+            answers = organize_list_json(answers=answers)
+        assert (
+            len(answers) == self.question
+        ), f"The (answers) field should be of size {self.question}!"
+
+        self.count += 1
+        self.sums = [x + y for x, y in zip(self.sums, answers)]
+        for d, cross in enumerate(self.cross):
+            x = answers[d :: len(ITEM_DOMAINS)]
+            for a, row in enumerate(cross):
+                xa = x[a]
+                row[:] = [c + xa * xb for c, xb in zip(row, x[a:])]
+
+    def update_matrix(self, matrix: AnswerMatrix) -> None:
+        """
+        Add all the rows of an answer matrix, reversed at once.
+
+        Args:
+            - matrix: The matrix with the answers, before the reverse scoring.
+        """
+        assert (
+            matrix.question == self.question
+        ), f"The (matrix) must have {self.question} questions!"
+
+        reversed = reverse_matrix(matrix=matrix)
+        if numpy is None:
+            for i in range(len(matrix)):
+                self.update(
+                    answers=reversed[i * self.question : (i + 1) * self.question]
+                )
+            return
+
+        data = numpy.frombuffer(reversed, dtype=numpy.uint8).reshape(-1, self.question)
+        data = data.astype(numpy.int64)
+        self.count += len(data)
+        self.sums = [x + int(y) for x, y in zip(self.sums, data.sum(axis=0))]
+        for d, cross in enumerate(self.cross):
+            x = data[:, d :: len(ITEM_DOMAINS)]
+            product = (x.T @ x).tolist()
+            for a, row in enumerate(cross):
+                row[:] = [c + p for c, p in zip(row, product[a][a:])]
+
+    def merge(self, other: "ReliabilityStats") -> "ReliabilityStats":
+        """
+        Add the statistics of another shard or process.
+
+        Args:
+            - other: The statistics to be added.
+        """
+        assert other.question == self.question, "The question types differ!"
+
+        self.count += other.count
+        self.sums = [x + y for x, y in zip(self.sums, other.sums)]
+        for cross, others in zip(self.cross, other.cross):
+            for row, values in zip(cross, others):
+                row[:] = [x + y for x, y in zip(row, values)]
+        return self
+
+    def covariance(self, domain: int) -> list:
+        """
+        Return the sample covariance matrix of the items of a domain.
+
+        Args:
+            - domain: Position of the domain in (ITEM_DOMAINS).
+        """
+        n, cross = self.count, self.cross[domain]
+        sums = self.sums[domain :: len(ITEM_DOMAINS)]
+        size = len(sums)
+
+        matrix = [[0.0] * size for _ in range(size)]
+        for a in range(size):
+            for b in range(a, size):
+                value = (cross[a][b - a] - sums[a] * sums[b] / n) / (n - 1)
+                matrix[a][b] = matrix[b][a] = value
+        return matrix
+
+    def _scale(self, covariance: list, positions: list, domain: int) -> dict:
+        """Alpha of the items at the positions and the statistics of each item."""
+        k = len(positions)
+        variances = [covariance[a][a] for a in positions]
+        totals = [sum(covariance[a][b] for b in positions) for a in positions]
+        total = sum(totals)
+
+        alpha = None
+        if total > 0:
+            alpha = k / (k - 1) * (1 - sum(variances) / total)
+
+        items = []
+        for a, variance, covariances in zip(positions, variances, totals):
+            rest = total - 2 * covariances + variance
+            correlation = None
+            if variance > 0 and rest > 0:
+                correlation = (covariances - variance) / math.sqrt(variance * rest)
+
+            item = domain + a * len(ITEM_DOMAINS)
+            items.append(
+                {
+                    "item": item + 1,
+                    "mean": self.sums[item] / self.count,
+                    "correlation": correlation,
+                }
+            )
+
+        return {"alpha": alpha, "items": items}
+
+    def report(self) -> dict:
+        """
+        Return the Cronbach's alpha of each domain and facet, with the mean and
+        the corrected item-total correlation of each of its items.
+        """
+        assert self.count > 1, "At least 2 individuals are required!"
+
+        domains, facets = {}, {}
+        size = self.question // len(ITEM_DOMAINS)
+        names = dict(BIG5_DOMAINS)
+
+        for d, label in enumerate(ITEM_DOMAINS):
+            covariance = self.covariance(domain=d)
+            domains[names[label]] = self._scale(
+                covariance=covariance, positions=list(range(size)), domain=d
+            )
+            for t, target in enumerate(big5_target(label=label)):
+                facets[target.value] = self._scale(
+                    covariance=covariance, positions=list(range(t, size, 6)), domain=d
+                )
+
+        return {
+            "question": self.question,
+            "count": self.count,
+            "domains": {name: domains[name] for _, name in BIG5_DOMAINS},
+            "facets": {
+                x.value: facets[x.value]
+                for label, _ in BIG5_DOMAINS
+                for x in big5_target(label=label)
+            },
+        }
+
+    def to_dict(self) -> dict:
+        """Serialize the statistics, the output is JSON compatible."""
+        return {
+            "question": self.question,
+            "count": self.count,
+            "sums": self.sums,
+            "cross": self.cross,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "ReliabilityStats":
+        """
+        Load the statistics serialized by (to_dict).
+
+        Args:
+            - data: The serialized statistics.
+        """
+        stats = ReliabilityStats(question=data["question"])
+        stats.count = int(data["count"])
+        stats.sums = [int(x) for x in data["sums"]]
+        stats.cross = [
+            [[int(x) for x in row] for row in cross] for cross in data["cross"]
+        ]
+        return stats
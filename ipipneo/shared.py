@@ -0,0 +1,216 @@
+"""Batch scoring in worker processes through shared memory blocks."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.normset import NormSet
+from ipipneo.store import SEXES
+
+# Number of scores of each row, see (score_names).
+SCORES = 35
+
+# Blocks of a batch: the answers, sex and age of the rows and the outputs.
+BLOCKS = ("answers", "sex", "age", "scores", "levels")
+
+# Status of a slice returned by the workers.
+STATUS_OK = 0
+STATUS_FAILED = 1
+
+# State of the worker processes, set by (_init).
+_state: dict = {}
+
+
+def _init(question: int, norms: NormSet) -> None:
+    _state.clear()
+    _state.update(ipip=IpipNeo(question=question), question=question, norms=norms)
+
+
+def _attach(names: tuple) -> dict:
+    """Return the blocks of a batch, to be closed when the slice is done."""
+    blocks = {}
+    try:
+        for key, name in zip(BLOCKS, names):
+            blocks[key] = shared_memory.SharedMemory(name=name)
+    except BaseException:
+        for block in blocks.values():
+            block.close()
+        raise
+    return blocks
+
+
+def _score_slice(names: tuple, start: int, end: int) -> tuple:
+    """Score the rows [start, end) of a batch in place, return its status and error."""
+    blocks = {}
+    try:
+        blocks, size = _attach(names=names), _state["question"]
+
+        matrix = AnswerMatrix(question=size)
+        matrix.data = bytearray(blocks["answers"].buf[start * size : end * size])
+        matrix.sex = [SEXES[x] for x in blocks["sex"].buf[start:end]]
+        with blocks["age"].buf.cast("h") as ages:
+            matrix.age = array("h", ages[start:end])
+
+        with blocks["scores"].buf.cast("f") as scores:
+            _state["ipip"]._compute_batch_into(
+                matrix=matrix,
+                scores=scores,
+                levels=blocks["levels"].buf,
+                offset=start * SCORES,
+                norms=_state["norms"],
+            )
+    except (KeyboardInterrupt, SystemExit):
+        raise
+    except BaseException as e:
+        return STATUS_FAILED, str(e) or type(e).__name__
+    finally:
+        for block in blocks.values():
+            block.close()
+    return STATUS_OK, None
+
+
+class SharedBatch:
+    """
+    Scores answer matrices in a pool of processes without pickling the rows.
+
+    The answers, sex and age of a matrix and the output matrices of the 35
+    percentiles and levels are placed in shared memory blocks. Each worker
+    attaches the blocks for a slice of rows, writes its percentiles and levels
+    straight into the output blocks and closes them, returning only a status
+    code with the error message of a failed slice, so the cost of the fan-out
+    does not grow with the batch and no worker keeps a finished batch mapped.
+    """
+
+    def __init__(
+        self,
+        question: int,
+        workers: int = None,
+        slice_rows: int = 1024,
+        norms: NormSet = None,
+    ) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - question: Question type, 120 or 300.
+            - workers: Number of processes, by default the number of CPUs. With 1
+                       the slices are scored in this process.
+            - slice_rows: Number of rows of each slice.
+            - norms: Norm set of the scoring, by default Johnson's norms.
+        """
+        assert question in (120, 300), "The (question) field must be 120 or 300!"
+        assert workers is None or workers > 0, "The (workers) field must be > 0!"
+        assert (
+            isinstance(slice_rows, int) and slice_rows > 0
+        ), "The (slice_rows) field must be > 0!"
+
+        self.question: int = question
+        self.workers: int = workers or os.cpu_count() or 1
+        self.slice_rows: int = slice_rows
+        self.norms: NormSet = norms
+        self._executor: ProcessPoolExecutor = None
+
+    def __enter__(self) -> "SharedBatch":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _map(self, names: tuple, slices: list) -> list:
+        if self.workers == 1:
+            _init(question=self.question, norms=self.norms)
+            try:
+                return [_score_slice(names, start, end) for start, end in slices]
+            finally:
+                _state.clear()
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init,
+                initargs=(self.question, self.norms),
+            )
+        return list(
+            self._executor.map(
+                _score_slice,
+                *zip(*[(names, start, end) for start, end in slices]),
+            )
+        )
+
+    def score(self, matrix: AnswerMatrix) -> tuple:
+        """
+        Return the 35 percentiles (float32) and level codes (positions of LEVELS)
+        of each row, row by row in the order of (score_names).
+
+        Args:
+            - matrix: Matrix with the answers sorted by question.
+        """
+        assert isinstance(matrix, AnswerMatrix), "matrix must be an AnswerMatrix"
+        assert (
+            matrix.question == self.question
+        ), f"The matrix must have {self.question} questions!"
+        matrix.validate()
+
+        rows = len(matrix)
+        if rows == 0:
+            return array("f"), b""
+
+        sizes = {
+            "answers": len(matrix.data),
+            "sex": rows,
+            "age": rows * matrix.age.itemsize,
+            "scores": rows * SCORES * array("f").itemsize,
+            "levels": rows * SCORES,
+        }
+        blocks = {}
+        try:
+            for key in BLOCKS:
+                blocks[key] = shared_memory.SharedMemory(create=True, size=sizes[key])
+            blocks["answers"].buf[: sizes["answers"]] = matrix.data
+            blocks["sex"].buf[:rows] = bytes(SEXES.index(x) for x in matrix.sex)
+            blocks["age"].buf[: sizes["age"]] = matrix.age.tobytes()
+
+            slices = [
+                (start, min(start + self.slice_rows, rows))
+                for start in range(0, rows, self.slice_rows)
+            ]
+            status = self._map(
+                names=tuple(blocks[x].name for x in BLOCKS), slices=slices
+            )
+            failed = [
+                (x, error)
+                for x, (code, error) in zip(slices, status)
+                if code != STATUS_OK
+            ]
+            if failed:
+                ranges = ", ".join(str(x) for x, _ in failed)
+                raise BaseException(
+                    f"The rows {ranges} could not be scored: {failed[0][1]}"
+                )
+
+            scores = array("f")
+            scores.frombytes(blocks["scores"].buf[: sizes["scores"]])
+            levels = bytes(blocks["levels"].buf[: sizes["levels"]])
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+        return scores, levels
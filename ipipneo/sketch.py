@@ -0,0 +1,359 @@
+"""Mergeable quantile sketches of the scores of each cohort, with bounded memory."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import math
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+
+from ipipneo.norm import Norm
+from ipipneo.utility import result_scores, score_names
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+
+class KllSketch:
+    """
+    Quantile sketch of Karnin, Lang and Liberty (KLL).
+
+    The values are kept in levels, the items of the level (h) weigh 2^h. When a
+    level is full it is sorted and half of it, the odd or the even positions, is
+    moved to the next level. The memory is about 3k values for any number of
+    updates and the rank error is about 1.7/k.
+    """
+
+    def __init__(self, k: int = 200, seed: int = None) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - k: Size of the top level, the accuracy of the sketch.
+            - seed: Seed of the random choice of the compactions.
+        """
+        assert isinstance(k, int) and k >= 8, "The (k) field must be >= 8!"
+
+        self.k: int = k
+        self.count: int = 0
+        self.levels: list = [array("d")]
+        self._random = random.Random(seed)
+        self._view: tuple = None
+
+    def __len__(self) -> int:
+        """Number of values kept."""
+        return sum(len(x) for x in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) >= self._capacity(level=h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(array("d"))
+                items = sorted(self.levels[h])
+                keep = array("d", [items.pop()] if len(items) % 2 else [])
+                self.levels[h + 1].extend(items[self._random.randint(0, 1) :: 2])
+                self.levels[h] = keep
+            h += 1
+
+    def update(self, value: float) -> None:
+        """
+        Add a value.
+
+        Args:
+            - value: The value.
+        """
+        self.levels[0].append(value)
+        self.count += 1
+        self._view = None
+
+        if len(self.levels[0]) >= self._capacity(level=0):
+            self._compress()
+
+    def merge(self, other: "KllSketch") -> "KllSketch":
+        """
+        Add the values of another sketch, such as another process or shard.
+
+        Args:
+            - other: The sketch to be added.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(array("d"))
+        for mine, level in zip(self.levels, other.levels):
+            mine.extend(level)
+
+        self.count += other.count
+        self._view = None
+        self._compress()
+
+        return self
+
+    def view(self) -> tuple:
+        """Return the sorted values and the cumulative weights, built on demand."""
+        if self._view is not None:
+            return self._view
+
+        if numpy is not None:
+            values = numpy.concatenate(
+                [numpy.frombuffer(x, dtype=numpy.float64) for x in self.levels]
+            )
+            weights = numpy.concatenate(
+                [
+                    numpy.full(len(x), 2**h, dtype=numpy.int64)
+                    for h, x in enumerate(self.levels)
+                ]
+            )
+            order = numpy.argsort(values, kind="stable")
+            self._view = (values[order], numpy.cumsum(weights[order]))
+            return self._view
+
+        items = sorted(
+            (x, 2**h) for h, level in enumerate(self.levels) for x in level
+        )
+        values, cumulative, total = array("d"), [], 0
+        for x, weight in items:
+            values.append(x)
+            total += weight
+            cumulative.append(total)
+        self._view = (values, cumulative)
+        return self._view
+
+    def rank(self, value: float) -> float:
+        """
+        Return the percentile (0 to 100) of a value, ties count as half.
+
+        Args:
+            - value: The value.
+        """
+        if self.count == 0:
+            return None
+
+        values, cumulative = self.view()
+        low, high = bisect_left(values, value), bisect_right(values, value)
+        below = cumulative[low - 1] if low else 0
+        equal = (cumulative[high - 1] if high else 0) - below
+
+        return 100.0 * (below + equal / 2) / cumulative[-1]
+
+    def rank_batch(self, values: list) -> list:
+        """
+        Return the percentiles of many values, with (searchsorted) when NumPy exists.
+
+        Args:
+            - values: The values.
+        """
+        if numpy is None or self.count == 0:
+            return [self.rank(value=x) for x in values]
+
+        ordered, cumulative = self.view()
+        x = numpy.asarray(values, dtype=numpy.float64)
+        low = numpy.searchsorted(ordered, x, side="left")
+        high = numpy.searchsorted(ordered, x, side="right")
+        padded = numpy.concatenate(([0], cumulative))
+        below, upto = padded[low], padded[high]
+
+        return (100.0 * (below + (upto - below) / 2) / cumulative[-1]).tolist()
+
+    def quantile(self, q: float) -> float:
+        """
+        Return the value of a quantile.
+
+        Args:
+            - q: The quantile, between 0 and 1.
+        """
+        assert 0 <= q <= 1, "The (q) field must be between 0 and 1!"
+
+        if self.count == 0:
+            return None
+
+        values, cumulative = self.view()
+        index = bisect_left(cumulative, q * cumulative[-1])
+        return float(values[min(index, len(values) - 1)])
+
+    def to_dict(self) -> dict:
+        """Serialize the sketch, the output is JSON compatible."""
+        return {
+            "k": self.k,
+            "count": self.count,
+            "levels": [x.tolist() for x in self.levels],
+        }
+
+    @staticmethod
+    def from_dict(data: dict, seed: int = None) -> "KllSketch":
+        """
+        Load a sketch serialized by (to_dict).
+
+        Args:
+            - data: The serialized sketch.
+            - seed: Seed of the random choice of the compactions.
+        """
+        sketch = KllSketch(k=data["k"], seed=seed)
+        sketch.count = int(data["count"])
+        sketch.levels = [array("d", x) for x in data["levels"]] or [array("d")]
+        return sketch
+
+
+class CohortSketches:
+    """
+    Sketches of the 35 scores of each cohort, fed with the results of compute.
+
+    By default the cohort of a result is its (question, sex, norm id), any other
+    hashable key can be used, such as the name of a company or a campaign.
+    """
+
+    def __init__(self, k: int = 200, seed: int = None) -> None:
+        """
+        Initialize the class.
+
+        Args:
+            - k: Size of the top level of each sketch, see (KllSketch).
+            - seed: Seed of the random choice of the compactions.
+        """
+        assert isinstance(k, int) and k >= 8, "The (k) field must be >= 8!"
+
+        self.k: int = k
+        self.cohorts: dict = {}
+        self._random = random.Random(seed)
+
+    def _sketches(self, cohort: object) -> list:
+        sketches = self.cohorts.get(cohort)
+        if sketches is None:
+            sketches = self.cohorts[cohort] = [
+                KllSketch(k=self.k, seed=self._random.random())
+                for _ in range(len(score_names()))
+            ]
+        return sketches
+
+    def add(self, cohort: object, values: list) -> None:
+        """
+        Add the 35 scores of an individual to a cohort.
+
+        Args:
+            - cohort: Key of the cohort.
+            - values: The 35 scores, in the order of (score_names).
+        """
+        assert len(values) == len(score_names()), "There must be 35 values!"
+
+        for sketch, value in zip(self._sketches(cohort=cohort), values):
+            sketch.update(value=value)
+
+    def add_result(self, result: dict, cohort: object = None) -> None:
+        """
+        Add a result of the compute method.
+
+        Args:
+            - result: The dictionary generated by the compute method.
+            - cohort: Key of the cohort, by default (question, sex, norm id).
+        """
+        self.add(
+            cohort=cohort if cohort is not None else result_cohort(result=result),
+            values=result_scores(result=result),
+        )
+
+    def count(self, cohort: object) -> int:
+        """
+        Return the number of individuals of a cohort.
+
+        Args:
+            - cohort: Key of the cohort.
+        """
+        sketches = self.cohorts.get(cohort)
+        return sketches[0].count if sketches else 0
+
+    def rank(self, cohort: object, values: list) -> dict:
+        """
+        Return the percentile of each of the 35 scores within a cohort.
+
+        Args:
+            - cohort: Key of the cohort.
+            - values: The 35 scores, in the order of (score_names).
+        """
+        sketches = self.cohorts.get(cohort)
+        if sketches is None:
+            raise BaseException(f"The cohort {cohort} was not found!")
+
+        return {
+            name: sketch.rank(value=value)
+            for name, sketch, value in zip(score_names(), sketches, values)
+        }
+
+    def rank_result(self, result: dict, cohort: object = None) -> dict:
+        """
+        Return the percentile of each score of a result within its cohort.
+
+        Args:
+            - result: The dictionary generated by the compute method.
+            - cohort: Key of the cohort, by default (question, sex, norm id).
+        """
+        return self.rank(
+            cohort=cohort if cohort is not None else result_cohort(result=result),
+            values=result_scores(result=result),
+        )
+
+    def merge(self, other: "CohortSketches") -> "CohortSketches":
+        """
+        Add the cohorts of another instance, such as another shard or process.
+
+        Args:
+            - other: The sketches to be added.
+        """
+        for cohort, sketches in other.cohorts.items():
+            for mine, sketch in zip(self._sketches(cohort=cohort), sketches):
+                mine.merge(other=sketch)
+        return self
+
+    def to_dict(self) -> dict:
+        """Serialize the sketches, the output is JSON compatible."""
+        return {
+            "k": self.k,
+            "cohorts": [
+                {
+                    "cohort": list(cohort) if isinstance(cohort, tuple) else cohort,
+                    "sketches": [x.to_dict() for x in sketches],
+                }
+                for cohort, sketches in self.cohorts.items()
+            ],
+        }
+
+    @staticmethod
+    def from_dict(data: dict, seed: int = None) -> "CohortSketches":
+        """
+        Load the sketches serialized by (to_dict).
+
+        Args:
+            - data: The serialized sketches.
+            - seed: Seed of the random choice of the compactions.
+        """
+        cohorts = CohortSketches(k=data["k"], seed=seed)
+        for item in data.get("cohorts", []):
+            cohort = item["cohort"]
+            cohort = tuple(cohort) if isinstance(cohort, list) else cohort
+            cohorts.cohorts[cohort] = [
+                KllSketch.from_dict(data=x, seed=cohorts._random.random())
+                for x in item["sketches"]
+            ]
+        return cohorts
+
+
+def result_cohort(result: dict) -> tuple:
+    """
+    Return the (question, sex, norm id) of a result of the compute method.
+
+    Args:
+        - result: The dictionary generated by the compute method.
+    """
+    person, question = result["person"], result["question"]
+    norm, _ = Norm.group(sex=person["sex"], age=person["age"], nquestion=question)
+    return question, person["sex"], norm
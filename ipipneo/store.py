@@ -0,0 +1,271 @@
+"""Append-only columnar store of results, one memory mapped file per column."""
+
+__author__ = "Ederson Corbari"
+__email__ = "e@NeuroQuest.ai"
+__copyright__ = "Copyright NeuroQuest 2022-2024, Big 5 Personality Traits"
+__credits__ = ["John A. Johnson", "Dhiru Kholia"]
+__license__ = "MIT"
+__version__ = "1.12.1"
+__status__ = "production"
+
+import json
+import mmap
+import os
+import time
+import uuid
+from array import array
+from datetime import datetime
+
+from ipipneo.norm import Norm
+from ipipneo.utility import result_levels, result_scores, score_names
+
+try:
+    import numpy
+except ModuleNotFoundError:
+    numpy = None
+
+# Codes of the levels and of the sex, the position is the stored byte.
+LEVELS = ("low", "average", "high")
+SEXES = ("M", "F")
+
+# Size of the binary (UUID) of the column (id).
+ID_SIZE = 16
+
+
+def store_columns() -> list:
+    """
+    Return the (name, typecode) of the columns, (id) holds 16 bytes per row.
+
+    The 35 scores are followed by their levels, named as the score with the
+    suffix (.level), such as (openness.level).
+    """
+    return (
+        [
+            ("id", "s"),
+            ("timestamp", "d"),
+            ("question", "H"),
+            ("sex", "B"),
+            ("age", "B"),
+            ("norm", "B"),
+        ]
+        + [(x, "f") for x in score_names()]
+        + [(f"{x}.level", "B") for x in score_names()]
+    )
+
+
+class ResultStore:
+    """
+    Results stored column by column in a directory.
+
+    The rows are appended in memory and written to the end of each column by
+    (flush). The columns are read through memory mapped files, a query only
+    touches the columns of its filters and of its projection.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Open a store, created when the directory does not exist.
+
+        Args:
+            - path: The directory of the store.
+        """
+        self.path: str = path
+        self.columns: dict = dict(store_columns())
+        self._pending: dict = {}
+        self._maps: dict = {}
+
+        schema = os.path.join(path, "schema.json")
+        if not os.path.exists(schema):
+            os.makedirs(path, exist_ok=True)
+            with open(schema, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "columns": store_columns()}, f)
+            for name in self.columns:
+                open(self._file(name=name), "ab").close()
+        else:
+            with open(schema, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != 1 or dict(data["columns"]) != self.columns:
+                raise BaseException(f"The store {path} has another schema!")
+
+        self._clear()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.col")
+
+    def _clear(self) -> None:
+        self._pending = {
+            name: bytearray() if code == "s" else array(code)
+            for name, code in self.columns.items()
+        }
+
+    def __len__(self) -> int:
+        """Number of rows written, an interrupted flush only counts full rows."""
+        return min(
+            os.path.getsize(self._file(name=name))
+            // (ID_SIZE if code == "s" else array(code).itemsize)
+            for name, code in self.columns.items()
+        )
+
+    def append(self, result: dict) -> None:
+        """
+        Add a result of the compute method, written by (flush).
+
+        Args:
+            - result: The dictionary generated by the compute method.
+        """
+        person, question = result["person"], result["question"]
+        norm, _ = Norm.group(sex=person["sex"], age=person["age"], nquestion=question)
+        timestamp = time.time()
+        if result.get("date"):
+            timestamp = datetime.strptime(
+                result["date"], "%Y-%m-%d %H:%M:%S"
+            ).timestamp()
+
+        pending = self._pending
+        pending["id"] += uuid.UUID(result["id"]).bytes
+        pending["timestamp"].append(timestamp)
+        pending["question"].append(question)
+        pending["sex"].append(SEXES.index(person["sex"]))
+        pending["age"].append(person["age"])
+        pending["norm"].append(norm)
+        for name, score, level in zip(
+            score_names(), result_scores(result=result), result_levels(result=result)
+        ):
+            pending[name].append(score)
+            pending[f"{name}.level"].append(LEVELS.index(level))
+
+    def extend(self, results: list) -> None:
+        """
+        Add many results and write them.
+
+        Args:
+            - results: The dictionaries generated by the compute method.
+        """
+        for result in results:
+            self.append(result=result)
+        self.flush()
+
+    def flush(self) -> None:
+        """Write the pending rows to the end of each column."""
+        if not self._pending["id"]:
+            return
+
+        self.close()
+        rows = len(self)
+        for name, code in self.columns.items():
+            with open(self._file(name=name), "r+b") as f:
+                f.truncate(rows * (ID_SIZE if code == "s" else array(code).itemsize))
+                f.seek(0, os.SEEK_END)
+                f.write(self._pending[name])
+        self._clear()
+
+    def close(self) -> None:
+        """Release the memory mapped files."""
+        for view, buffer in self._maps.values():
+            view.release()
+            buffer.close()
+        self._maps = {}
+
+    def column(self, name: str) -> memoryview:
+        """
+        Return the values of a column, read on demand from a memory mapped file.
+
+        Args:
+            - name: Name of the column, see (store_columns).
+        """
+        if name not in self.columns:
+            raise BaseException(f"The column {name} was not found!")
+
+        if name not in self._maps:
+            code, rows = self.columns[name], len(self)
+            if rows == 0:
+                return memoryview(b"" if code == "s" else array(code))
+            with open(self._file(name=name), "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            size = ID_SIZE if code == "s" else array(code).itemsize
+            view = memoryview(buffer)[: rows * size]
+            self._maps[name] = (view if code == "s" else view.cast(code), buffer)
+
+        return self._maps[name][0]
+
+    def _bounds(self, name: str, value: object) -> tuple:
+        if name == "sex":
+            value = SEXES.index(value)
+        elif name.endswith(".level"):
+            value = LEVELS.index(value)
+        return tuple(value) if isinstance(value, (tuple, list)) else (value, value)
+
+    def filter(self, where: dict = None) -> list:
+        """
+        Return the positions of the rows that match all the filters.
+
+        Args:
+            - where: Dictionary of column name to a (low, high) range, inclusive,
+                     or to a single value, such as {"sex": "F", "age": (20, 40)}.
+        """
+        self.flush()
+        rows = len(self)
+        where = where or {}
+        for name in where:
+            if name == "id" or name not in self.columns:
+                raise BaseException(f"The column {name} can not be filtered!")
+
+        if numpy is not None:
+            mask = numpy.ones(rows, dtype=bool)
+            for name, value in where.items():
+                low, high = self._bounds(name=name, value=value)
+                values = numpy.frombuffer(
+                    self.column(name=name), dtype=self.columns[name]
+                )
+                mask &= (values >= low) & (values <= high)
+            return numpy.flatnonzero(mask).tolist()
+
+        positions = range(rows)
+        for name, value in where.items():
+            low, high = self._bounds(name=name, value=value)
+            values = self.column(name=name)
+            positions = [i for i in positions if low <= values[i] <= high]
+        return list(positions)
+
+    def select(
+        self, columns: list = None, where: dict = None, positions: iter = None
+    ) -> dict:
+        """
+        Return the values of some columns of the rows that match the filters.
+
+        Args:
+            - columns: Names of the columns, all by default.
+            - where: The filters, see (filter).
+            - positions: The rows, such as a (Bitmap), instead of the filters.
+        """
+        columns = columns or list(self.columns)
+        if positions is None:
+            positions = self.filter(where=where)
+        else:
+            self.flush()
+            positions = list(positions)
+
+        selected = {}
+        for name in columns:
+            values, code = self.column(name=name), self.columns[name]
+            if code == "s":
+                selected[name] = [
+                    str(uuid.UUID(bytes=bytes(values[i * ID_SIZE : (i + 1) * ID_SIZE])))
+                    for i in positions
+                ]
+            elif name == "sex":
+                selected[name] = [SEXES[values[i]] for i in positions]
+            elif name.endswith(".level"):
+                selected[name] = [LEVELS[values[i]] for i in positions]
+            else:
+                selected[name] = [values[i] for i in positions]
+        return selected
+
+    def count(self, where: dict = None) -> int:
+        """
+        Return the number of rows that match the filters.
+
+        Args:
+            - where: The filters, see (filter).
+        """
+        return len(self.filter(where=where))
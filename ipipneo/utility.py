@@ -14,6 +14,15 @@ from enum import Enum
 from ipipneo.model import (Big5Agreeableness, Big5Conscientiousness,
                            Big5Extraversion, Big5Neuroticism, Big5Openness)
 
+# The Big-Five in the order they appear in the results.
+BIG5_DOMAINS = (
+    ("O", "openness"),
+    ("C", "conscientiousness"),
+    ("E", "extraversion"),
+    ("A", "agreeableness"),
+    ("N", "neuroticism"),
+)
+
 
 def raise_if_sex_is_invalid(sex: str) -> bool | AssertionError | BaseException:
     """
@@ -214,6 +223,70 @@ def create_big5_dict(label: str, big5: float, x: list, y: list) -> dict:
     }
 
 
+def score_names() -> list:
+    """Names of the 5 Big-Five (O.C.E.A.N) followed by the 30 facets, in this order."""
+    return [x for _, x in BIG5_DOMAINS] + [
+        x.value for label, _ in BIG5_DOMAINS for x in big5_target(label=label)
+    ]
+
+
+def result_scores(result: dict) -> list:
+    """
+    Return the 35 percentiles of a result, in the order of (score_names).
+
+    Args:
+        - result: The dictionary generated by the compute method.
+    """
+    personalities = result["person"]["result"]["personalities"]
+
+    domains, facets = [], []
+    for (label, name), personality in zip(BIG5_DOMAINS, personalities):
+        big5 = personality[name]
+        domains.append(big5[label])
+        facets.extend(
+            trait[x.value] for trait, x in zip(big5["traits"], big5_target(label))
+        )
+
+    return domains + facets
+
+
+def result_levels(result: dict) -> list:
+    """
+    Return the 35 levels (low, average, high) of a result, see (score_names).
+
+    Args:
+        - result: The dictionary generated by the compute method.
+    """
+    personalities = result["person"]["result"]["personalities"]
+
+    domains, facets = [], []
+    for (_, name), personality in zip(BIG5_DOMAINS, personalities):
+        big5 = personality[name]
+        domains.append(big5["score"])
+        facets.extend(trait["score"] for trait in big5["traits"])
+
+    return domains + facets
+
+
+def copy_personalities(personalities: list) -> list:
+    """
+    Return a copy of the personalities of a result, faster than a deep copy.
+
+    Args:
+        - personalities: The Big-Five of a result, each one with its facets.
+    """
+    return [
+        {
+            name: {
+                **big5,
+                "traits": [dict(trait) for trait in big5["traits"]],
+            }
+            for name, big5 in personality.items()
+        }
+        for personality in personalities
+    ]
+
+
 def add_dict_footer() -> dict:
     return {
         "library": "five-factor-e",
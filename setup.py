@@ -26,7 +26,7 @@ setup(
     python_requires=">=3.10",
     include_package_data=True,
     install_requires=[],
-    extras_require={"quiz": ["plotext"]},
+    extras_require={"quiz": ["plotext"], "fast": ["numpy"]},
     entry_points={
         "console_scripts": [
             "ipipneo-quiz = ipipneo.quiz:main",
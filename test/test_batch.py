@@ -0,0 +1,216 @@
+"""Unit tests for Batch."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from ipipneo.batch import AnswerMatrix, read_csv, reverse_matrix, unique_rows
+from ipipneo.benchmark import sample_answers
+from ipipneo.instrument import Recorder
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.reverse import ReverseScored120, ReverseScored300
+from ipipneo.utility import organize_list_json
+
+
+def load_mock_answers(name: str) -> dict:
+    with open(f"test/mock/{name}") as f:
+        data = json.load(f)
+    return data
+
+
+def write_csv(path: str, question: int, rows: list, delimiter: str = ",") -> None:
+    with open(path, "w") as f:
+        header = ["id", "sex", "age"] + [f"q{i}" for i in range(1, question + 1)]
+        f.write(delimiter.join(header) + "\n")
+        for i, (sex, age, answers) in enumerate(rows):
+            f.write(delimiter.join([str(i), sex, str(age)] + list(map(str, answers))))
+            f.write("\n")
+
+
+class TestBatch(unittest.TestCase):
+    def test_answer_matrix(self) -> None:
+        with self.assertRaises(ValueError):
+            AnswerMatrix(question=100)
+
+        matrix = AnswerMatrix(question=120)
+        self.assertEqual(len(matrix), 0)
+        self.assertTrue(matrix.validate())
+
+        with self.assertRaises(AssertionError):
+            matrix.append(sex="M", age=40, answers=[1, 2, 3])
+
+        answers = organize_list_json(answers=load_mock_answers("answers-test-1.json"))
+        matrix.append(sex="M", age=40, answers=answers)
+        matrix.append(sex="F", age=25, answers=[3] * 120)
+        self.assertEqual(len(matrix), 2)
+        self.assertEqual(list(matrix.row(index=0)), answers)
+        self.assertEqual(list(matrix.row(index=1)), [3] * 120)
+        self.assertTrue(matrix.validate())
+
+    def test_answer_matrix_validate(self) -> None:
+        matrix = AnswerMatrix(question=120)
+        matrix.append(sex="M", age=40, answers=[3] * 120)
+        matrix.append(sex="M", age=40, answers=[3] * 119 + [6])
+
+        with self.assertRaises(BaseException) as e:
+            matrix.validate()
+        self.assertEqual(
+            str(e.exception),
+            "Invalid answers in row 1: You cannot have answers with a number greater than 5!",
+        )
+
+        matrix = AnswerMatrix(question=120)
+        matrix.append(sex="M", age=40, answers=[0] + [3] * 119)
+        with self.assertRaises(BaseException) as e:
+            matrix.validate()
+        self.assertEqual(
+            str(e.exception),
+            "Invalid answers in row 0: It cannot contain zeros in the answer list!",
+        )
+
+        matrix = AnswerMatrix(question=120)
+        matrix.append(sex="m", age=40, answers=[3] * 120)
+        with self.assertRaises(AssertionError):
+            matrix.validate()
+
+        matrix = AnswerMatrix(question=120)
+        matrix.append(sex="F", age=111, answers=[3] * 120)
+        with self.assertRaises(AssertionError):
+            matrix.validate()
+
+    def test_reverse_matrix(self) -> None:
+        for question, name, reverse in [
+            (120, "answers-test-1.json", ReverseScored120),
+            (300, "answers-test-4.json", ReverseScored300),
+        ]:
+            answers = load_mock_answers(name)
+            matrix = AnswerMatrix(question=question)
+            matrix.append(sex="M", age=40, answers=organize_list_json(answers=answers))
+            matrix.append(sex="F", age=30, answers=organize_list_json(answers=answers))
+
+            expected = organize_list_json(answers=reverse(answers=answers))
+            self.assertEqual(list(reverse_matrix(matrix=matrix)), expected * 2)
+
+    def test_compute_batch(self) -> None:
+        for question, name in [
+            (120, "answers-test-1.json"),
+            (300, "answers-test-4.json"),
+        ]:
+            answers = load_mock_answers(name)
+            ipip = IpipNeo(question=question)
+
+            matrix = AnswerMatrix(question=question)
+            matrix.append(sex="M", age=40, answers=organize_list_json(answers=answers))
+            matrix.append(sex="F", age=18, answers=organize_list_json(answers=answers))
+
+            results = ipip.compute_batch(matrix=matrix)
+            self.assertEqual(len(results), 2)
+
+            for result, (sex, age) in zip(results, [("M", 40), ("F", 18)]):
+                expected = ipip.compute(sex=sex, age=age, answers=answers)
+                self.assertEqual(result.get("person"), expected.get("person"))
+                self.assertEqual(result.get("question"), question)
+
+        with self.assertRaises(AssertionError):
+            IpipNeo(question=300).compute_batch(matrix=AnswerMatrix(question=120))
+
+        with self.assertRaises(AssertionError):
+            IpipNeo(question=120, test=True).compute_batch(
+                matrix=AnswerMatrix(question=120)
+            )
+
+    def test_compute_batch_dedup(self) -> None:
+        class DedupRecorder(Recorder):
+            batches = []
+
+            def deduplicated(self, rows: int, unique: int) -> None:
+                self.batches.append((rows, unique))
+
+        rows = [("M", 30, 0), ("M", 35, 0), ("F", 30, 0), ("M", 50, 0), ("M", 30, 1)]
+        matrix = AnswerMatrix(question=120)
+        for sex, age, seed in rows + rows[:2]:
+            answers = organize_list_json(sample_answers(question=120, seed=seed))
+            matrix.append(sex=sex, age=age, answers=answers)
+
+        first, inverse = unique_rows(matrix=matrix, groups=[1, 1, 5, 2, 1, 1, 1])
+        self.assertEqual(first, [0, 2, 3, 4])
+        self.assertEqual(inverse, [0, 0, 1, 2, 3, 0, 0])
+        self.assertEqual(unique_rows(matrix=matrix)[0], [0, 1, 2, 3, 4])
+
+        ipip = IpipNeo(question=120)
+        ipip.set_recorder(recorder=DedupRecorder())
+        expected = ipip.compute_batch(matrix=matrix)
+        self.assertIsNone(ipip.get_last_dedup())
+        results = ipip.compute_batch(matrix=matrix, dedup=True)
+        self.assertEqual(DedupRecorder.batches, [(7, 4)])
+        self.assertEqual(
+            ipip.get_last_dedup(), {"rows": 7, "unique": 4, "ratio": 1 - 4 / 7}
+        )
+
+        self.assertEqual(len(results), len(expected))
+        for result, other in zip(results, expected):
+            self.assertEqual(result["person"], other["person"])
+        self.assertEqual(len({x["id"] for x in results}), 7)
+
+        results[5]["person"]["result"]["personalities"][0]["openness"]["O"] = -1
+        self.assertEqual(results[0]["person"], expected[0]["person"])
+
+    def test_read_csv(self) -> None:
+        answers = organize_list_json(answers=load_mock_answers("answers-test-1.json"))
+        rows = [("M", 40, answers), ("F", 25, [3] * 120), ("F", 70, answers)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.csv")
+            write_csv(path=path, question=120, rows=rows)
+
+            chunks = list(read_csv(path=path, question=120, chunk_size=2))
+            self.assertEqual([len(x) for x in chunks], [2, 1])
+            self.assertEqual(chunks[0].sex, ["M", "F"])
+            self.assertEqual(list(chunks[0].age), [40, 25])
+            self.assertEqual(list(chunks[1].row(index=0)), answers)
+
+            results = [
+                x for y in IpipNeo(question=120).compute_csv(path=path) for x in y
+            ]
+            self.assertEqual(len(results), 3)
+            self.assertEqual(
+                results[0].get("person"),
+                IpipNeo(question=120)
+                .compute(
+                    sex="M", age=40, answers=load_mock_answers("answers-test-1.json")
+                )
+                .get("person"),
+            )
+
+            path = os.path.join(tmp, "answers.tsv")
+            write_csv(path=path, question=120, rows=rows, delimiter="\t")
+            self.assertEqual(len(list(read_csv(path=path, question=120))[0]), 3)
+
+            with self.assertRaises(BaseException) as e:
+                list(read_csv(path=path, question=300))
+            self.assertEqual(
+                str(e.exception),
+                "The columns ['q121', 'q122', 'q123', 'q124', 'q125'] were not found!",
+            )
+
+            path = os.path.join(tmp, "invalid.csv")
+            write_csv(path=path, question=120, rows=[("M", 40, [3] * 119 + [256])])
+            with self.assertRaises(BaseException):
+                list(read_csv(path=path, question=120))
+
+            write_csv(
+                path=path,
+                question=120,
+                rows=[("M", 40, [3] * 120), ("M", 40, [3] * 119 + [7])],
+            )
+            with open(path, "rb") as f:
+                f.readline()
+                offset = f.tell() + len(f.readline())
+            with self.assertRaises(BaseException) as e:
+                list(read_csv(path=path, question=120))
+            self.assertEqual(
+                str(e.exception),
+                f"Invalid row at byte {offset}: "
+                "You cannot have answers with a number greater than 5!",
+            )
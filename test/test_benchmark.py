@@ -0,0 +1,83 @@
+"""Unit tests for Benchmark."""
+
+import tracemalloc
+import unittest
+
+from ipipneo.benchmark import (MemoryMeter, assert_memory_budget,
+                               memory_report, sample_answers)
+from ipipneo.instrument import STAGES
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_sample_answers(self) -> None:
+        answers = sample_answers(question=300, seed=1)
+        self.assertEqual(len(answers.get("answers")), 300)
+        self.assertEqual(answers, sample_answers(question=300, seed=1))
+        self.assertNotEqual(answers, sample_answers(question=300, seed=2))
+        self.assertTrue(all(1 <= x["id_select"] <= 5 for x in answers.get("answers")))
+
+    def test_memory_meter(self) -> None:
+        meter = MemoryMeter()
+        tracemalloc.start()
+        try:
+            kept = meter.measure("alloc", lambda: bytearray(100000))
+            meter.measure("temp", lambda: len(bytearray(100000)))
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(kept), 100000)
+        self.assertTrue(meter.stages["alloc"][1] >= 100000)
+        self.assertTrue(meter.stages["temp"][0] >= 100000)
+        self.assertTrue(meter.stages["temp"][1] < 1000)
+
+        tracemalloc.start()
+        try:
+            meter.stage("first")
+            kept = bytearray(100000)
+            meter.stage("second")
+            del kept
+            meter.close()
+            meter.close()
+        finally:
+            tracemalloc.stop()
+
+        self.assertTrue(meter.stages["first"][1] >= 100000)
+        self.assertTrue(meter.stages["second"][1] <= -100000)
+
+    def test_memory_report(self) -> None:
+        reports = {x: memory_report(question=x, repeat=5) for x in (120, 300)}
+        self.assertFalse(tracemalloc.is_tracing())
+
+        for question, report in reports.items():
+            stages = report.get("stages")
+            self.assertEqual(report.get("question"), question)
+            self.assertEqual(
+                list(stages), [x for x in STAGES if x != "cache"] + ["batch"]
+            )
+            self.assertTrue(all(x["peak"] >= x["retained"] for x in stages.values()))
+            self.assertTrue(stages["compute"]["peak"] >= stages["deepcopy"]["peak"])
+            self.assertTrue(stages["batch"]["peak"] < stages["compute"]["peak"])
+
+        self.assertTrue(
+            reports[300]["stages"]["deepcopy"]["peak"]
+            > reports[120]["stages"]["deepcopy"]["peak"]
+        )
+
+        with self.assertRaises(AssertionError):
+            memory_report(question=120, repeat=0)
+
+    def test_memory_budget(self) -> None:
+        report = {
+            "question": 120,
+            "stages": {"deepcopy": {"peak": 100, "retained": 50}},
+        }
+        self.assertTrue(
+            assert_memory_budget(report=report, budgets={"deepcopy": (100, 50)})
+        )
+        self.assertTrue(assert_memory_budget(report=report, budgets={}))
+
+        with self.assertRaises(AssertionError) as e:
+            assert_memory_budget(report=report, budgets={"deepcopy": (99, 50)})
+        self.assertEqual(
+            str(e.exception), "Memory budget exceeded: deepcopy: peak 100 > 99"
+        )
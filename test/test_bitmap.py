@@ -0,0 +1,122 @@
+"""Unit tests for Bitmap."""
+
+import random
+import tempfile
+import unittest
+from array import array
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.bitmap import ARRAY_LIMIT, CHUNK, Bitmap, LevelIndex, container_of
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.store import LEVELS, ResultStore
+from ipipneo.utility import result_levels
+
+
+class TestBitmap(unittest.TestCase):
+    def test_operations(self) -> None:
+        values = random.Random(1)
+        size = 3 * CHUNK + 100
+        codes = bytes(values.choice((0, 0, 0, 1)) for _ in range(size))
+        sparse = bytes(1 if values.random() < 0.01 else 0 for _ in range(size))
+
+        def build(data: bytes) -> Bitmap:
+            containers = {
+                i // CHUNK: container_of(codes=data[i : i + CHUNK], code=1)
+                for i in range(0, size, CHUNK)
+            }
+            return Bitmap(containers={k: v for k, v in containers.items() if v})
+
+        dense, few = build(data=codes), build(data=sparse)
+        self.assertIsInstance(dense.containers[0], int)
+        self.assertLessEqual(len(few.containers[0]), ARRAY_LIMIT)
+
+        a = {i for i, x in enumerate(codes) if x}
+        b = {i for i, x in enumerate(sparse) if x}
+        self.assertEqual(len(dense), len(a))
+        self.assertEqual(list(few), sorted(b))
+        self.assertEqual(list(dense & few), sorted(a & b))
+        self.assertEqual(list(dense | few), sorted(a | b))
+        self.assertEqual(list(dense - few), sorted(a - b))
+        self.assertEqual(list(few - dense), sorted(b - a))
+        self.assertEqual(list(few & few), sorted(b))
+        self.assertEqual(list(few | few), sorted(b))
+        self.assertEqual(len(few - few), 0)
+        self.assertIn(min(a), dense)
+        self.assertNotIn(min(a) - 1 if min(a) else size + 1, dense)
+
+        self.assertIsNone(container_of(codes=b"\x00\x00", code=1))
+        self.assertEqual(
+            list(Bitmap(containers={1: array("H", [7]), 0: array("H", [5])})),
+            [5, CHUNK + 7],
+        )
+
+    def test_level_index(self) -> None:
+        ipip = IpipNeo(question=120)
+        results = [
+            ipip.compute(sex="F", age=30, answers=sample_answers(question=120, seed=i))
+            for i in range(50)
+        ]
+        levels = [result_levels(result=x) for x in results]
+
+        index = LevelIndex()
+        for result in results:
+            index.add(result=result)
+        self.assertEqual(len(index), 50)
+
+        where = {"conscientiousness": "high", "neuroticism": "low"}
+        expected = [i for i, x in enumerate(levels) if x[1] == "high" and x[4] == "low"]
+        self.assertEqual(list(index.query(where=where)), expected)
+
+        where = {"trust": ["average", "high"], "openness": "low"}
+        expected = [i for i, x in enumerate(levels) if x[23] != "low" and x[0] == "low"]
+        self.assertEqual(index.count(where=where), len(expected))
+        self.assertEqual(
+            list(index.all() - index.bitmap(score="trust", level="low")),
+            [i for i, x in enumerate(levels) if x[23] != "low"],
+        )
+        self.assertEqual(index.count(where={}), 50)
+
+        with self.assertRaises(BaseException):
+            index.bitmap(score="other", level="high")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultStore(path=tmp)
+            store.extend(results=results[:30])
+            synced = LevelIndex()
+            synced.sync(store=store)
+            store.extend(results=results[30:])
+            synced.sync(store=store)
+
+            self.assertEqual(len(synced), 50)
+            for name in ("openness", "trust"):
+                for level in LEVELS:
+                    self.assertEqual(
+                        synced.bitmap(score=name, level=level),
+                        index.bitmap(score=name, level=level),
+                    )
+
+            rows = synced.query(where={"openness": "high"})
+            self.assertEqual(
+                store.select(columns=["id"], positions=rows)["id"],
+                [results[i]["id"] for i in rows],
+            )
+            store.close()
+
+    def test_chunks(self) -> None:
+        values = random.Random(2)
+        size = CHUNK + 1000
+        columns = [bytes(values.randrange(3) for _ in range(size)) for _ in range(35)]
+
+        index = LevelIndex()
+        index.add_codes(columns=[x[:5000] for x in columns])
+        index.add_codes(columns=[x[5000:] for x in columns])
+        self.assertEqual(len(index), size)
+        self.assertEqual(len(index.all()), size)
+
+        bitmap = index.bitmap(score="openness", level="high")
+        self.assertEqual(list(bitmap), [i for i, x in enumerate(columns[0]) if x == 2])
+        both = index.query(where={"openness": "high", "anxiety": "low"})
+        self.assertEqual(
+            len(both),
+            sum(1 for x, y in zip(columns[0], columns[29]) if x == 2 and y == 0),
+        )
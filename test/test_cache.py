@@ -0,0 +1,218 @@
+"""Unit tests for Cache."""
+
+import copy
+import json
+import os
+import tempfile
+import unittest
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.benchmark import sample_answers
+from ipipneo.cache import ResultCache, result_key
+from ipipneo.instrument import Recorder
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.utility import organize_list_json
+
+
+class CacheRecorder(Recorder):
+    def __init__(self) -> None:
+        self.lookups = []
+
+    def cached(self, cache: str, hit: bool) -> None:
+        self.lookups.append((cache, hit))
+
+
+def personalities(result: dict) -> list:
+    return result["person"]["result"]["personalities"]
+
+
+class TestCache(unittest.TestCase):
+    def test_result_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            with ResultCache(path=path, max_entries=3) as cache:
+                self.assertIsNone(cache.get(key=b"a"))
+                cache.put(key=b"a", value=[1, {"x": 2.5}])
+                cache.put_many(items={b"b": [2], b"c": [3]})
+                self.assertEqual(cache.get(key=b"a"), [1, {"x": 2.5}])
+                self.assertEqual(
+                    cache.get_many(keys=[b"c", b"z", b"b", b"c"]),
+                    {b"b": [2], b"c": [3]},
+                )
+
+                cache.put(key=b"d", value=[4])
+                self.assertEqual(len(cache), 3)
+                self.assertIsNone(cache.get(key=b"a"))
+
+                # Replacing a key leaves a gap in the rowids, nothing is evicted.
+                cache.put(key=b"d", value=[4])
+                self.assertEqual(len(cache), 3)
+                self.assertEqual(cache.get(key=b"b"), [2])
+
+            with ResultCache(path=path, max_entries=3) as cache:
+                self.assertEqual(cache.get(key=b"d"), [4])
+                cache.clear()
+                self.assertEqual(len(cache), 0)
+
+        with self.assertRaises(AssertionError):
+            ResultCache(path=":memory:", max_entries=0)
+
+    def test_result_key(self) -> None:
+        norm = {"id": 1, "ns": [1.0, 2.0]}
+        key = result_key(
+            question=120,
+            test=False,
+            answers=[1, 2, 3],
+            sex="M",
+            norm=norm,
+            scale=(32, 73),
+            level=(45, 55),
+        )
+        self.assertEqual(len(key), 16)
+        self.assertEqual(
+            key,
+            result_key(
+                question=120,
+                test=False,
+                answers=[1, 2, 3],
+                sex="M",
+                norm=norm,
+                scale=(32, 73),
+                level=(45, 55),
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            result_key(
+                question=120,
+                test=False,
+                answers=[1, 2, 4],
+                sex="M",
+                norm=norm,
+                scale=(32, 73),
+                level=(45, 55),
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            result_key(
+                question=120,
+                test=False,
+                answers=[1, 2, 3],
+                sex="M",
+                norm=norm,
+                scale=(32, 73),
+                level=(40, 60),
+            ),
+        )
+
+    def test_compute_cached(self) -> None:
+        answers = sample_answers(question=120, seed=1)
+        expected = IpipNeo(question=120).compute(
+            sex="M", age=40, answers=answers, compare=True
+        )
+
+        with ResultCache(path=":memory:") as cache:
+            recorder = CacheRecorder()
+            ipip = IpipNeo(question=120)
+            ipip.set_cache(cache=cache)
+            ipip.set_recorder(recorder=recorder)
+
+            first = ipip.compute(sex="M", age=40, answers=answers, compare=True)
+            second = ipip.compute(sex="M", age=35, answers=answers, compare=True)
+            ipip.compute(sex="F", age=40, answers=answers)
+            self.assertEqual(
+                recorder.lookups, [("disk", False), ("disk", True), ("disk", False)]
+            )
+            self.assertEqual(len(cache), 2)
+
+            self.assertEqual(personalities(first), personalities(expected))
+            self.assertEqual(personalities(second), personalities(expected))
+            self.assertEqual(second["person"]["age"], 35)
+            self.assertNotEqual(second["id"], first["id"])
+            self.assertEqual(
+                second["person"]["result"]["compare"],
+                expected["person"]["result"]["compare"],
+            )
+            self.assertEqual(list(second), list(expected))
+
+            ipip.set_new_facet_level(low_min=40, high_max=60)
+            ipip.compute(sex="M", age=40, answers=answers)
+            self.assertEqual(recorder.lookups[-1], ("disk", False))
+
+            # The cache accepts the same answers as the scoring without it.
+            answers["answers"][0]["id_select"] = 300
+            plain = IpipNeo(question=120)
+            plain.set_new_facet_level(low_min=40, high_max=60)
+            self.assertEqual(
+                personalities(ipip.compute(sex="M", age=40, answers=answers)),
+                personalities(plain.compute(sex="M", age=40, answers=answers)),
+            )
+
+            ipip.set_cache(cache=None)
+            ipip.set_recorder(recorder=None)
+            self.assertFalse(ipip._hooked)
+
+    def test_compute_cached_custom(self) -> None:
+        with open("test/mock/answers-test-1.json") as f:
+            answers = json.load(f)
+
+        def reverse_scored(flag: int) -> dict:
+            custom = copy.deepcopy(answers)
+            for x in custom["answers"]:
+                x["reverse_scored"] = flag
+            return custom
+
+        ipip = IpipNeo(question=120, test=True)
+        expected = [
+            ipip.compute(sex="M", age=40, answers=reverse_scored(flag=x))
+            for x in (0, 1)
+        ]
+        self.assertNotEqual(personalities(expected[0]), personalities(expected[1]))
+
+        with ResultCache(path=":memory:") as cache:
+            recorder = CacheRecorder()
+            ipip.set_cache(cache=cache)
+            ipip.set_recorder(recorder=recorder)
+
+            for flag, result in zip((0, 1, 1), expected + expected[1:]):
+                self.assertEqual(
+                    personalities(
+                        ipip.compute(sex="M", age=40, answers=reverse_scored(flag))
+                    ),
+                    personalities(result),
+                )
+            self.assertEqual(
+                recorder.lookups, [("disk", False), ("disk", False), ("disk", True)]
+            )
+
+    def test_compute_batch_cached(self) -> None:
+        matrix = AnswerMatrix(question=120)
+        for i in range(6):
+            answers = organize_list_json(sample_answers(question=120, seed=i % 4))
+            matrix.append(sex="MF"[i % 2], age=30 + i, answers=answers)
+
+        expected = IpipNeo(question=120).compute_batch(matrix=matrix)
+
+        with ResultCache(path=":memory:") as cache:
+            recorder = CacheRecorder()
+            ipip = IpipNeo(question=120)
+            ipip.set_cache(cache=cache)
+            ipip.set_recorder(recorder=recorder)
+
+            first = ipip.compute_batch(matrix=matrix)
+            self.assertEqual(len(cache), 4)
+            self.assertEqual(sum(hit for _, hit in recorder.lookups), 0)
+
+            second = ipip.compute_batch(matrix=matrix)
+            self.assertEqual(sum(hit for _, hit in recorder.lookups), 6)
+            for a, b, c in zip(expected, first, second):
+                self.assertEqual(personalities(b), personalities(a))
+                self.assertEqual(personalities(c), personalities(a))
+                self.assertEqual(c["person"], a["person"])
+
+            single = ipip.compute(
+                sex="M", age=30, answers=sample_answers(question=120, seed=0)
+            )
+            self.assertEqual(recorder.lookups[-1], ("disk", True))
+            self.assertEqual(personalities(single), personalities(expected[0]))
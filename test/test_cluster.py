@@ -0,0 +1,84 @@
+"""Unit tests for Cluster."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.cluster import MiniBatchKMeans
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.neighbors import facet_vector
+
+
+def blobs(count: int, seed: int) -> tuple:
+    values = random.Random(seed)
+    centers = [[20.0] * 30, [80.0] * 30, [20.0] * 15 + [80.0] * 15]
+    labels = [values.randrange(3) for _ in range(count)]
+    rows = [[values.gauss(x, 5) for x in centers[label]] for label in labels]
+    return rows, labels, centers
+
+
+class TestCluster(unittest.TestCase):
+    def test_fit(self) -> None:
+        rows, labels, centers = blobs(count=3000, seed=1)
+
+        kmeans = MiniBatchKMeans(k=3, batch=100, seed=1).fit(vectors=iter(rows))
+        self.assertEqual(sum(kmeans.counts), 3000)
+
+        mapping = {}
+        for center in centers:
+            cluster, distance = kmeans.predict(values=center)
+            self.assertLess(distance, 5)
+            mapping[cluster] = center
+        self.assertEqual(len(mapping), 3)
+
+        found = kmeans.predict_batch(rows=rows)
+        self.assertEqual(
+            [mapping[i] for i, _ in found], [centers[label] for label in labels]
+        )
+        for (cluster, distance), x in zip(found, rows):
+            expected = kmeans.predict(values=x)
+            self.assertEqual(cluster, expected[0])
+            self.assertAlmostEqual(distance, expected[1], places=9)
+        self.assertLess(kmeans.inertia(vectors=rows) / len(rows), 30 * 25 * 1.2)
+
+        with self.assertRaises(AssertionError):
+            MiniBatchKMeans(k=3).predict(values=rows[0])
+
+        with self.assertRaises(AssertionError):
+            kmeans.partial_fit(rows=[[1, 2]])
+
+        with self.assertRaises(AssertionError):
+            MiniBatchKMeans(k=10, batch=5)
+
+    def test_seed(self) -> None:
+        kmeans = MiniBatchKMeans(k=3, batch=4, seed=1)
+        kmeans.partial_fit(rows=[[0.0] * 30, [0.0] * 30, [100.0] * 30])
+        self.assertIn([0.0] * 30, kmeans.centers)
+        self.assertIn([100.0] * 30, kmeans.centers)
+        self.assertEqual(sum(kmeans.counts), 3)
+
+    def test_assign_save_load(self) -> None:
+        ipip = IpipNeo(question=120)
+        results = [
+            ipip.compute(sex="M", age=25, answers=sample_answers(question=120, seed=i))
+            for i in range(30)
+        ]
+
+        kmeans = MiniBatchKMeans(k=4, batch=10, seed=2).fit(vectors=results, epochs=2)
+        self.assertEqual(sum(kmeans.counts), 60)
+
+        archetype = kmeans.assign(result=results[0])
+        self.assertEqual(
+            (archetype["cluster"], archetype["distance"]),
+            kmeans.predict(values=facet_vector(result=results[0])),
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "clusters.json")
+            kmeans.save(path=path)
+            loaded = MiniBatchKMeans.load(path=path)
+
+        self.assertEqual(loaded.to_dict(), kmeans.to_dict())
+        self.assertEqual(loaded.assign(result=results[5]), kmeans.assign(results[5]))
@@ -0,0 +1,125 @@
+"""Unit tests for Cohort."""
+
+import json
+import random
+import statistics
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.cohort import CohortAggregator, CohortStats, category
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.utility import result_scores
+
+
+def random_values(seed: int) -> list:
+    values = random.Random(seed)
+    return [values.uniform(0, 100) for _ in range(35)]
+
+
+class TestCohort(unittest.TestCase):
+    def test_invalid_params(self) -> None:
+        with self.assertRaises(AssertionError):
+            CohortStats(bins=0)
+
+        with self.assertRaises(AssertionError):
+            CohortAggregator(low=10, high=10)
+
+        with self.assertRaises(AssertionError):
+            CohortStats().update(values=[1, 2, 3])
+
+        with self.assertRaises(AssertionError):
+            CohortStats(bins=10).merge(other=CohortStats(bins=20))
+
+    def test_cohort_stats(self) -> None:
+        rows = [random_values(seed=i) for i in range(200)]
+
+        stats = CohortStats(bins=10)
+        for row in rows:
+            stats.update(values=row)
+
+        self.assertEqual(stats.count, 200)
+        for i in (0, 17, 34):
+            column = [x[i] for x in rows]
+            self.assertAlmostEqual(stats.mean[i], statistics.fmean(column))
+            self.assertAlmostEqual(stats.variance()[i], statistics.pvariance(column))
+            self.assertAlmostEqual(
+                stats.variance(sample=True)[i], statistics.variance(column)
+            )
+            self.assertEqual(sum(stats.histogram[i]), 200)
+            self.assertEqual(
+                stats.histogram[i][3], len([x for x in column if 30 <= x < 40])
+            )
+
+        stats = CohortStats(bins=4)
+        stats.update(values=[-5.0] * 34 + [150.0])
+        self.assertEqual(stats.histogram[0], [1, 0, 0, 0])
+        self.assertEqual(stats.histogram[34], [0, 0, 0, 1])
+        self.assertEqual(stats.summary()["openness"]["std"], 0.0)
+
+    def test_merge(self) -> None:
+        rows = [random_values(seed=i) for i in range(300)]
+
+        single, parts = CohortStats(), [CohortStats() for _ in range(3)]
+        for i, row in enumerate(rows):
+            single.update(values=row)
+            parts[i % 3].update(values=row)
+
+        merged = CohortStats.from_dict(data=json.loads(json.dumps(parts[0].to_dict())))
+        merged.merge(other=parts[1]).merge(other=parts[2]).merge(other=CohortStats())
+
+        self.assertEqual(merged.count, single.count)
+        self.assertEqual(merged.histogram, single.histogram)
+        for x, y in zip(merged.mean, single.mean):
+            self.assertAlmostEqual(x, y)
+        for x, y in zip(merged.variance(), single.variance()):
+            self.assertAlmostEqual(x, y)
+
+    def test_cohort_aggregator(self) -> None:
+        ipip = IpipNeo(question=120)
+        people = [("M", 18), ("M", 35), ("F", 35), ("F", 70), ("F", 30)]
+        results = [
+            ipip.compute(sex=sex, age=age, answers=sample_answers(120, seed=i))
+            for i, (sex, age) in enumerate(people)
+        ]
+
+        aggregator = CohortAggregator()
+        aggregator.add_results(results=results[:3])
+
+        shard = CohortAggregator()
+        shard.add_results(results=results[3:])
+
+        merged = CohortAggregator.from_dict(
+            data=json.loads(json.dumps(aggregator.to_dict()))
+        )
+        merged.merge(other=shard)
+
+        self.assertEqual(
+            sorted(merged.groups),
+            [(120, "F", 6), (120, "F", 8), (120, "M", 1), (120, "M", 2)],
+        )
+        self.assertEqual(merged.groups[(120, "F", 6)].count, 2)
+        self.assertEqual(merged.total().count, 5)
+
+        women = [result_scores(x) for x in (results[2], results[4])]
+        self.assertAlmostEqual(
+            merged.groups[(120, "F", 6)].mean[0], (women[0][0] + women[1][0]) / 2
+        )
+
+        summary = merged.summary()
+        self.assertEqual(len(summary), 4)
+        self.assertEqual(summary[0]["category"], "women between 21 and 40 years old")
+        self.assertEqual(summary[0]["count"], 2)
+        self.assertEqual(len(summary[0]["scores"]), 35)
+        self.assertEqual(len(summary[0]["scores"]["openness"]["histogram"]), 20)
+
+        merged.add(question=300, sex="M", age=50, values=[50.0] * 35)
+        self.assertEqual(merged.groups[(300, "M", 2)].count, 1)
+
+    def test_category(self) -> None:
+        self.assertEqual(
+            category(question=120, sex="M", norm=4), "men over 60 years old"
+        )
+        self.assertEqual(
+            category(question=300, sex="F", norm=3), "women of traditional college age"
+        )
+        self.assertIsNone(category(question=300, sex="F", norm=9))
@@ -0,0 +1,96 @@
+"""Unit tests for Database."""
+
+import os
+import tempfile
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.database import ResultDatabase
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.utility import result_scores
+
+
+def sample_results(count: int) -> list:
+    ipip = IpipNeo(question=120)
+    return [
+        ipip.compute(
+            sex="MF"[i % 2], age=18 + i, answers=sample_answers(question=120, seed=i)
+        )
+        for i in range(count)
+    ]
+
+
+class TestDatabase(unittest.TestCase):
+    def test_insert_get(self) -> None:
+        results = sample_results(count=20)
+        results[0]["quality"] = {"long_string": 3, "flagged": False}
+        results[1]["person"]["result"]["compare"] = {"user_answers_original": [1, 2]}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.db")
+            with ResultDatabase(path=path) as database:
+                self.assertEqual(database.insert(results=results[:15], batch=4), 15)
+                self.assertEqual(database.insert(results=results[15:], bulk=True), 5)
+                self.assertEqual(len(database), 20)
+
+            with ResultDatabase(path=path) as database:
+                for result in results:
+                    self.assertEqual(database.get(id=result["id"]), result)
+                self.assertIsNone(
+                    database.get(id="00000000-0000-0000-0000-000000000000")
+                )
+
+                expected = [
+                    x["id"]
+                    for x in results
+                    if x["person"]["sex"] == "F" and result_scores(x)[0] >= 50
+                ]
+                found = database.ids(filters={"sex": "F", "openness": (50, None)})
+                self.assertEqual(sorted(found), sorted(expected))
+                self.assertEqual(len(database.ids()), 20)
+
+                expected = [
+                    x["id"]
+                    for x in results
+                    if 20 <= result_scores(x)[33] <= 60
+                    and x["person"]["result"]["personalities"][4]["neuroticism"][
+                        "traits"
+                    ][0].get("score")
+                    == "low"
+                ]
+                found = database.ids(
+                    filters={"anxiety_level": "low", "immoderation": (20, 60)}
+                )
+                self.assertEqual(sorted(found), sorted(expected))
+
+                with self.assertRaises(AssertionError):
+                    database.ids(filters={"sex = 'F' OR 1": "M"})
+
+                self.assertEqual(
+                    database.connection.execute(
+                        "SELECT COUNT(*) FROM facets"
+                    ).fetchone()[0],
+                    600,
+                )
+
+                self.assertTrue(database.delete(id=results[0]["id"]))
+                self.assertFalse(database.delete(id=results[0]["id"]))
+                self.assertEqual(len(database), 19)
+                self.assertEqual(
+                    database.connection.execute(
+                        "SELECT COUNT(*) FROM facets"
+                    ).fetchone()[0],
+                    570,
+                )
+
+    def test_rollback(self) -> None:
+        results = sample_results(count=3)
+
+        with ResultDatabase(path=":memory:") as database:
+            database.insert(results=results[:1])
+            with self.assertRaises(BaseException):
+                database.insert(results=results)
+            self.assertEqual(len(database), 1)
+
+            with self.assertRaises(AssertionError):
+                database.insert(results=results, batch=0)
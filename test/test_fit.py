@@ -0,0 +1,116 @@
+"""Unit tests for Fit."""
+
+import random
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.fit import FitScorer, RoleTemplate
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.utility import result_scores
+
+
+def random_candidates(count: int, seed: int) -> list:
+    values = random.Random(seed)
+    return [
+        (f"c{i}", [values.uniform(0, 100) for _ in range(35)]) for i in range(count)
+    ]
+
+
+def random_templates(count: int, seed: int) -> list:
+    values = random.Random(seed)
+    templates = []
+    for i in range(count):
+        scores = {}
+        for name in values.sample(["openness", "extraversion", "trust", "anxiety"], 3):
+            low = values.uniform(0, 60)
+            scores[name] = {
+                "low": low,
+                "high": low + values.uniform(0, 40),
+                "weight": values.choice([1, 2]),
+            }
+        templates.append(RoleTemplate(name=f"r{i}", scores=scores))
+    return templates
+
+
+class TestFit(unittest.TestCase):
+    def test_role_template(self) -> None:
+        role = RoleTemplate.from_dict(
+            data={
+                "name": "sales",
+                "scores": {
+                    "extraversion": {"low": 60, "high": 100, "weight": 3},
+                    "anxiety": [0, 40],
+                },
+            }
+        )
+
+        values = [50.0] * 35
+        self.assertEqual(role.total, 4)
+        self.assertEqual(role.fit(values=values, method="satisfaction"), 0)
+        self.assertAlmostEqual(
+            role.fit(values=values), 100 - (3 * 100 + 100) ** 0.5 / 2
+        )
+
+        values[2], values[29] = 80.0, 10.0
+        self.assertEqual(role.fit(values=values), 100)
+        self.assertEqual(role.fit(values=values, method="satisfaction"), 100)
+
+        values[29] = 90.0
+        self.assertEqual(role.fit(values=values, method="satisfaction"), 75)
+        self.assertEqual(role.fit(values=values), 75)
+
+        with self.assertRaises(BaseException):
+            RoleTemplate(name="x", scores={"other": [0, 10]})
+
+        with self.assertRaises(BaseException):
+            RoleTemplate(name="x", scores={"anxiety": [50, 10]})
+
+        with self.assertRaises(AssertionError):
+            RoleTemplate(name="x", scores={})
+
+    def test_rank(self) -> None:
+        candidates = random_candidates(count=300, seed=1)
+        templates = random_templates(count=12, seed=2)
+
+        for method in ("distance", "satisfaction"):
+            scorer = FitScorer(templates=templates, method=method, block=64)
+            ranked = scorer.rank(candidates=iter(candidates), k=3)
+            fits = {id: scorer.fit(values=values) for id, values in candidates}
+            self.assertEqual(
+                scorer.fit_block(rows=[x for _, x in candidates]),
+                [fits[id] for id, _ in candidates],
+            )
+
+            self.assertEqual(len(ranked["candidates"]), 300)
+            for id, roles in ranked["candidates"].items():
+                expected = sorted(fits[id], reverse=True)[:3]
+                self.assertEqual([x for _, x in roles], expected)
+
+            for j, template in enumerate(templates):
+                best = ranked["templates"][template.name]
+                expected = sorted(range(300), key=lambda i: (-fits[f"c{i}"][j], i))[:3]
+                self.assertEqual([x for x, _ in best], [f"c{i}" for i in expected])
+
+        with self.assertRaises(AssertionError):
+            FitScorer(templates=templates, method="other")
+
+        with self.assertRaises(AssertionError):
+            FitScorer(templates=templates + templates[:1])
+
+        with self.assertRaises(AssertionError):
+            scorer.rank(candidates=[("c", [50] * 5)])
+
+    def test_rank_results(self) -> None:
+        ipip = IpipNeo(question=120)
+        results = [
+            ipip.compute(sex="F", age=30, answers=sample_answers(question=120, seed=i))
+            for i in range(5)
+        ]
+        role = RoleTemplate(name="any", scores={"openness": [0, 100]})
+
+        ranked = FitScorer(templates=[role]).rank(candidates=results, k=10)
+        self.assertEqual(len(ranked["templates"]["any"]), 5)
+        self.assertEqual(ranked["candidates"][results[0]["id"]], [("any", 100.0)])
+        self.assertEqual(
+            FitScorer(templates=[role]).fit(values=result_scores(results[0])), [100.0]
+        )
@@ -0,0 +1,156 @@
+"""Unit tests for Instrument."""
+
+import json
+import unittest
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.benchmark import sample_answers
+from ipipneo.instrument import (STAGES, LatencyHistogram, StageRecorder,
+                                stage_order)
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.utility import organize_list_json
+
+
+def load_mock_answers_120() -> dict:
+    with open("test/mock/answers-test-1.json") as f:
+        data = json.load(f)
+    return data
+
+
+def load_mock_answers_custom() -> dict:
+    with open("test/mock/answers-test-6.json") as f:
+        data = json.load(f)
+    return data
+
+
+class ScoredRecorder(StageRecorder):
+    def __init__(self) -> None:
+        super().__init__()
+        self.norms = []
+
+    def scored(self, question: int, norm: dict) -> None:
+        self.norms.append(norm.get("id"))
+
+
+class TestInstrument(unittest.TestCase):
+    def test_latency_histogram(self) -> None:
+        with self.assertRaises(AssertionError):
+            LatencyHistogram(buckets=())
+
+        h = LatencyHistogram(buckets=(0.1, 0.01, 1.0))
+        self.assertEqual(h.buckets, (0.01, 0.1, 1.0))
+
+        for value in [0.001, 0.01, 0.05, 0.5, 2.0]:
+            h.observe(value)
+
+        self.assertEqual(h.counts, [2, 1, 1, 1])
+        self.assertEqual(h.count, 5)
+        self.assertAlmostEqual(h.sum, 2.561)
+        self.assertEqual(
+            h.snapshot().get("buckets"),
+            [(0.01, 2), (0.1, 3), (1.0, 4), (float("inf"), 5)],
+        )
+
+        other = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        other.observe(0.2)
+        h.merge(other)
+        self.assertEqual(h.counts, [2, 1, 2, 1])
+        self.assertEqual(h.count, 6)
+
+        with self.assertRaises(AssertionError):
+            h.merge(LatencyHistogram(buckets=(1.0,)))
+
+    def test_stage_recorder(self) -> None:
+        recorder = StageRecorder(buckets=(0.1,))
+        recorder.record("score", 0.05)
+        recorder.record("score", 0.2)
+        recorder.record("custom", 0.01)
+        recorder.record("validation", 0.01)
+
+        snapshot = recorder.snapshot()
+        self.assertEqual(list(snapshot), ["validation", "score", "custom"])
+        self.assertEqual(snapshot["score"]["count"], 2)
+        self.assertEqual(snapshot["score"]["buckets"], [(0.1, 1), (float("inf"), 2)])
+
+        recorder.reset()
+        self.assertEqual(recorder.snapshot(), {})
+
+        self.assertEqual(stage_order("validation"), 0)
+        self.assertEqual(stage_order("unknown"), len(STAGES))
+
+    def test_compute_recorded(self) -> None:
+        with self.assertRaises(AssertionError):
+            IpipNeo(question=120).set_recorder(recorder=object())
+
+        ipip, recorder = IpipNeo(question=120), StageRecorder()
+        expected = ipip.compute(
+            sex="M", age=40, answers=load_mock_answers_120(), compare=True
+        )
+
+        ipip.set_recorder(recorder=recorder)
+        result = ipip.compute(
+            sex="M", age=40, answers=load_mock_answers_120(), compare=True
+        )
+        ipip.compute(sex="F", age=25, answers=load_mock_answers_120())
+
+        self.assertEqual(result.get("person"), expected.get("person"))
+
+        snapshot = recorder.snapshot()
+        self.assertEqual(list(snapshot), [x for x in STAGES if x != "cache"])
+        self.assertTrue(all(x.get("count") == 2 for x in snapshot.values()))
+        self.assertTrue(
+            snapshot["compute"]["sum"]
+            >= sum(x["sum"] for k, x in snapshot.items() if k != "compute")
+        )
+
+        ipip.set_recorder(recorder=None)
+        ipip.compute(sex="M", age=40, answers=load_mock_answers_120())
+        self.assertEqual(recorder.snapshot()["compute"]["count"], 2)
+
+    def test_compute_recorded_custom(self) -> None:
+        ipip, recorder = IpipNeo(question=120, test=True), StageRecorder()
+        expected = ipip.compute(sex="F", age=30, answers=load_mock_answers_custom())
+
+        ipip.set_recorder(recorder=recorder)
+        result = ipip.compute(sex="F", age=30, answers=load_mock_answers_custom())
+
+        self.assertEqual(result.get("person"), expected.get("person"))
+        self.assertEqual(recorder.snapshot()["reverse"]["count"], 1)
+
+        with self.assertRaises(AssertionError):
+            ipip.compute(sex="X", age=30, answers=load_mock_answers_custom())
+
+    def test_compute_batch_recorded(self) -> None:
+        matrix = AnswerMatrix(question=120)
+        for sex, age, seed in (("M", 30, 0), ("F", 18, 1), ("M", 35, 0)):
+            matrix.append(
+                sex=sex,
+                age=age,
+                answers=organize_list_json(sample_answers(question=120, seed=seed)),
+            )
+        expected = IpipNeo(question=120).compute_batch(matrix=matrix)
+
+        ipip, recorder = IpipNeo(question=120), ScoredRecorder()
+        ipip.set_recorder(recorder=recorder)
+        results = ipip.compute_batch(matrix=matrix, dedup=True)
+
+        for a, b in zip(results, expected):
+            self.assertEqual(a.get("person"), b.get("person"))
+
+        snapshot = recorder.snapshot()
+        self.assertEqual(
+            list(snapshot),
+            ["norm", "score", "tscore", "percentile", "assembly", "compute"],
+        )
+        self.assertTrue(all(x.get("count") == 2 for x in snapshot.values()))
+        self.assertEqual(recorder.norms, [2, 5, 2])
+
+        result = ipip.evaluator(sex="F", age=18, score=ipip.score(answers=[3] * 120))
+        self.assertEqual(recorder.snapshot()["tscore"]["count"], 3)
+        self.assertEqual(
+            result.get("person"),
+            IpipNeo(question=120)
+            .evaluator(sex="F", age=18, score=ipip.score(answers=[3] * 120))
+            .get("person"),
+        )
+        self.assertEqual(recorder.norms[-1], 5)
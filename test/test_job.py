@@ -0,0 +1,154 @@
+"""Unit tests for Job."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from ipipneo.batch import read_csv
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.job import ScoringJob, file_checksum, shard_ranges
+from ipipneo.utility import organize_list_json
+
+
+def write_answers(path: str, count: int) -> list:
+    rows = []
+    with open(path, "w") as f:
+        f.write(",".join(["sex", "age"] + [f"q{i}" for i in range(1, 121)]) + "\n")
+        for i in range(count):
+            answers = organize_list_json(sample_answers(question=120, seed=i))
+            rows.append(("MF"[i % 2], 20 + i, answers))
+            f.write(",".join(["MF"[i % 2], str(20 + i)] + list(map(str, answers))))
+            f.write("\n")
+    return rows
+
+
+class TestJob(unittest.TestCase):
+    def test_shard_ranges(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.csv")
+            rows = write_answers(path=path, count=10)
+
+            ranges = shard_ranges(path=path, size=600)
+            self.assertEqual(ranges[-1][1], os.path.getsize(path))
+            self.assertTrue(all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])))
+
+            ages = [
+                age
+                for start, end in ranges
+                for matrix in read_csv(path=path, question=120, start=start, end=end)
+                for age in matrix.age
+            ]
+            self.assertEqual(ages, [x[1] for x in rows])
+
+    def test_run_resume(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path, output = os.path.join(tmp, "answers.csv"), os.path.join(tmp, "job")
+            rows = write_answers(path=path, count=12)
+
+            job = ScoringJob(
+                paths=path, output=output, question=120, shard_size=1000, workers=1
+            )
+            shards = list(job.shards)
+            self.assertEqual(len(shards), len(shard_ranges(path=path, size=1000)))
+            self.assertGreater(len(shards), 2)
+
+            report = job.run()
+            self.assertEqual(report["done"], len(shards))
+            self.assertEqual(report["rows"], 12)
+            self.assertEqual(report["failed"], {})
+
+            results = list(job.results())
+            self.assertEqual(len({x["id"] for x in results}), 12)
+            self.assertEqual(
+                [x["person"]["age"] for x in results], [x[1] for x in rows]
+            )
+            expected = IpipNeo(question=120).compute_batch(
+                matrix=next(read_csv(path=path, question=120))
+            )
+            self.assertEqual(
+                [x["person"] for x in results], [x["person"] for x in expected]
+            )
+
+            with open(os.path.join(output, "manifest.json")) as f:
+                manifest = json.load(f)
+            for shard, file in zip(job.shards, job.outputs()):
+                self.assertEqual(
+                    manifest["shards"][shard]["sha256"], file_checksum(path=file)
+                )
+
+            with open(job.outputs()[1], "a") as f:
+                f.write("{}\n")
+            job = ScoringJob(
+                paths=path, output=output, question=120, shard_size=1000, workers=1
+            )
+            self.assertEqual(job.pending(), [shards[1]])
+            report = job.run()
+            self.assertEqual((report["skipped"], report["done"]), (len(shards) - 1, 1))
+            self.assertEqual(job.run()["skipped"], len(shards))
+
+            with open(path, "rb") as f:
+                data = bytearray(f.read())
+            start = job.shards[shards[2]]["start"]
+            offset = data.index(b",", data.index(b",", start) + 1) + 1
+            data[offset] = ord("1") + (data[offset] - ord("1") + 1) % 5
+            with open(path, "wb") as f:
+                f.write(data)
+            job = ScoringJob(
+                paths=path, output=output, question=120, shard_size=1000, workers=1
+            )
+            self.assertEqual(job.pending(verify=False), [])
+            self.assertEqual(job.pending(), [shards[2]])
+            self.assertEqual(job.run()["done"], 1)
+
+            shards = list(job.shards)
+            with open(path, "a") as f:
+                answers = organize_list_json(sample_answers(question=120, seed=99))
+                f.write(",".join(["F", "50"] + list(map(str, answers))) + "\n")
+            job = ScoringJob(
+                paths=path, output=output, question=120, shard_size=1000, workers=1
+            )
+            self.assertEqual(job.pending(), list(job.shards)[len(shards) - 1 :])
+            job.run()
+            self.assertEqual(len(list(job.results())), 13)
+
+            with self.assertRaises(BaseException):
+                ScoringJob(paths=path, output=output, question=120, shard_size=500)
+
+    def test_failed_shard(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path, output = os.path.join(tmp, "answers.csv"), os.path.join(tmp, "job")
+            write_answers(path=path, count=6)
+            with open(path) as f:
+                lines = f.read().split("\n")
+            lines[5] = lines[5][:-1] + "9"
+            with open(path, "w") as f:
+                f.write("\n".join(lines))
+
+            job = ScoringJob(
+                paths=[path], output=output, question=120, shard_size=700, workers=2
+            )
+            offset = len("\n".join(lines[:5])) + 1
+            failed = [
+                x for x, y in job.shards.items() if y["start"] <= offset < y["end"]
+            ]
+            report = job.run()
+            self.assertEqual(list(report["failed"]), failed)
+            self.assertTrue(
+                report["failed"][failed[0]].startswith(f"Invalid row at byte {offset}:")
+            )
+            self.assertEqual(report["done"], len(job.shards) - 1)
+            self.assertEqual([x for x in os.listdir(output) if x.endswith(".tmp")], [])
+            self.assertEqual(job.manifest["shards"][failed[0]]["status"], "failed")
+
+            with open(path, "w") as f:
+                f.write("\n".join(lines).replace(lines[5], lines[5][:-1] + "3"))
+            job = ScoringJob(
+                paths=[path], output=output, question=120, shard_size=700, workers=1
+            )
+            report = job.run()
+            self.assertEqual(
+                (report["skipped"], report["done"]), (len(job.shards) - 1, 1)
+            )
+            self.assertEqual(len(list(job.results())), 6)
@@ -0,0 +1,200 @@
+"""Unit tests for Metrics."""
+
+import json
+import threading
+import unittest
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.cache import ResultCache
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.metrics import (CONTENT_TYPE, Counter, Metric, Registry,
+                             ScoringMetrics, failure_reason, format_labels,
+                             format_value, metrics_handler)
+from ipipneo.utility import organize_list_json
+
+
+def load_mock_answers_120() -> dict:
+    with open("test/mock/answers-test-1.json") as f:
+        data = json.load(f)
+    return data
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter(self) -> None:
+        with self.assertRaises(TypeError):
+            Metric(name="base", help="")
+
+        with self.assertRaises(AssertionError):
+            Counter(name="invalid name", help="")
+
+        counter = Counter(name="requests_total", help="Requests.", labels=("code",))
+
+        with self.assertRaises(AssertionError):
+            counter.inc()
+
+        def work() -> None:
+            for _ in range(1000):
+                counter.inc(code=200)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counter.inc(amount=2, code=500)
+        self.assertEqual(counter.value(code=200), 4000)
+        self.assertEqual(counter.value(code=500), 2)
+        self.assertEqual(counter.value(code=404), 0)
+        self.assertEqual(
+            counter.collect(),
+            ['requests_total{code="200"} 4000', 'requests_total{code="500"} 2'],
+        )
+
+    def test_registry(self) -> None:
+        registry = Registry()
+        counter = registry.counter("a_total", "First line.\nSecond line.")
+        histogram = registry.histogram(
+            "b_seconds", "Latency.", labels=("stage",), buckets=(0.1, 1)
+        )
+
+        with self.assertRaises(ValueError):
+            registry.counter("a_total", "Again.")
+
+        self.assertEqual(registry.get("a_total"), counter)
+
+        counter.inc()
+        histogram.observe(0.05, stage='say "hi"')
+        histogram.observe(0.5, stage='say "hi"')
+        histogram.observe(5, stage='say "hi"')
+
+        self.assertEqual(
+            registry.exposition(),
+            "\n".join(
+                [
+                    "# HELP a_total First line.\\nSecond line.",
+                    "# TYPE a_total counter",
+                    "a_total 1",
+                    "# HELP b_seconds Latency.",
+                    "# TYPE b_seconds histogram",
+                    'b_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 1',
+                    'b_seconds_bucket{stage="say \\"hi\\"",le="1"} 2',
+                    'b_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 3',
+                    'b_seconds_sum{stage="say \\"hi\\""} 5.55',
+                    'b_seconds_count{stage="say \\"hi\\""} 3',
+                ]
+            )
+            + "\n",
+        )
+
+    def test_format(self) -> None:
+        self.assertEqual(format_labels((), ()), "")
+        self.assertEqual(format_labels(("a", "b"), ("1", "2")), '{a="1",b="2"}')
+        self.assertEqual(format_value(float("inf")), "+Inf")
+        self.assertEqual(format_value(3), "3")
+        self.assertEqual(format_value(0.25), "0.25")
+        self.assertEqual(
+            failure_reason(AssertionError("The age (5) must be between 10 and 110!")),
+            "The age (#) must be between # and #!",
+        )
+        self.assertEqual(failure_reason(AssertionError()), "AssertionError")
+
+    def test_scoring_metrics(self) -> None:
+        metrics = ScoringMetrics()
+        ipip = IpipNeo(question=120)
+        ipip.set_recorder(recorder=metrics)
+
+        ipip.compute(sex="M", age=40, answers=load_mock_answers_120())
+        ipip.compute(sex="F", age=18, answers=load_mock_answers_120())
+
+        with self.assertRaises(AssertionError):
+            ipip.compute(sex="M", age=5, answers=load_mock_answers_120())
+
+        with self.assertRaises(BaseException):
+            ipip.compute(sex="M", age=40, answers={"answers": [{"id_question": 1}]})
+
+        metrics.cached(cache="disk", hit=True)
+        metrics.cached(cache="disk", hit=False)
+        metrics.deduplicated(rows=10, unique=7)
+
+        self.assertEqual(metrics.scored_total.value(question=120), 2)
+        self.assertEqual(
+            metrics.norm_total.value(
+                question=120, norm=5, category="women under 21 years old"
+            ),
+            1,
+        )
+        self.assertEqual(
+            metrics.failures_total.value(
+                stage="validation",
+                error="AssertionError",
+                reason="The age (#) must be between # and #!",
+            ),
+            1,
+        )
+        self.assertEqual(
+            metrics.failures_total.value(
+                stage="reverse",
+                error="ValueError",
+                reason="The key named (id_select) was not found!",
+            ),
+            1,
+        )
+        self.assertEqual(metrics.cache_total.value(cache="disk", result="hit"), 1)
+        self.assertEqual(metrics.batch_rows_total.value(result="duplicate"), 3)
+        self.assertEqual(metrics.compute_seconds.merged()[()].count, 2)
+        self.assertEqual(metrics.stage_seconds.merged()[("score",)].count, 2)
+
+    def test_scoring_metrics_cached(self) -> None:
+        metrics = ScoringMetrics()
+        ipip = IpipNeo(question=120)
+        ipip.set_recorder(recorder=metrics)
+
+        with ResultCache(path=":memory:") as cache:
+            ipip.set_cache(cache=cache)
+            ipip.compute(sex="M", age=40, answers=load_mock_answers_120())
+            ipip.compute(sex="M", age=40, answers=load_mock_answers_120())
+
+            with self.assertRaises(AssertionError):
+                ipip.compute(sex="M", age=5, answers=load_mock_answers_120())
+
+            matrix = AnswerMatrix(question=120)
+            matrix.append(
+                sex="M",
+                age=40,
+                answers=organize_list_json(answers=load_mock_answers_120()),
+            )
+            ipip.compute_batch(matrix=matrix)
+
+        self.assertEqual(metrics.scored_total.value(question=120), 3)
+        self.assertEqual(metrics.cache_total.value(cache="disk", result="hit"), 2)
+        self.assertEqual(metrics.cache_total.value(cache="disk", result="miss"), 1)
+        self.assertEqual(
+            metrics.failures_total.value(
+                stage="validation",
+                error="AssertionError",
+                reason="The age (#) must be between # and #!",
+            ),
+            1,
+        )
+        self.assertEqual(metrics.compute_seconds.merged()[()].count, 2)
+        self.assertEqual(metrics.stage_seconds.merged()[("cache",)].count, 2)
+
+    def test_metrics_handler(self) -> None:
+        registry = Registry()
+        registry.counter("scored_total", "Scored.").inc(amount=3)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), metrics_handler(registry))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(response.headers.get("Content-Type"), CONTENT_TYPE)
+                self.assertIn("scored_total 3", response.read().decode("utf-8"))
+        finally:
+            server.shutdown()
+            server.server_close()
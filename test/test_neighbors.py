@@ -0,0 +1,143 @@
+"""Unit tests for Neighbors."""
+
+import math
+import os
+import random
+import tempfile
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.neighbors import (ProfileIndex, facet_vector, profile_vector,
+                               quantize)
+
+
+def random_profiles(count: int, seed: int) -> list:
+    values = random.Random(seed)
+    return [[values.uniform(0, 100) for _ in range(30)] for _ in range(count)]
+
+
+def cosine(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    return 1 - dot / (
+        math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(x * x for x in b))
+    )
+
+
+class TestNeighbors(unittest.TestCase):
+    def test_quantize(self) -> None:
+        self.assertEqual(
+            quantize(values=[0, 100, -5, 120] + [50] * 26)[:5], b"\x00\xff\x00\xff\x7f"
+        )
+
+        with self.assertRaises(AssertionError):
+            quantize(values=[1, 2, 3])
+
+    def test_search(self) -> None:
+        profiles = random_profiles(count=500, seed=1)
+        ids = [f"p{i}" for i in range(500)]
+
+        index = ProfileIndex(block=64).build(ids=ids[:400], vectors=profiles[:400])
+        for id, values in zip(ids[400:], profiles[400:]):
+            index.add(id=id, values=values)
+        self.assertEqual(len(index), 500)
+
+        query = profiles[7]
+        nearest = index.search(values=query, k=5)
+        self.assertEqual(nearest[0], ("p7", 0.0))
+        self.assertEqual(len(nearest), 5)
+
+        expected = sorted(
+            range(500), key=lambda i: math.dist(index.vector(index=i), index.vector(7))
+        )
+        self.assertEqual([x for x, _ in nearest], [ids[i] for i in expected[:5]])
+        for (_, distance), i in zip(nearest, expected):
+            self.assertAlmostEqual(
+                distance, math.dist(index.vector(index=i), index.vector(7)), places=4
+            )
+
+        nearest = index.search(values=[x * 0.5 for x in query], k=3, metric="cosine")
+        self.assertEqual(nearest[0][0], "p7")
+        self.assertLess(nearest[0][1], 1e-4)
+        expected = sorted(range(500), key=lambda i: cosine(index.vector(i), query))
+        self.assertEqual([x for x, _ in nearest], [ids[i] for i in expected[:3]])
+
+        self.assertEqual(len(index.search(values=query, k=1000)), 500)
+        self.assertEqual(ProfileIndex().search(values=query), [])
+
+        with self.assertRaises(AssertionError):
+            index.search(values=query, metric="manhattan")
+
+        with self.assertRaises(AssertionError):
+            index.search(values=query, k=0)
+
+    def test_add_result(self) -> None:
+        ipip, index = IpipNeo(question=120), ProfileIndex()
+        results = [
+            ipip.compute(sex="M", age=40, answers=sample_answers(120, seed=i))
+            for i in range(10)
+        ]
+        for result in results:
+            index.add_result(result=result)
+
+        nearest = index.search(values=facet_vector(result=results[3]), k=1)
+        self.assertEqual(nearest[0][0], results[3]["id"])
+        self.assertEqual(len(facet_vector(result=results[3])), 30)
+
+        index = ProfileIndex(dimension=35)
+        for result in results:
+            index.add_result(result=result)
+
+        values = profile_vector(result=results[3], dimension=35)
+        self.assertEqual(values[5:], facet_vector(result=results[3]))
+        self.assertEqual(index.search(values=values, k=1)[0][0], results[3]["id"])
+
+        with self.assertRaises(AssertionError):
+            index.search(values=facet_vector(result=results[3]))
+
+        with self.assertRaises(AssertionError):
+            ProfileIndex(dimension=5)
+
+    def test_save_load(self) -> None:
+        profiles = random_profiles(count=100, seed=2)
+        index = ProfileIndex().build(
+            ids=[f"p{i}" for i in range(100)], vectors=profiles
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profiles.idx")
+            index.save(path=path)
+
+            mapped = ProfileIndex.load(path=path)
+            loaded = ProfileIndex.load(path=path, memory_map=False)
+            for other in (mapped, loaded):
+                self.assertEqual(other.ids, index.ids)
+                self.assertEqual(bytes(other.data), bytes(index.data))
+                self.assertEqual(list(other.norms), list(index.norms))
+                self.assertEqual(
+                    other.search(values=profiles[0], metric="cosine"),
+                    index.search(values=profiles[0], metric="cosine"),
+                )
+
+            mapped.add(id="new", values=profiles[0])
+            self.assertEqual(len(mapped), 101)
+            self.assertIsNone(mapped._mmap)
+            self.assertEqual(mapped.search(values=profiles[0], k=2)[1], ("new", 0.0))
+
+            path = os.path.join(tmp, "domains.idx")
+            ProfileIndex(dimension=35).build(ids=["a"], vectors=[[50] * 35]).save(
+                path=path
+            )
+            loaded = ProfileIndex.load(path=path, memory_map=False)
+            self.assertEqual(loaded.dimension, 35)
+            self.assertEqual(loaded.search(values=[50] * 35), [("a", 0.0)])
+
+            path = os.path.join(tmp, "empty.idx")
+            ProfileIndex().save(path=path)
+            self.assertEqual(len(ProfileIndex.load(path=path, memory_map=False)), 0)
+
+            path = os.path.join(tmp, "other.idx")
+            with open(path, "wb") as f:
+                f.write(b"\x00" * 64)
+            with self.assertRaises(BaseException):
+                ProfileIndex.load(path=path, memory_map=False)
@@ -395,3 +395,15 @@ class TestNorm(unittest.TestCase):
         self.assertEqual(round(percent.get("E"), 2), 78.5)
         self.assertEqual(round(normalize.get("A"), 2), 1)
         self.assertEqual(round(percent.get("N"), 2), 5.12)
+
+    def test_group(self) -> None:
+        self.assertEqual(
+            Norm.group(sex="M", age=20, nquestion=120), (1, "men under 21 years old")
+        )
+        self.assertEqual(
+            Norm.group(sex="F", age=61, nquestion=120), (8, "women over 60 years old")
+        )
+        self.assertEqual(Norm.group(sex="F", age=40, nquestion=300), (4, "adult women"))
+
+        with self.assertRaises(AssertionError):
+            Norm.group(sex="X", age=40, nquestion=120)
@@ -0,0 +1,140 @@
+"""Unit tests for NormBuild."""
+
+import copy
+import os
+import statistics
+import tempfile
+import unittest
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.benchmark import sample_answers
+from ipipneo.facet import Facet
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.norm import Norm
+from ipipneo.normbuild import (NS_SIZE, NormBuilder, load_norms, ns_mean,
+                               ns_sd, ns_sums, raise_if_norms_are_invalid)
+from ipipneo.reverse import ReverseScored120
+from ipipneo.utility import organize_list_json
+
+PEOPLE = [("M", 18), ("M", 35), ("F", 35), ("F", 70), ("M", 19), ("F", 30)]
+
+
+class TestNormBuild(unittest.TestCase):
+    def test_ns_layout(self) -> None:
+        self.assertEqual([ns_mean(index=i) for i in range(5)], [1, 2, 3, 4, 5])
+        self.assertEqual([ns_sd(index=i) for i in range(5)], [6, 7, 8, 9, 10])
+        self.assertEqual(ns_mean(index=5), 11)
+        self.assertEqual(ns_sd(index=5), 17)
+        self.assertEqual(ns_mean(index=34), 64)
+        self.assertEqual(ns_sd(index=34), 70)
+        self.assertEqual(
+            sorted(
+                [ns_mean(index=i) for i in range(35)] + [ns_sd(i) for i in range(35)]
+            ),
+            list(range(1, NS_SIZE)),
+        )
+
+        facet = Facet(nquestion=120)
+        answers = ReverseScored120(answers=sample_answers(question=120, seed=1))
+        score = facet.score(answers=organize_list_json(answers=answers))
+        sums = ns_sums(score=score)
+        domain, b5 = facet.domain(score=score), facet.b5create(score=score)
+
+        self.assertEqual(sums[:5], [domain[x] for x in ("N", "E", "O", "A", "C")])
+        self.assertEqual(sums[5:11], b5["N"][1:7])
+        self.assertEqual(sums[29:35], b5["C"][1:7])
+
+    def test_norm_builder(self) -> None:
+        with self.assertRaises(AssertionError):
+            NormBuilder(question=100)
+
+        samples = [sample_answers(question=120, seed=i) for i in range(60)]
+        people = [PEOPLE[i % len(PEOPLE)] for i in range(60)]
+
+        builder = NormBuilder(question=120)
+        original = copy.deepcopy(samples)
+        for (sex, age), answers in zip(people, samples):
+            builder.add(sex=sex, age=age, answers=answers)
+        self.assertEqual(samples, original)
+
+        matrix, shard = AnswerMatrix(question=120), NormBuilder(question=120)
+        for (sex, age), answers in zip(people[:30], samples[:30]):
+            matrix.append(sex=sex, age=age, answers=organize_list_json(answers))
+        shard.add_matrix(matrix=matrix)
+
+        matrix = AnswerMatrix(question=120)
+        for (sex, age), answers in zip(people[30:], samples[30:]):
+            matrix.append(sex=sex, age=age, answers=organize_list_json(answers))
+        shard.merge(other=NormBuilder(question=120)).add_matrix(matrix=matrix)
+
+        table, other = builder.table(), shard.table()
+        self.assertEqual(sorted(table), [1, 2, 6, 8])
+        self.assertEqual(table, other)
+        self.assertEqual(table[1]["count"], 20)
+        self.assertEqual(table[6]["category"], "women between 21 and 40 years old")
+        self.assertTrue(raise_if_norms_are_invalid(norms=table))
+
+        facet = Facet(nquestion=120)
+        domains = [
+            facet.domain(
+                facet.score(
+                    answers=organize_list_json(answers=ReverseScored120(answers=x))
+                )
+            )["O"]
+            for (sex, age), x in zip(people, copy.deepcopy(samples))
+            if sex == "M" and age < 21
+        ]
+        self.assertEqual(table[1]["ns"][3], round(statistics.fmean(domains), 2))
+        self.assertEqual(table[1]["ns"][8], round(statistics.stdev(domains), 2))
+
+        self.assertEqual(sorted(builder.table(min_count=11)), [1, 6])
+
+        with self.assertRaises(AssertionError):
+            builder.merge(other=NormBuilder(question=300))
+
+    def test_custom_norms(self) -> None:
+        builder = NormBuilder(question=120)
+        for i in range(50):
+            builder.add(sex="M", age=40, answers=sample_answers(question=120, seed=i))
+
+        answers = sample_answers(question=120, seed=100)
+        ipip = IpipNeo(question=120)
+        default = ipip.compute(sex="M", age=40, answers=answers)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "norms.json")
+            builder.save(path=path)
+            norms = load_norms(path=path)
+
+        self.assertEqual(norms, builder.table())
+
+        ipip.set_norms(norms=norms)
+        self.assertEqual(ipip.get_norm(sex="M", age=40), norms[2])
+        self.assertEqual(
+            ipip.get_norm(sex="F", age=40), Norm(sex="F", age=40, nquestion=120)
+        )
+        self.assertNotEqual(
+            ipip.compute(sex="M", age=40, answers=answers).get("person"),
+            default.get("person"),
+        )
+
+        ipip.set_norms(norms={2: Norm(sex="M", age=40, nquestion=120)})
+        self.assertEqual(
+            ipip.compute(sex="M", age=40, answers=answers).get("person"),
+            default.get("person"),
+        )
+
+        ipip.set_norms(norms=None)
+        self.assertEqual(
+            ipip.compute(sex="M", age=40, answers=answers).get("person"),
+            default.get("person"),
+        )
+
+        with self.assertRaises(BaseException):
+            ipip.set_norms(norms={2: {"id": 2, "ns": [0] * 10}})
+
+        with self.assertRaises(BaseException):
+            ipip.set_norms(norms={2: {"id": 2, "ns": [1] * 70 + [0]}})
+
+        with self.assertRaises(BaseException):
+            ipip.set_norms(norms={3: norms[2]})
@@ -0,0 +1,175 @@
+"""Unit tests for NormSet."""
+
+import os
+import tempfile
+import unittest
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.norm import Norm
+from ipipneo.normbuild import NormBuilder
+from ipipneo.normset import NormSet, NormSets, raise_if_norm_set_is_invalid
+from ipipneo.utility import organize_list_json
+
+
+def norm_group(id: int, sex: str, age: list) -> dict:
+    return {"id": id, "category": "test", "sex": sex, "age": age, "ns": [1] * 71}
+
+
+class TestNormSet(unittest.TestCase):
+    def test_default(self) -> None:
+        for question, size in ((120, 8), (300, 4)):
+            normset = NormSet.default(question=question)
+            self.assertEqual(len(normset), size)
+            self.assertEqual(normset.name, f"johnson-{question}")
+
+            for sex in ("M", "F"):
+                for age in range(10, 111):
+                    norm = Norm(sex=sex, age=age, nquestion=question)
+                    self.assertEqual(normset.get(sex=sex, age=age)["id"], norm["id"])
+                    self.assertEqual(normset.get(sex=sex, age=age)["ns"], norm["ns"])
+
+    def test_invalid_norms(self) -> None:
+        with self.assertRaises(AssertionError):
+            NormSet(name="", question=120, norms=[])
+
+        with self.assertRaises(AssertionError):
+            NormSet(name="test", question=100, norms=[])
+
+        with self.assertRaises(BaseException) as e:
+            NormSet(
+                name="test",
+                question=120,
+                norms=[norm_group(1, "M", [10, 30]), norm_group(2, "M", [30, 110])],
+            )
+        self.assertEqual(
+            str(e.exception), "The norms 1 and 2 overlap at sex M and age 30!"
+        )
+
+        with self.assertRaises(BaseException):
+            NormSet(
+                name="test",
+                question=120,
+                norms=[norm_group(1, "M", [10, 20]), norm_group(1, "F", [10, 20])],
+            )
+
+        for norm in (
+            norm_group(1, "X", [10, 20]),
+            norm_group(1, "M", [5, 20]),
+            norm_group(1, "M", [30, 20]),
+            {**norm_group(1, "M", [10, 20]), "ns": [1] * 70},
+            {**norm_group(1, "M", [10, 20]), "ns": [1] * 70 + [0]},
+            {"id": 1, "sex": "M"},
+            "norm",
+        ):
+            with self.assertRaises(BaseException):
+                NormSet(name="test", question=120, norms=[norm])
+
+        normset = NormSet(
+            name="test", question=120, norms=[norm_group(1, "m", [10, 20])]
+        )
+        self.assertEqual(normset.get(sex="M", age=20)["id"], 1)
+        with self.assertRaises(BaseException) as e:
+            normset.get(sex="M", age=21)
+        self.assertEqual(
+            str(e.exception), "The norm set test has no norm for sex M and age 21!"
+        )
+
+    def test_save_load(self) -> None:
+        normset = NormSet.default(question=300)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "default.json")
+            normset.save(path=path)
+            loaded = NormSet.load(path=path)
+            self.assertEqual(loaded.name, "johnson-300")
+            self.assertEqual(loaded.to_dict(), normset.to_dict())
+            self.assertEqual(NormSet.load(path=path, name="other").name, "other")
+
+            builder = NormBuilder(question=300)
+            for i in range(10):
+                builder.add(sex="F", age=30, answers=sample_answers(300, seed=i))
+            path = os.path.join(tmp, "brazil.json")
+            builder.save(path=path)
+
+            loaded = NormSet.load(path=path)
+            self.assertEqual(loaded.name, "brazil")
+            self.assertEqual(list(loaded.norms), [4])
+            self.assertEqual(loaded.get(sex="F", age=110)["category"], "adult women")
+
+    def test_norm_sets(self) -> None:
+        builder = NormBuilder(question=120)
+        for i in range(20):
+            builder.add(sex="M", age=40, answers=sample_answers(120, seed=i))
+        custom = NormSet(
+            name="custom",
+            question=120,
+            norms=[
+                builder.table()[2],
+                *[
+                    x
+                    for x in NormSet.default(question=120).to_dict()["norms"]
+                    if x["id"] != 2
+                ],
+            ],
+        )
+
+        registry = NormSets()
+        registry.add(normset=NormSet.default(question=120))
+        registry.add(normset=custom)
+        self.assertEqual(registry.names(), ["custom", "johnson-120"])
+        self.assertTrue("custom" in registry)
+
+        with self.assertRaises(BaseException):
+            registry.get(name="other")
+
+        ipip, answers = IpipNeo(question=120), sample_answers(120, seed=100)
+        default = ipip.compute(sex="M", age=40, answers=answers)
+
+        result = ipip.compute(
+            sex="M", age=40, answers=answers, norms=registry.get("johnson-120")
+        )
+        self.assertEqual(result.get("person"), default.get("person"))
+
+        result = ipip.compute(
+            sex="M", age=40, answers=answers, norms=registry.get("custom")
+        )
+        self.assertNotEqual(result.get("person"), default.get("person"))
+        self.assertEqual(
+            ipip.compute(sex="M", age=40, answers=answers).get("person"),
+            default.get("person"),
+        )
+
+        ipip.set_norms(norms=custom)
+        self.assertEqual(
+            ipip.compute(sex="M", age=40, answers=answers).get("person"),
+            result.get("person"),
+        )
+        self.assertEqual(
+            ipip.compute(sex="F", age=40, answers=answers).get("person"),
+            IpipNeo(question=120).compute(sex="F", age=40, answers=answers)["person"],
+        )
+
+        matrix = AnswerMatrix(question=120)
+        matrix.append(sex="M", age=40, answers=organize_list_json(answers))
+        self.assertEqual(
+            IpipNeo(question=120)
+            .compute_batch(matrix=matrix, norms=custom)[0]
+            .get("person"),
+            result.get("person"),
+        )
+
+        registry.remove(name="custom")
+        self.assertEqual(registry.names(), ["johnson-120"])
+
+        with self.assertRaises(BaseException):
+            IpipNeo(question=300).compute(
+                sex="M", age=40, answers=answers, norms=custom
+            )
+
+        with self.assertRaises(BaseException):
+            IpipNeo(question=300).set_norms(norms=custom)
+
+        with self.assertRaises(BaseException):
+            raise_if_norm_set_is_invalid(normset={}, question=120)
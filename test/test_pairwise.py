@@ -0,0 +1,118 @@
+"""Unit tests for Pairwise."""
+
+import os
+import random
+import tempfile
+import unittest
+
+from ipipneo.neighbors import ProfileIndex
+from ipipneo.pairwise import PairwiseMatrix, load_matrix, load_pairs
+
+
+def random_index(count: int, seed: int, dimension: int = 30) -> ProfileIndex:
+    values = random.Random(seed)
+    return ProfileIndex(dimension=dimension).build(
+        ids=[f"p{i}" for i in range(count)],
+        vectors=[
+            [values.uniform(0, 100) for _ in range(dimension)] for _ in range(count)
+        ],
+    )
+
+
+class TestPairwise(unittest.TestCase):
+    def test_tiles(self) -> None:
+        pairwise = PairwiseMatrix(index=random_index(count=25, seed=1), tile=10)
+        self.assertEqual(
+            pairwise.tiles(),
+            [
+                (0, 10, 0, 10),
+                (0, 10, 10, 20),
+                (0, 10, 20, 25),
+                (10, 20, 10, 20),
+                (10, 20, 20, 25),
+                (20, 25, 20, 25),
+            ],
+        )
+
+        with self.assertRaises(AssertionError):
+            PairwiseMatrix(index=random_index(count=2, seed=1), metric="other")
+
+    def test_save(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for dimension, metric, workers in (
+                (30, "euclidean", 1),
+                (30, "euclidean", 2),
+                (30, "cosine", 1),
+                (30, "cosine", 2),
+                (35, "euclidean", 1),
+                (35, "cosine", 2),
+            ):
+                index = random_index(count=45, seed=2, dimension=dimension)
+                path = os.path.join(tmp, f"{dimension}-{metric}-{workers}.bin")
+                PairwiseMatrix(
+                    index=index, metric=metric, tile=16, workers=workers
+                ).save(path=path)
+
+                matrix = load_matrix(path=path)
+                self.assertEqual(matrix.shape, (45, 45))
+                for i in (0, 17, 44):
+                    nearest = index.search(
+                        values=index.vector(index=i), k=45, metric=metric
+                    )
+                    for id, distance in nearest:
+                        j = int(id[1:])
+                        self.assertAlmostEqual(matrix[i, j], distance, places=3)
+                        self.assertEqual(matrix[i, j], matrix[j, i])
+                del matrix
+
+            path = os.path.join(tmp, "empty.bin")
+            PairwiseMatrix(index=ProfileIndex()).save(path=path)
+            self.assertEqual(len(load_matrix(path=path)), 0)
+
+    def test_pairs(self) -> None:
+        index = random_index(count=60, seed=3)
+        index.add(id="copy", values=index.vector(index=5))
+
+        expected = sorted(
+            (index.ids[i], index.ids[j])
+            for i in range(61)
+            for j in range(i + 1, 61)
+            if dict(index.search(values=index.vector(i), k=61))[index.ids[j]] <= 150
+        )
+        for workers in (1, 3):
+            pairs = list(
+                PairwiseMatrix(index=index, tile=8, workers=workers).pairs(
+                    threshold=150
+                )
+            )
+            self.assertEqual(sorted((a, b) for a, b, _ in pairs), expected)
+            self.assertIn(("p5", "copy", 0.0), pairs)
+
+        self.assertEqual(
+            list(PairwiseMatrix(index=ProfileIndex()).pairs(threshold=1)), []
+        )
+
+    def test_save_pairs(self) -> None:
+        index = random_index(count=40, seed=4)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path, pairs = os.path.join(tmp, "matrix.bin"), os.path.join(tmp, "p.bin")
+            for workers in (1, 2):
+                count = PairwiseMatrix(index=index, tile=16, workers=workers).save(
+                    path=path, pairs=pairs, threshold=190
+                )
+                matrix = load_matrix(path=path)
+                expected = [
+                    (i, j, float(matrix[i, j]))
+                    for i in range(40)
+                    for j in range(i + 1, 40)
+                    if matrix[i, j] <= 190
+                ]
+                found = sorted(load_pairs(path=pairs, block=7))
+                self.assertEqual(count, len(expected))
+                self.assertEqual(found, expected)
+                del matrix
+
+            self.assertEqual(sorted(os.listdir(tmp)), ["matrix.bin", "p.bin"])
+            with self.assertRaises(AssertionError):
+                PairwiseMatrix(index=index).save(path=path, pairs=pairs)
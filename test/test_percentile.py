@@ -0,0 +1,151 @@
+"""Unit tests for Percentile."""
+
+import os
+import random
+import statistics
+import tempfile
+import unittest
+from array import array
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.percentile import (EmpiricalPercentile, PercentileBuilder,
+                                quantile_knots, rank, rank_batch)
+from ipipneo.utility import organize_list_json, result_scores
+
+
+class BatchPercentile(EmpiricalPercentile):
+    def __init__(self, question: int, tables: dict = None) -> None:
+        super().__init__(question=question, tables=tables)
+        self.groups = []
+
+    def percentiles(self, norm: int, sums: list) -> list:
+        raise AssertionError("The batches must use (percentiles_batch)!")
+
+    def percentiles_batch(self, norm: int, rows: list) -> list:
+        self.groups.append((norm, len(rows)))
+        return super().percentiles_batch(norm=norm, rows=rows)
+
+
+class TestPercentile(unittest.TestCase):
+    def test_quantile_knots(self) -> None:
+        values = random.Random(1)
+        data = [values.randint(4, 20) for _ in range(500)]
+        counts = {x: data.count(x) for x in set(data)}
+
+        knots = quantile_knots(counts=counts, quantiles=11)
+        expected = statistics.quantiles(data, n=10, method="inclusive")
+        self.assertEqual(knots[0], min(data))
+        self.assertEqual(knots[-1], max(data))
+        for x, y in zip(knots[1:-1], expected):
+            self.assertAlmostEqual(x, y, places=5)
+
+    def test_rank(self) -> None:
+        knots = array("f", [1, 2, 3, 4, 5])
+        self.assertEqual(rank(knots=knots, value=3), 50.0)
+        self.assertEqual(rank(knots=knots, value=2.5), 37.5)
+        self.assertEqual(rank(knots=knots, value=0), 1.0)
+        self.assertEqual(rank(knots=knots, value=9), 99.0)
+        self.assertEqual(rank(knots=knots, value=1.02), 1.0)
+
+        knots = quantile_knots(counts={1: 50, 2: 50}, quantiles=101)
+        self.assertEqual(rank(knots=knots, value=1.5), 50.0)
+        self.assertAlmostEqual(rank(knots=knots, value=1), 24.5)
+
+        values = [0, 1, 1.001, 1.2, 1.5, 2, 2.999, 3]
+        self.assertEqual(
+            rank_batch(knots=knots, values=values),
+            [rank(knots=knots, value=x) for x in values],
+        )
+
+    def test_builder(self) -> None:
+        builder, matrix = PercentileBuilder(question=120), AnswerMatrix(question=120)
+        for i in range(200):
+            answers = sample_answers(question=120, seed=i)
+            matrix.append(sex="M", age=40, answers=organize_list_json(answers))
+            builder.add(sex="F", age=18, answers=answers)
+        builder.merge(other=PercentileBuilder(question=120)).add_matrix(matrix=matrix)
+
+        self.assertEqual(sorted(builder.table()), [2, 5])
+        self.assertEqual(builder.counts[2], builder.counts[5])
+        self.assertEqual(sum(builder.counts[2][0].values()), 200)
+
+        engine = builder.build()
+        self.assertTrue(2 in engine)
+        self.assertFalse(1 in engine)
+        self.assertEqual(len(engine.tables[2]), 35)
+        self.assertEqual(len(engine.tables[2][0]), 1001)
+        self.assertEqual(engine.tables[2][0].typecode, "f")
+
+        # The mid-rank of the sample is close to the percentile.
+        column = builder.counts[2][7]
+        for value in column:
+            below = sum(n for x, n in column.items() if x < value)
+            expected = 100 * (below + column[value] / 2) / 200
+            self.assertLess(
+                abs(engine.percentiles(norm=2, sums=[value] * 35)[7] - expected), 1
+            )
+
+        rows = [[random.Random(i).randint(4, 20)] * 35 for i in range(20)]
+        self.assertEqual(
+            engine.percentiles_batch(norm=2, rows=rows),
+            [engine.percentiles(norm=2, sums=x) for x in rows],
+        )
+
+        self.assertEqual(builder.build(min_count=201).tables, {})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "percentiles.json")
+            engine.save(path=path)
+            self.assertEqual(EmpiricalPercentile.load(path=path).tables, engine.tables)
+
+        with self.assertRaises(AssertionError):
+            EmpiricalPercentile(question=120, tables={1: [[2, 1]] * 35})
+
+        with self.assertRaises(AssertionError):
+            EmpiricalPercentile(question=120, tables={1: [[1, 2]] * 34})
+
+    def test_set_percentiles(self) -> None:
+        builder = PercentileBuilder(question=120)
+        for i in range(300):
+            builder.add(sex="M", age=40, answers=sample_answers(question=120, seed=i))
+        engine = builder.build()
+
+        ipip, answers = IpipNeo(question=120), sample_answers(question=120, seed=500)
+        default = ipip.compute(sex="M", age=40, answers=answers)
+
+        ipip.set_percentiles(percentiles=engine)
+        result = ipip.compute(sex="M", age=40, answers=answers)
+        self.assertNotEqual(result_scores(result), result_scores(default))
+        self.assertTrue(all(1 <= x <= 99 for x in result_scores(result)))
+        self.assertEqual(
+            ipip.compute(sex="F", age=40, answers=answers)["person"],
+            IpipNeo(question=120).compute(sex="F", age=40, answers=answers)["person"],
+        )
+
+        matrix = AnswerMatrix(question=120)
+        matrix.append(sex="M", age=40, answers=organize_list_json(answers))
+        matrix.append(sex="F", age=40, answers=organize_list_json(answers))
+        self.assertEqual(
+            ipip.compute_batch(matrix=matrix)[0]["person"], result["person"]
+        )
+
+        # The batches rank each norm group at once, never row by row.
+        batch_only = BatchPercentile(question=120, tables=engine.tables)
+        ipip.set_percentiles(percentiles=batch_only)
+        results = ipip.compute_batch(matrix=matrix)
+        self.assertEqual(results[0]["person"], result["person"])
+        self.assertEqual(batch_only.groups, [(2, 1)])
+
+        ipip.set_percentiles(percentiles=None)
+        self.assertEqual(
+            ipip.compute(sex="M", age=40, answers=answers)["person"],
+            default["person"],
+        )
+
+        with self.assertRaises(AssertionError):
+            IpipNeo(question=300).set_percentiles(percentiles=engine)
+
+        with self.assertRaises(AssertionError):
+            ipip.set_percentiles(percentiles={})
@@ -0,0 +1,68 @@
+"""Unit tests for Pipeline."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from ipipneo.batch import read_csv
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.pipeline import PIPELINE_STAGES, ScoringPipeline, _state
+from ipipneo.utility import organize_list_json
+
+
+def write_answers(path: str, count: int) -> None:
+    with open(path, "w") as f:
+        f.write(",".join(["sex", "age"] + [f"q{i}" for i in range(1, 121)]) + "\n")
+        for i in range(count):
+            answers = organize_list_json(sample_answers(question=120, seed=i))
+            f.write(",".join(["MF"[i % 2], str(20 + i)] + list(map(str, answers))))
+            f.write("\n")
+
+
+class TestPipeline(unittest.TestCase):
+    def test_run(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path, output = os.path.join(tmp, "in.csv"), os.path.join(tmp, "out.jsonl")
+            write_answers(path=path, count=25)
+            expected = IpipNeo(question=120).compute_batch(
+                matrix=next(read_csv(path=path, question=120))
+            )
+
+            for workers in (1, 2):
+                pipeline = ScoringPipeline(
+                    question=120, chunk_size=4, queue_size=1, workers=workers
+                )
+                stats = pipeline.run(path=path, output=output)
+
+                with open(output) as f:
+                    results = [json.loads(x) for x in f]
+                self.assertEqual(
+                    [x["person"] for x in results], [x["person"] for x in expected]
+                )
+                self.assertEqual(sorted(stats["stages"]), sorted(PIPELINE_STAGES))
+                for stage in stats["stages"].values():
+                    self.assertEqual(stage["rows"], 25)
+                    self.assertEqual(stage["chunks"], 7)
+                    self.assertLessEqual(stage["max_queue"], 1)
+                    self.assertEqual(stage["queue"], 0)
+                self.assertGreater(stats["stages"]["score"]["rate"], 0)
+                self.assertEqual(_state, {})
+                self.assertGreater(stats["elapsed"], 0)
+
+    def test_error(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path, output = os.path.join(tmp, "in.csv"), os.path.join(tmp, "out.jsonl")
+            write_answers(path=path, count=10)
+            with open(path, "a") as f:
+                f.write("M,30," + ",".join(["9"] * 120) + "\n")
+
+            with self.assertRaises(BaseException):
+                ScoringPipeline(question=120, chunk_size=3).run(
+                    path=path, output=output
+                )
+            self.assertEqual(os.listdir(tmp), ["in.csv"])
+
+        with self.assertRaises(AssertionError):
+            ScoringPipeline(question=120, queue_size=0)
@@ -0,0 +1,111 @@
+"""Unit tests for Profiler."""
+
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from ipipneo.instrument import StageRecorder
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.profiler import SampledProfiler, format_collapsed, trace_stacks
+
+
+def load_mock_answers_120() -> dict:
+    with open("test/mock/answers-test-1.json") as f:
+        data = json.load(f)
+    return data
+
+
+class TestProfiler(unittest.TestCase):
+    def test_invalid_params(self) -> None:
+        with self.assertRaises(AssertionError):
+            SampledProfiler(rate=2)
+
+        with self.assertRaises(AssertionError):
+            SampledProfiler(interval=-1)
+
+        with self.assertRaises(ValueError):
+            SampledProfiler(format="svg")
+
+        with self.assertRaises(AssertionError):
+            SampledProfiler().dump()
+
+        with self.assertRaises(AssertionError):
+            IpipNeo(question=120).set_profiler(profiler=object())
+
+    def test_sample(self) -> None:
+        profiler = SampledProfiler(rate=0.1, seed=1)
+        sampled = sum(profiler.sample() for _ in range(10000))
+        self.assertEqual(profiler.calls, 10000)
+        self.assertTrue(800 < sampled < 1200)
+
+        self.assertFalse(any(SampledProfiler(rate=0).sample() for _ in range(100)))
+        self.assertTrue(all(SampledProfiler(rate=1).sample() for _ in range(100)))
+
+    def test_compute_pstats(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = SampledProfiler(rate=1, directory=tmp, interval=3600)
+            ipip = IpipNeo(question=120)
+            ipip.set_profiler(profiler=profiler)
+
+            expected = IpipNeo(question=120).compute(
+                sex="M", age=40, answers=load_mock_answers_120()
+            )
+            for _ in range(3):
+                result = ipip.compute(sex="M", age=40, answers=load_mock_answers_120())
+            self.assertEqual(result.get("person"), expected.get("person"))
+
+            self.assertEqual(profiler.sampled, 3)
+            self.assertEqual(profiler.files, [])
+
+            functions = [x[2] for x in profiler.stats().stats]
+            self.assertIn("deepcopy", functions)
+            self.assertIn("create_big5_dict", functions)
+
+            path = profiler.dump()
+            self.assertTrue(path.endswith(".pstats"))
+            self.assertTrue(os.path.exists(path))
+            self.assertIsNone(profiler.stats())
+            self.assertIsNone(profiler.dump())
+            self.assertTrue(pstats.Stats(path).total_calls > 0)
+
+    def test_compute_collapsed(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = SampledProfiler(
+                rate=1, directory=tmp, interval=0, format="collapsed"
+            )
+            ipip = IpipNeo(question=300)
+            ipip.set_profiler(profiler=profiler)
+            ipip.set_recorder(recorder=StageRecorder())
+
+            with open("test/mock/answers-test-4.json") as f:
+                answers = json.load(f)
+            ipip.compute(sex="F", age=30, answers=answers)
+
+            self.assertEqual(len(profiler.files), 1)
+            with open(profiler.files[0]) as f:
+                lines = f.read().splitlines()
+
+            self.assertTrue(len(lines))
+            self.assertTrue(any("ipipneo.utility:reverse_scored" in x for x in lines))
+            self.assertTrue(all(int(x.rsplit(" ", 1)[1]) > 0 for x in lines))
+
+            ipip.set_profiler(profiler=None)
+            ipip.set_recorder(recorder=None)
+            ipip.compute(sex="F", age=30, answers=answers)
+            self.assertEqual(profiler.sampled, 1)
+
+    def test_trace_stacks(self) -> None:
+        def inner() -> int:
+            return sum(range(100000))
+
+        def outer() -> int:
+            return inner()
+
+        stacks = {}
+        self.assertEqual(trace_stacks(stacks, outer), sum(range(100000)))
+        self.assertTrue(any(x[-1].endswith("<locals>.inner") for x in stacks))
+        self.assertTrue(any(x[-1] == "builtins:sum" for x in stacks))
+
+        self.assertEqual(format_collapsed({("a", "b"): 0.000002, ("a",): 0}), "a;b 2\n")
@@ -0,0 +1,135 @@
+"""Unit tests for Quality."""
+
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.quality import (ResponseQuality, correlation, invert,
+                             spearman_brown)
+from ipipneo.reverse import IPIP_NEO_ITEMS_REVERSED_120
+
+
+def consistent_matrix(count: int, seed: int) -> AnswerMatrix:
+    """Answers driven by one latent value per facet, before the reverse scoring."""
+    values, matrix = random.Random(seed), AnswerMatrix(question=120)
+    for _ in range(count):
+        latent = [values.gauss(0, 1) for _ in range(30)]
+        answers = []
+        for j in range(120):
+            x = min(5, max(1, round(3 + latent[j % 30] + values.gauss(0, 0.6))))
+            answers.append(6 - x if j + 1 in IPIP_NEO_ITEMS_REVERSED_120 else x)
+        matrix.append(sex="M", age=30, answers=answers)
+    return matrix
+
+
+class TestQuality(unittest.TestCase):
+    def test_helpers(self) -> None:
+        matrix = [[4, 1, 2], [1, 3, 0], [2, 0, 5]]
+        inverse = invert(matrix=matrix)
+        for i in range(3):
+            for j in range(3):
+                value = sum(matrix[i][k] * inverse[k][j] for k in range(3))
+                self.assertAlmostEqual(value, 1.0 if i == j else 0.0)
+
+        with self.assertRaises(BaseException):
+            invert(matrix=[[1, 2], [2, 4]])
+
+        self.assertAlmostEqual(correlation(x=[1, 2, 3], y=[2, 4, 7]), 0.9933992677)
+        self.assertIsNone(correlation(x=[1, 1, 1], y=[1, 2, 3]))
+        self.assertEqual(spearman_brown(r=0.5), 2 / 3)
+        self.assertIsNone(spearman_brown(r=None))
+
+    def test_assess(self) -> None:
+        matrix = consistent_matrix(count=200, seed=1)
+        quality = ResponseQuality(question=120)
+        self.assertIsNone(quality.reference())
+
+        rows = quality.assess(matrix=matrix)
+        self.assertEqual(len(rows), 200)
+        self.assertTrue(all(x["mahalanobis"] is None for x in rows))
+        self.assertLess(sum(1 for x in rows if x["flags"]) / len(rows), 0.1)
+
+        quality = ResponseQuality.from_dict(
+            data=json.loads(json.dumps(quality.fit(matrix=matrix).to_dict()))
+        )
+        rows = quality.assess(matrix=matrix)
+        self.assertAlmostEqual(sum(x["mahalanobis"] for x in rows), 199 * 30, places=4)
+
+        values, careless = random.Random(2), AnswerMatrix(question=120)
+        careless.append(sex="F", age=40, answers=[3] * 120)
+        careless.append(sex="F", age=40, answers=[1, 5] * 60)
+        careless.append(
+            sex="F", age=40, answers=[values.randint(1, 5) for _ in range(120)]
+        )
+        straight, alternate, random_row = quality.assess(matrix=careless)
+
+        self.assertEqual(straight["long_string"], 120)
+        self.assertEqual(straight["irv"], 0)
+        self.assertIsNone(straight["even_odd"])
+        self.assertEqual(straight["flags"], ["long_string", "irv", "even_odd"])
+        self.assertEqual(alternate["long_string"], 1)
+        self.assertEqual(alternate["irv"], 2)
+        self.assertGreater(sum(x["even_odd"] for x in rows) / len(rows), 0.8)
+        self.assertLess(random_row["even_odd"], 0.5)
+        self.assertLess(random_row["mahalanobis"], quality.max_mahalanobis)
+
+        with self.assertRaises(AssertionError):
+            quality.assess(matrix=AnswerMatrix(question=300))
+
+    def test_compute_batch(self) -> None:
+        matrix = consistent_matrix(count=5, seed=3)
+        matrix.append(sex="M", age=30, answers=[5] * 120)
+
+        quality = ResponseQuality(question=120)
+        results = IpipNeo(question=120).compute_batch(matrix=matrix, quality=quality)
+
+        self.assertEqual([x["quality"] for x in results], quality.assess(matrix=matrix))
+        self.assertIn("long_string", results[-1]["quality"]["flags"])
+        self.assertNotIn("quality", IpipNeo(question=120).compute_batch(matrix)[0])
+
+    def test_compute_batch_route(self) -> None:
+        matrix = consistent_matrix(count=6, seed=4)
+        matrix.append(sex="M", age=30, answers=[5] * 120)
+        matrix.append(sex="F", age=40, answers=[1] * 120)
+
+        quality, routed = ResponseQuality(question=120), {}
+
+        def route(position: int, indices: dict) -> bool:
+            routed[position] = indices
+            return "long_string" in indices["flags"]
+
+        ipip = IpipNeo(question=120)
+        results = ipip.compute_batch(matrix=matrix, quality=quality, route=route)
+        assessed = quality.assess(matrix=matrix)
+
+        self.assertEqual(routed, {i: x for i, x in enumerate(assessed) if x["flags"]})
+        self.assertEqual(len(results), 6)
+        self.assertEqual([x["quality"] for x in results], assessed[:6])
+        expected = ipip.compute_batch(matrix=matrix.select(rows=range(6)))
+        self.assertEqual(
+            [x["person"] for x in results], [x["person"] for x in expected]
+        )
+
+        with self.assertRaises(AssertionError):
+            ipip.compute_batch(matrix=matrix, route=route)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.csv")
+            with open(path, "w") as f:
+                f.write(",".join(["sex", "age"] + [f"q{i}" for i in range(1, 121)]))
+                for i in range(len(matrix)):
+                    row = [matrix.sex[i], str(matrix.age[i])]
+                    f.write("\n" + ",".join(row + list(map(str, matrix.row(i)))))
+
+            routed.clear()
+            chunks = list(
+                ipip.compute_csv(path=path, chunk_size=3, quality=quality, route=route)
+            )
+            self.assertEqual([len(x) for x in chunks], [3, 3, 0])
+            self.assertEqual(
+                routed, {i: x for i, x in enumerate(assessed) if x["flags"]}
+            )
@@ -0,0 +1,57 @@
+"""Unit tests for Query."""
+
+import tempfile
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.query import ScoreQuery
+from ipipneo.store import ResultStore
+
+
+class TestQuery(unittest.TestCase):
+    def test_queries(self) -> None:
+        ipip = IpipNeo(question=120)
+        results = [
+            ipip.compute(sex="M", age=30, answers=sample_answers(question=120, seed=i))
+            for i in range(60)
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultStore(path=tmp)
+            store.extend(results=results[:45])
+            query = ScoreQuery(store=store, block=8)
+
+            low, high = query.zones(name="assertiveness")
+            self.assertEqual(len(low), 6)
+
+            store.extend(results=results[45:])
+            low, high = query.zones(name="assertiveness")
+            self.assertEqual(len(low), 8)
+
+            values = store.select(columns=["assertiveness"])["assertiveness"]
+            self.assertEqual(low[0], min(values[:8]))
+            self.assertEqual(high[7], max(values[56:]))
+
+            expected = sorted(range(60), key=lambda i: (-values[i], i))[:10]
+            top = query.top(name="assertiveness", k=10)
+            self.assertEqual([i for i, _ in top], expected)
+            self.assertEqual([x for _, x in top], [values[i] for i in expected])
+
+            expected = sorted(range(60), key=lambda i: (values[i], i))[:5]
+            bottom = query.top(name="assertiveness", k=5, largest=False)
+            self.assertEqual([i for i, _ in bottom], expected)
+            self.assertEqual(len(query.top(name="assertiveness", k=100)), 60)
+
+            values = store.select(columns=["openness"])["openness"]
+            rows = query.range(name="openness", low=40, high=80)
+            self.assertEqual(rows, [i for i, x in enumerate(values) if 40 <= x <= 80])
+            self.assertEqual(query.count(name="openness", low=0, high=100), 60)
+            self.assertEqual(query.range(name="age", low=30, high=30), list(range(60)))
+
+            with self.assertRaises(BaseException):
+                query.top(name="id")
+
+            with self.assertRaises(AssertionError):
+                query.top(name="openness", k=0)
+            store.close()
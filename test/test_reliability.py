@@ -0,0 +1,113 @@
+"""Unit tests for Reliability."""
+
+import copy
+import json
+import random
+import statistics
+import unittest
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.reliability import ReliabilityStats
+from ipipneo.reverse import IPIP_NEO_ITEMS_REVERSED_120, ReverseScored120
+
+
+def consistent_answers(count: int, seed: int) -> list:
+    """Answers driven by one latent value per facet, before the reverse scoring."""
+    values = random.Random(seed)
+    people = []
+    for _ in range(count):
+        latent = [values.gauss(0, 1) for _ in range(30)]
+        answers = []
+        for j in range(120):
+            x = min(5, max(1, round(3 + latent[j % 30] + values.gauss(0, 0.8))))
+            answers.append(6 - x if j + 1 in IPIP_NEO_ITEMS_REVERSED_120 else x)
+        people.append(answers)
+    return people
+
+
+def alpha(rows: list) -> float:
+    k = len(rows[0])
+    variances = sum(statistics.variance(column) for column in zip(*rows))
+    return k / (k - 1) * (1 - variances / statistics.variance(map(sum, rows)))
+
+
+class TestReliability(unittest.TestCase):
+    def test_report(self) -> None:
+        people = consistent_answers(count=200, seed=1)
+        stats = ReliabilityStats(question=120)
+        reversed = []
+        for answers in people:
+            data = {
+                "answers": [
+                    {"id_question": i + 1, "id_select": x}
+                    for i, x in enumerate(answers)
+                ]
+            }
+            data = ReverseScored120(answers=data)
+            reversed.append([x["id_select"] for x in data["answers"]])
+            stats.update(answers=data)
+
+        report = stats.report()
+        self.assertEqual(report["count"], 200)
+        self.assertEqual(list(report["domains"])[0], "openness")
+        self.assertEqual(len(report["facets"]), 30)
+
+        anxiety = report["facets"]["anxiety"]
+        self.assertEqual([x["item"] for x in anxiety["items"]], [1, 31, 61, 91])
+        rows = [[x[0], x[30], x[60], x[90]] for x in reversed]
+        self.assertAlmostEqual(anxiety["alpha"], alpha(rows), places=9)
+        self.assertGreater(anxiety["alpha"], 0.7)
+        self.assertAlmostEqual(
+            anxiety["items"][1]["mean"], statistics.mean(x[30] for x in reversed)
+        )
+        self.assertAlmostEqual(
+            anxiety["items"][0]["correlation"],
+            statistics.correlation(
+                [x[0] for x in rows], [x[1] + x[2] + x[3] for x in rows]
+            ),
+            places=9,
+        )
+
+        neuroticism = report["domains"]["neuroticism"]
+        self.assertEqual(len(neuroticism["items"]), 24)
+        rows = [x[0::5] for x in reversed]
+        self.assertAlmostEqual(neuroticism["alpha"], alpha(rows), places=9)
+
+        with self.assertRaises(AssertionError):
+            ReliabilityStats(question=120).report()
+
+        with self.assertRaises(AssertionError):
+            stats.update(answers=[1] * 10)
+
+    def test_matrix_merge(self) -> None:
+        people = consistent_answers(count=60, seed=2)
+
+        matrix, single = AnswerMatrix(question=120), ReliabilityStats(question=120)
+        for answers in people[:40]:
+            matrix.append(sex="M", age=30, answers=answers)
+        single.update_matrix(matrix=matrix)
+
+        shard = ReliabilityStats(question=120)
+        for answers in people[40:]:
+            data = {
+                "answers": [
+                    {"id_question": i + 1, "id_select": x}
+                    for i, x in enumerate(answers)
+                ]
+            }
+            shard.update(answers=ReverseScored120(answers=copy.deepcopy(data)))
+
+        merged = ReliabilityStats.from_dict(json.loads(json.dumps(single.to_dict())))
+        merged.merge(other=shard)
+
+        total = ReliabilityStats(question=120)
+        matrix = AnswerMatrix(question=120)
+        for answers in people:
+            matrix.append(sex="F", age=50, answers=answers)
+        total.update_matrix(matrix=matrix)
+
+        self.assertEqual(merged.to_dict(), total.to_dict())
+        self.assertEqual(merged.report(), total.report())
+
+        with self.assertRaises(AssertionError):
+            merged.merge(other=ReliabilityStats(question=300))
@@ -0,0 +1,109 @@
+"""Unit tests for Shared."""
+
+import unittest
+from array import array
+
+from ipipneo.batch import AnswerMatrix
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.norm import Norm
+from ipipneo.normset import NormSet
+from ipipneo.percentile import PercentileBuilder
+from ipipneo.shared import SCORES, SharedBatch
+from ipipneo.store import LEVELS
+from ipipneo.utility import organize_list_json, result_levels, result_scores
+
+
+def sample_matrix(count: int) -> AnswerMatrix:
+    matrix = AnswerMatrix(question=120)
+    for i in range(count):
+        answers = organize_list_json(sample_answers(question=120, seed=i))
+        matrix.append(sex="MF"[i % 2], age=18 + i * 3, answers=answers)
+    return matrix
+
+
+class TestShared(unittest.TestCase):
+    def test_score(self) -> None:
+        matrix = sample_matrix(count=20)
+        expected = IpipNeo(question=120).compute_batch(matrix=matrix)
+
+        for workers in (1, 2):
+            with SharedBatch(question=120, workers=workers, slice_rows=6) as batch:
+                scores, levels = batch.score(matrix=matrix)
+                self.assertEqual(len(scores), 20 * SCORES)
+                self.assertEqual(len(levels), 20 * SCORES)
+
+                for i, result in enumerate(expected):
+                    row = slice(i * SCORES, (i + 1) * SCORES)
+                    for a, b in zip(scores[row], result_scores(result=result)):
+                        self.assertAlmostEqual(a, b, places=4)
+                    self.assertEqual(
+                        [LEVELS[x] for x in levels[row]], result_levels(result=result)
+                    )
+
+                self.assertEqual(
+                    batch.score(matrix=AnswerMatrix(question=120)), (scores[:0], b"")
+                )
+
+    def test_score_into(self) -> None:
+        builder = PercentileBuilder(question=120)
+        for i in range(200):
+            builder.add(sex="M", age=40, answers=sample_answers(question=120, seed=i))
+
+        matrix = sample_matrix(count=12)
+        for setup in ("default", "percentiles", "levels"):
+            ipip = IpipNeo(question=120)
+            if setup == "percentiles":
+                ipip.set_percentiles(percentiles=builder.build())
+            if setup == "levels":
+                ipip.set_new_norm_scale(scale_min=40, scale_max=60)
+                ipip.set_new_facet_level(low_min=30, high_max=70)
+
+            scores, levels = array("f", [0]) * (SCORES + 12 * SCORES), bytearray(
+                SCORES + 12 * SCORES
+            )
+            ipip._compute_batch_into(
+                matrix=matrix, scores=scores, levels=levels, offset=SCORES
+            )
+            self.assertEqual(scores[:SCORES], array("f", [0]) * SCORES)
+
+            for i, result in enumerate(ipip.compute_batch(matrix=matrix)):
+                row = slice((i + 1) * SCORES, (i + 2) * SCORES)
+                self.assertEqual(
+                    scores[row], array("f", result_scores(result=result)), setup
+                )
+                self.assertEqual(
+                    [LEVELS[x] for x in levels[row]], result_levels(result=result)
+                )
+
+    def test_failed_slice(self) -> None:
+        norm = dict(Norm(sex="M", age=18, nquestion=120))
+        norms = NormSet(
+            name="young",
+            question=120,
+            norms=[{**norm, "sex": "M", "age": [10, 20]}],
+        )
+
+        with SharedBatch(question=120, workers=1, norms=norms) as batch:
+            matrix = sample_matrix(count=1)
+            self.assertEqual(len(batch.score(matrix=matrix)[0]), SCORES)
+
+            with self.assertRaises(BaseException) as e:
+                batch.score(matrix=sample_matrix(count=2))
+            self.assertEqual(
+                str(e.exception),
+                "The rows (0, 2) could not be scored: "
+                "The norm set young has no norm for sex F and age 21!",
+            )
+
+        with SharedBatch(question=120, workers=2, slice_rows=1, norms=norms) as batch:
+            with self.assertRaises(BaseException) as e:
+                batch.score(matrix=sample_matrix(count=3))
+            self.assertEqual(
+                str(e.exception),
+                "The rows (1, 2), (2, 3) could not be scored: "
+                "The norm set young has no norm for sex F and age 21!",
+            )
+
+        with self.assertRaises(AssertionError):
+            SharedBatch(question=120, slice_rows=0)
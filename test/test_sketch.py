@@ -0,0 +1,107 @@
+"""Unit tests for Sketch."""
+
+import json
+import random
+import unittest
+from bisect import bisect_left, bisect_right
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.sketch import CohortSketches, KllSketch, result_cohort
+from ipipneo.utility import result_scores
+
+
+def exact_rank(data: list, value: float) -> float:
+    low, high = bisect_left(data, value), bisect_right(data, value)
+    return 100 * (low + (high - low) / 2) / len(data)
+
+
+class TestSketch(unittest.TestCase):
+    def test_kll_sketch(self) -> None:
+        with self.assertRaises(AssertionError):
+            KllSketch(k=4)
+
+        sketch = KllSketch(seed=1)
+        self.assertIsNone(sketch.rank(value=1))
+        self.assertIsNone(sketch.quantile(q=0.5))
+
+        values = random.Random(1)
+        data = [values.gauss(50, 10) for _ in range(20000)]
+        for x in data:
+            sketch.update(value=x)
+
+        data.sort()
+        self.assertEqual(sketch.count, 20000)
+        self.assertLess(len(sketch), 700)
+        for x in (25, 40, 50, 60, 75):
+            self.assertLess(abs(sketch.rank(value=x) - exact_rank(data, x)), 2)
+        self.assertLess(abs(sketch.quantile(q=0.5) - data[10000]), 1)
+        self.assertEqual(sketch.rank(value=-1000), 0)
+        self.assertEqual(sketch.rank(value=1000), 100)
+        self.assertEqual(
+            sketch.rank_batch(values=[25, 50, 75]),
+            [sketch.rank(value=x) for x in (25, 50, 75)],
+        )
+
+        with self.assertRaises(AssertionError):
+            sketch.quantile(q=2)
+
+    def test_merge(self) -> None:
+        values = random.Random(2)
+        data = [values.uniform(0, 100) for _ in range(30000)]
+
+        shards = [KllSketch(k=100, seed=i) for i in range(3)]
+        for i, x in enumerate(data):
+            shards[i % 3].update(value=x)
+
+        merged = KllSketch.from_dict(data=json.loads(json.dumps(shards[0].to_dict())))
+        merged.merge(other=shards[1]).merge(other=shards[2]).merge(other=KllSketch())
+
+        data.sort()
+        self.assertEqual(merged.count, 30000)
+        self.assertLess(len(merged), 400)
+        for x in (10, 30, 50, 70, 90):
+            self.assertLess(abs(merged.rank(value=x) - exact_rank(data, x)), 3)
+
+        small = KllSketch()
+        for x in (1, 2, 2, 3):
+            small.update(value=x)
+        self.assertEqual(small.rank(value=2), 50)
+        self.assertEqual(small.rank(value=1), 12.5)
+
+    def test_cohort_sketches(self) -> None:
+        ipip = IpipNeo(question=120)
+        results = [
+            ipip.compute(sex="F", age=30, answers=sample_answers(question=120, seed=i))
+            for i in range(40)
+        ]
+
+        sketches, shard = CohortSketches(seed=1), CohortSketches(seed=2)
+        for result in results[:20]:
+            sketches.add_result(result=result)
+        for result in results[20:]:
+            shard.add_result(result=result)
+            shard.add_result(result=result, cohort="campaign")
+
+        merged = CohortSketches.from_dict(
+            data=json.loads(json.dumps(sketches.to_dict()))
+        )
+        merged.merge(other=shard)
+
+        self.assertEqual(result_cohort(result=results[0]), (120, "F", 6))
+        self.assertEqual(merged.count(cohort=(120, "F", 6)), 40)
+        self.assertEqual(merged.count(cohort="campaign"), 20)
+        self.assertEqual(merged.count(cohort="other"), 0)
+
+        ranks = merged.rank_result(result=results[0])
+        self.assertEqual(len(ranks), 35)
+        openness = sorted(result_scores(x)[0] for x in results)
+        self.assertEqual(
+            ranks["openness"], exact_rank(openness, result_scores(results[0])[0])
+        )
+
+        with self.assertRaises(BaseException):
+            merged.rank(cohort="other", values=[50] * 35)
+
+        with self.assertRaises(AssertionError):
+            merged.add(cohort="other", values=[50] * 5)
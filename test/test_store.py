@@ -0,0 +1,97 @@
+"""Unit tests for Store."""
+
+import os
+import tempfile
+import unittest
+
+from ipipneo.benchmark import sample_answers
+from ipipneo.ipipneo import IpipNeo
+from ipipneo.store import ResultStore
+from ipipneo.utility import result_levels, result_scores
+
+
+def sample_results(count: int) -> list:
+    ipip = IpipNeo(question=120)
+    return [
+        ipip.compute(
+            sex="MF"[i % 2], age=18 + i, answers=sample_answers(question=120, seed=i)
+        )
+        for i in range(count)
+    ]
+
+
+class TestStore(unittest.TestCase):
+    def test_append_select(self) -> None:
+        results = sample_results(count=30)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results")
+            store = ResultStore(path=path)
+            self.assertEqual(len(store), 0)
+            self.assertEqual(store.select(columns=["id"]), {"id": []})
+
+            store.extend(results=results[:20])
+            for result in results[20:]:
+                store.append(result=result)
+            self.assertEqual(len(store), 20)
+            self.assertEqual(store.count(), 30)
+            store.close()
+
+            store = ResultStore(path=path)
+            selected = store.select()
+            self.assertEqual(selected["id"], [x["id"] for x in results])
+            self.assertEqual(selected["age"], list(range(18, 48)))
+            self.assertEqual(selected["sex"][:3], ["M", "F", "M"])
+            self.assertEqual(selected["norm"][0], 1)
+            self.assertEqual(
+                selected["anxiety.level"], [result_levels(x)[29] for x in results]
+            )
+            for i, result in enumerate(results):
+                scores = result_scores(result=result)
+                self.assertAlmostEqual(selected["openness"][i], scores[0], places=4)
+                self.assertAlmostEqual(selected["anxiety"][i], scores[29], places=4)
+
+            where = {"sex": "F", "age": (20, 35), "openness": (0, 60)}
+            expected = [
+                x["id"]
+                for x in results
+                if x["person"]["sex"] == "F"
+                and 20 <= x["person"]["age"] <= 35
+                and result_scores(x)[0] <= 60
+            ]
+            self.assertEqual(store.select(columns=["id"], where=where)["id"], expected)
+            self.assertEqual(store.count(where=where), len(expected))
+            self.assertEqual(
+                store.count(where={"openness.level": "high"}),
+                sum(1 for x in results if result_levels(x)[0] == "high"),
+            )
+
+            with self.assertRaises(BaseException):
+                store.select(columns=["other"])
+
+            with self.assertRaises(BaseException):
+                store.filter(where={"id": "x"})
+            store.close()
+
+    def test_schema(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            ResultStore(path=tmp)
+            with open(os.path.join(tmp, "schema.json"), "w") as f:
+                f.write('{"version": 2, "columns": []}')
+
+            with self.assertRaises(BaseException):
+                ResultStore(path=tmp)
+
+    def test_partial_flush(self) -> None:
+        results = sample_results(count=3)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultStore(path=tmp)
+            store.extend(results=results[:2])
+            with open(os.path.join(tmp, "age.col"), "ab") as f:
+                f.write(b"\x63")
+
+            self.assertEqual(len(store), 2)
+            store.extend(results=results[2:])
+            self.assertEqual(store.select(columns=["age"])["age"], [18, 19, 20])
+            store.close()
@@ -3,11 +3,13 @@
 import json
 import unittest
 
+from ipipneo.ipipneo import IpipNeo
 from ipipneo.utility import (add_dict_footer, answers_is_valid,
                              big5_ocean_is_valid, big5_target,
                              create_big5_dict, organize_list_json,
                              raise_if_age_is_invalid, raise_if_sex_is_invalid,
-                             reverse_scored)
+                             result_levels, result_scores, reverse_scored,
+                             score_names)
 
 LIB_CURRENT_VERSION = "1.12.1"
 
@@ -600,3 +602,40 @@ class TestUtility(unittest.TestCase):
 
         self.assertEqual(footer.get("library"), "five-factor-e")
         self.assertEqual(footer.get("version"), LIB_CURRENT_VERSION)
+
+    def test_result_scores(self) -> None:
+        names = score_names()
+        self.assertEqual(len(names), 35)
+        self.assertEqual(
+            names[:5],
+            [
+                "openness",
+                "conscientiousness",
+                "extraversion",
+                "agreeableness",
+                "neuroticism",
+            ],
+        )
+        self.assertEqual(names[5], "imagination")
+        self.assertEqual(names[-1], "vulnerability")
+
+        result = IpipNeo(question=120).compute(
+            sex="M", age=40, answers=load_mock_answers(idx=1)
+        )
+        personalities = result["person"]["result"]["personalities"]
+
+        scores, levels = result_scores(result=result), result_levels(result=result)
+        self.assertEqual(len(scores), 35)
+        self.assertEqual(scores[0], personalities[0]["openness"]["O"])
+        self.assertEqual(scores[4], personalities[4]["neuroticism"]["N"])
+        self.assertEqual(
+            scores[5], personalities[0]["openness"]["traits"][0]["imagination"]
+        )
+        self.assertEqual(
+            scores[-1], personalities[4]["neuroticism"]["traits"][5]["vulnerability"]
+        )
+        self.assertEqual(levels[0], personalities[0]["openness"]["score"])
+        self.assertEqual(
+            levels[-1], personalities[4]["neuroticism"]["traits"][5]["score"]
+        )
+        self.assertTrue(set(levels) <= {"low", "average", "high"})